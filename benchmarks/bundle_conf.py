@@ -0,0 +1,64 @@
+"""
+Compares the time to read the bundle.conf of a bundle of many entries with `zipfile.ZipFile`, as formerly done by
+`bundle_utils.conf`, and with the central directory lookup of `bundle_utils.conf`.
+
+Run from the project directory, e.g. for a generated bundle of 50000 entries:
+
+    python3 benchmarks/bundle_conf.py --entries 50000
+
+or against an existing bundle:
+
+    python3 benchmarks/bundle_conf.py path/to/bundle.zip
+"""
+import argparse
+import os
+import sys
+import tempfile
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conductr_cli import bundle_utils  # noqa
+from shazar_digest import timed  # noqa
+
+
+def zipfile_conf(bundle_path):
+    """The approach used before the bundle.conf was looked up in the central directory"""
+    with zipfile.ZipFile(bundle_path) as bundle_zip:
+        bundle_configuration = [bundle_zip.read(name) for name in bundle_zip.namelist() if name.endswith('bundle.conf')]
+    return bundle_configuration[0].decode('utf-8') if len(bundle_configuration) == 1 else ''
+
+
+def create_bundle(path, entries):
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as bundle_zip:
+        for index in range(entries):
+            bundle_zip.writestr('bundle-1.0.0/lib/classes/com/example/package{}/Class{}.class'.format(index % 100, index),
+                                b'\xca\xfe\xba\xbe')
+        bundle_zip.writestr('bundle-1.0.0/bundle.conf', 'name = bundle')
+
+
+def best_of(repeat, func, *args):
+    return min(timed(func, *args) for _ in range(repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the bundle.conf lookup')
+    parser.add_argument('--entries', type=int, default=50000,
+                        help='The number of entries of the generated bundle, defaults to 50000')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='The number of runs of which the fastest is reported, defaults to 5')
+    parser.add_argument('bundle', nargs='?', default=None,
+                        help='An existing bundle, instead of generating one')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        bundle = args.bundle
+        if bundle is None:
+            bundle = os.path.join(work_dir, 'bundle.zip')
+            create_bundle(bundle, args.entries)
+        for name, func in [('zipfile namelist', zipfile_conf), ('central directory lookup', bundle_utils.conf)]:
+            print('{: <26}{:8.3f}s'.format(name, best_of(args.repeat, func, bundle)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Compares the time to import pyhocon and parse a bundle.conf with it, as formerly done by `conduct load`, and with
+`conf_parser.parse`. Each run is a fresh interpreter, so that the import of pyhocon is part of the measurement.
+
+Run from the project directory, e.g. for the bundle.conf of the visualizer test data:
+
+    python3 benchmarks/conf_parser.py conductr_cli/test/data/bundle_conf/visualizer.conf
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+pyhocon_script = """
+from pyhocon import ConfigFactory
+with open({path!r}) as f:
+    ConfigFactory.parse_string(f.read()).get_string('name')
+"""
+
+conf_parser_script = """
+from conductr_cli import conf_parser
+with open({path!r}) as f:
+    conf_parser.parse(f.read()).get_string('name')
+"""
+
+
+def timed_script(script, path):
+    command = [sys.executable, '-c', 'import time; t = time.perf_counter()\n{}\nprint(time.perf_counter() - t)'.format(
+        script.format(path=os.path.abspath(path)))]
+    return float(subprocess.check_output(command, cwd=project_dir))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the parsing of a bundle.conf')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='The number of runs of which the fastest is reported, defaults to 5')
+    parser.add_argument('bundle_conf',
+                        help='The bundle.conf to parse')
+    args = parser.parse_args()
+
+    for name, script in [('pyhocon', pyhocon_script), ('conf_parser', conf_parser_script)]:
+        print('{: <26}{:8.3f}s'.format(name, min(timed_script(script, args.bundle_conf) for _ in range(args.repeat))))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Compares the wall-clock time of `shazar` with that of the baseline version, which wrote the archive with stored
+entries first, and then read it back to compute the digest.
+
+Run from the project directory, e.g. for a generated 4 GB bundle directory:
+
+    python3 benchmarks/shazar_digest.py --size-mb 4096
+
+or against an existing bundle directory:
+
+    python3 benchmarks/shazar_digest.py path/to/bundle
+"""
+from functools import partial
+import argparse
+import hashlib
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conductr_cli import shazar  # noqa
+
+
+def baseline_shazar(source, output_dir):
+    """A copy of the baseline `shazar`, which wrote the archive before digesting it"""
+
+    source_base_name = os.path.basename(source.rstrip('\\/'))
+    temp_file = tempfile.NamedTemporaryFile(suffix='.zip', delete=False).name
+
+    with zipfile.ZipFile(temp_file, 'w') as zip_file:
+        if os.path.isdir(source):
+            for (dir_path, dir_names, file_names) in os.walk(source):
+                for file_name in file_names:
+                    path = os.path.join(dir_path, file_name)
+                    name = os.path.join(source_base_name, os.path.relpath(path, start=source))
+                    zip_file.write(path, name)
+        else:
+            zip_file.write(source, source_base_name)
+
+    dest = os.path.join(output_dir, '{}-{}.zip'.format(source_base_name, create_digest(temp_file)))
+    shutil.move(temp_file, dest)
+
+
+def create_digest(file_name):
+    with open(file_name, mode='rb') as f:
+        d = hashlib.sha256()
+        for buf in iter(partial(f.read, 128), b''):
+            d.update(buf)
+    return d.hexdigest()
+
+
+def current_shazar(source, output_dir):
+    with open(os.devnull, 'w') as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            shazar.shazar(shazar.build_parser().parse_args(['--output-dir', output_dir, '--jobs', '1', source]))
+        finally:
+            sys.stdout = stdout
+
+
+def create_bundle_dir(parent, size_mb, file_mb=64):
+    source = os.path.join(parent, 'bundle-1.0.0')
+    os.makedirs(os.path.join(source, 'lib'))
+    # Bytes from a small alphabet, so that the files compress to roughly two thirds like class files do
+    block = bytes(random.Random(0).choices(range(32), k=1024 * 1024))
+    for index in range(0, size_mb, file_mb):
+        with open(os.path.join(source, 'lib', 'file-{}.dat'.format(index)), 'wb') as f:
+            for _ in range(min(file_mb, size_mb - index)):
+                f.write(block)
+    return source
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the shazar archive digest')
+    parser.add_argument('--size-mb', type=int, default=2048,
+                        help='The size of the generated bundle directory, defaults to 2048')
+    parser.add_argument('source', nargs='?', default=None,
+                        help='An existing bundle directory, instead of generating one')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        source = args.source if args.source is not None else create_bundle_dir(work_dir, args.size_mb)
+        for name, func in [('baseline', baseline_shazar), ('current', current_shazar)]:
+            output_dir = tempfile.mkdtemp(dir=work_dir)
+            print('{: <22}{:8.2f}s'.format(name, timed(func, source, output_dir)))
+            shutil.rmtree(output_dir)
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == '__main__':
+    main()
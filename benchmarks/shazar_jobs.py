@@ -0,0 +1,61 @@
+"""
+Measures how `shazar` scales with the number of compressing processes given by `--jobs`.
+
+Run from the project directory, e.g. for a generated 2 GB bundle directory of 256 files:
+
+    python3 benchmarks/shazar_jobs.py --size-mb 2048 --file-mb 8
+
+or against an existing bundle directory:
+
+    python3 benchmarks/shazar_jobs.py path/to/bundle
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conductr_cli import shazar  # noqa
+from shazar_digest import create_bundle_dir, timed  # noqa
+
+
+def package(source, output_dir, jobs):
+    with open(os.devnull, 'w') as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            shazar.shazar(shazar.build_parser().parse_args(['--output-dir', output_dir, '--jobs', str(jobs), source]))
+        finally:
+            sys.stdout = stdout
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark parallel shazar compression')
+    parser.add_argument('--size-mb', type=int, default=2048,
+                        help='The size of the generated bundle directory, defaults to 2048')
+    parser.add_argument('--file-mb', type=int, default=8,
+                        help='The size of each generated file, defaults to 8')
+    parser.add_argument('source', nargs='?', default=None,
+                        help='An existing bundle directory, instead of generating one')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        source = args.source if args.source is not None else create_bundle_dir(work_dir, args.size_mb, args.file_mb)
+        serial_time = None
+        jobs = 1
+        while jobs <= multiprocessing.cpu_count():
+            output_dir = tempfile.mkdtemp(dir=work_dir)
+            elapsed = timed(package, source, output_dir, jobs)
+            serial_time = elapsed if serial_time is None else serial_time
+            print('--jobs {: <4}{:8.2f}s  {:5.2f}x'.format(jobs, elapsed, serial_time / elapsed))
+            shutil.rmtree(output_dir)
+            jobs *= 2
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == '__main__':
+    main()
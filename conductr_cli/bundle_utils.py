@@ -1,11 +1,50 @@
-from zipfile import ZipFile
+from conductr_cli import zip_reader
+from contextlib import ExitStack
+from functools import partial
+from zipfile import BadZipFile
+
+import hashlib
 
 
 def short_id(bundle_id):
     return '-'.join([part[:7] for part in bundle_id.split('-')])
 
 
-def conf(bundle_path):
-    bundle_zip = ZipFile(bundle_path)
-    bundle_configuration = [bundle_zip.read(name) for name in bundle_zip.namelist() if name.endswith('bundle.conf')]
-    return bundle_configuration[0].decode('utf-8') if len(bundle_configuration) == 1 else ''
+def conf(bundle_file):
+    """
+    Returns the contents of the bundle.conf at the top level of the given bundle path or file object, i.e. either
+    `<root>/bundle.conf` or `bundle.conf`, or '' if there is none. Only the central directory of the archive and
+    the bundle.conf entry itself are read. The position of a file object is restored, so that it can be read again.
+    """
+
+    with ExitStack() as stack:
+        file = stack.enter_context(open(bundle_file, 'rb')) if isinstance(bundle_file, str) else bundle_file
+        position = file.tell()
+        try:
+            candidates = [zinfo for zinfo in zip_reader.find_entries(file, 'bundle.conf') if is_bundle_conf(zinfo.filename)]
+            if len(candidates) > 1:
+                raise BadZipFile('Found more than one top level bundle.conf: {}'.format(
+                    ', '.join(zinfo.filename for zinfo in candidates)))
+            return zip_reader.read_entry(file, candidates[0]).decode('utf-8') if candidates else ''
+        finally:
+            file.seek(position)
+
+
+def file_digest(bundle_file):
+    """
+    Returns the SHA-256 digest of the contents of the given path or file object, from its position on. The position of
+    a file object is restored, so that it can be read again.
+    """
+
+    with ExitStack() as stack:
+        file = stack.enter_context(open(bundle_file, 'rb')) if isinstance(bundle_file, str) else bundle_file
+        position = file.tell()
+        digest = hashlib.sha256()
+        for buf in iter(partial(file.read, 64 * 1024), b''):
+            digest.update(buf)
+        file.seek(position)
+        return digest.hexdigest()
+
+
+def is_bundle_conf(name):
+    return name == 'bundle.conf' or (name.endswith('/bundle.conf') and name.count('/') == 1)
@@ -1,20 +1,20 @@
-import argcomplete
 import argparse
-from conductr_cli import \
-    conduct_info, conduct_load, conduct_run, conduct_services,\
-    conduct_stop, conduct_unload, conduct_version, conduct_logs,\
-    conduct_events
+from conductr_cli import conduct_version, rate_limit
+import importlib
 import os
 
 
 default_ip = os.getenv('CONDUCTR_IP', '127.0.0.1')
 default_port = os.getenv('CONDUCTR_PORT', '9005')
 default_api_version = os.getenv('CONDUCTR_API_VERSION', '1.0')
+default_timeout = os.getenv('CONDUCTR_TIMEOUT')
+default_deadline = os.getenv('CONDUCTR_DEADLINE')
 
 
 def add_ip_and_port(sub_parser):
     sub_parser.add_argument('-i', '--ip',
-                            help='The optional ConductR IP, defaults to $CONDUCTR_IP or "127.0.0.1"',
+                            help='The optional ConductR IP, or a comma separated list of the IPs of several members '
+                                 'to choose from and fail over to, defaults to $CONDUCTR_IP or "127.0.0.1"',
                             default=default_ip)
     sub_parser.add_argument('-p', '--port',
                             type=int,
@@ -22,6 +22,60 @@ def add_ip_and_port(sub_parser):
                             default=default_port)
 
 
+def seconds(value):
+    try:
+        result = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError('invalid number of seconds: {}'.format(value))
+    if result <= 0:
+        raise argparse.ArgumentTypeError('the number of seconds must be positive: {}'.format(value))
+    return result
+
+
+def jobs(value):
+    try:
+        result = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError('invalid number of jobs: {}'.format(value))
+    if result < 1:
+        raise argparse.ArgumentTypeError('the number of jobs must be at least 1: {}'.format(value))
+    return result
+
+
+def timeouts(value):
+    """Parses the connect and read timeouts, given as CONNECT,READ or as a single value for both"""
+
+    values = [seconds(element) for element in value.split(',')]
+    if len(values) > 2:
+        raise argparse.ArgumentTypeError('expected CONNECT,READ or a single number of seconds: {}'.format(value))
+    return values[0], values[-1]
+
+
+def add_timeouts(sub_parser):
+    sub_parser.add_argument('--timeout',
+                            type=timeouts,
+                            help='The seconds to wait for ConductR to accept a connection and to respond, '
+                                 'given as CONNECT,READ or as a single value for both, defaults to $CONDUCTR_TIMEOUT '
+                                 'or 10 seconds to connect and no limit to respond',
+                            default=default_timeout,
+                            metavar='SECONDS')
+    sub_parser.add_argument('--deadline',
+                            type=seconds,
+                            help='The total seconds that all the requests of the command may take, '
+                                 'defaults to $CONDUCTR_DEADLINE or no limit',
+                            default=default_deadline,
+                            metavar='SECONDS')
+
+
+def add_hedge(sub_parser):
+    sub_parser.add_argument('--hedge',
+                            help='Send the request to a second ConductR member too if the first is slow to respond, '
+                                 'when several are given',
+                            default=False,
+                            dest='hedge',
+                            action='store_true')
+
+
 def add_verbose(sub_parser):
     sub_parser.add_argument('-v', '--verbose',
                             help='Print JSON response to the command',
@@ -46,8 +100,26 @@ def add_api_version(sub_parser):
                             choices=conduct_version.supported_api_versions())
 
 
+def command(module_name, function_name):
+    """
+    Returns a handler running the given command function, whose module is only imported once the command is run.
+    Parsing the arguments, and tab completion, thereby import no more than the chosen command needs.
+    """
+
+    def handler(args):
+        module = importlib.import_module('conductr_cli.{}'.format(module_name))
+        return getattr(module, function_name)(args)
+
+    # Do not change the command function name,
+    # so argparse configuration can be tested.
+    handler.__name__ = function_name
+
+    return handler
+
+
 def add_default_arguments(sub_parser):
     add_ip_and_port(sub_parser)
+    add_timeouts(sub_parser)
     add_verbose(sub_parser)
     add_long_ids(sub_parser)
     add_api_version(sub_parser)
@@ -63,31 +135,62 @@ def build_parser():
     # Sub-parser for `version` sub-command
     version_parser = subparsers.add_parser('version',
                                            help='print version')
-    version_parser.set_defaults(func=conduct_version.version)
+    version_parser.set_defaults(func=command('conduct_version', 'version'))
 
     # Sub-parser for `info` sub-command
     info_parser = subparsers.add_parser('info',
                                         help='print bundle information')
     add_default_arguments(info_parser)
-    info_parser.set_defaults(func=conduct_info.info)
+    add_hedge(info_parser)
+    info_parser.set_defaults(func=command('conduct_info', 'info'))
 
     # Sub-parser for `services` sub-command
     services_parser = subparsers.add_parser('services',
                                             help='print service information')
     add_default_arguments(services_parser)
-    services_parser.set_defaults(func=conduct_services.services)
+    add_hedge(services_parser)
+    services_parser.set_defaults(func=command('conduct_services', 'services'))
 
     # Sub-parser for `load` sub-command
     load_parser = subparsers.add_parser('load',
                                         help='load a bundle')
     load_parser.add_argument('bundle',
-                             help='The path to the bundle')
+                             nargs='?',
+                             default=None,
+                             help="The path to the bundle, or '-' to read it from stdin")
     load_parser.add_argument('configuration',
                              nargs='?',
                              default=None,
                              help='The optional configuration for the bundle')
+    load_parser.add_argument('--bundle',
+                             dest='bundles',
+                             nargs='+',
+                             action='append',
+                             metavar=('BUNDLE', 'CONFIGURATION'),
+                             help='A further bundle to load, with its optional configuration, may be repeated')
+    load_parser.add_argument('--manifest',
+                             default=None,
+                             help='A file listing bundles to load, one per line, each optionally followed by its configuration')
+    load_parser.add_argument('-j', '--jobs',
+                             type=jobs,
+                             default=4,
+                             help='The number of bundles uploaded concurrently when loading several, defaults to 4')
+    load_parser.add_argument('--limit-rate',
+                             type=rate_limit.parse_rate,
+                             default=None,
+                             metavar='RATE',
+                             help='Limit the upload and the retrieval of remote bundles to RATE bytes per second, '
+                                  'optionally suffixed by K, M or G, e.g. 2M')
+    load_parser.add_argument('--retries',
+                             type=int,
+                             default=0,
+                             help='The number of times an upload is retried when the connection fails or ConductR is '
+                                  'temporarily unavailable, sending the whole bundle again each time; defaults to 0')
+    load_parser.add_argument('--skip-if-loaded',
+                             action='store_true',
+                             help='Skip the upload if a bundle of the same digest and configuration is loaded already')
     add_default_arguments(load_parser)
-    load_parser.set_defaults(func=conduct_load.load)
+    load_parser.set_defaults(func=command('conduct_load', 'load'))
 
     # Sub-parser for `run` sub-command
     run_parser = subparsers.add_parser('run',
@@ -99,7 +202,7 @@ def build_parser():
     run_parser.add_argument('bundle',
                             help='The ID of the bundle')
     add_default_arguments(run_parser)
-    run_parser.set_defaults(func=conduct_run.run)
+    run_parser.set_defaults(func=command('conduct_run', 'run'))
 
     # Sub-parser for `stop` sub-command
     stop_parser = subparsers.add_parser('stop',
@@ -107,7 +210,7 @@ def build_parser():
     stop_parser.add_argument('bundle',
                              help='The ID of the bundle')
     add_default_arguments(stop_parser)
-    stop_parser.set_defaults(func=conduct_stop.stop)
+    stop_parser.set_defaults(func=command('conduct_stop', 'stop'))
 
     # Sub-parser for `unload` sub-command
     unload_parser = subparsers.add_parser('unload',
@@ -115,12 +218,14 @@ def build_parser():
     unload_parser.add_argument('bundle',
                                help='The ID of the bundle')
     add_default_arguments(unload_parser)
-    unload_parser.set_defaults(func=conduct_unload.unload)
+    unload_parser.set_defaults(func=command('conduct_unload', 'unload'))
 
     # Sub-parser for `events` sub-command
     events_parser = subparsers.add_parser('events',
                                           help='show bundle events')
     add_ip_and_port(events_parser)
+    add_timeouts(events_parser)
+    add_hedge(events_parser)
     events_parser.add_argument('-n', '--lines',
                                type=int,
                                default=10,
@@ -133,12 +238,14 @@ def build_parser():
                                help='Convert the date/time of the events to UTC')
     events_parser.add_argument('bundle',
                                help='The ID or name of the bundle')
-    events_parser.set_defaults(func=conduct_events.events)
+    events_parser.set_defaults(func=command('conduct_events', 'events'))
 
     # Sub-parser for `logs` sub-command
     logs_parser = subparsers.add_parser('logs',
                                         help='show bundle logs')
     add_ip_and_port(logs_parser)
+    add_timeouts(logs_parser)
+    add_hedge(logs_parser)
     logs_parser.add_argument('-n', '--lines',
                              type=int,
                              default=10,
@@ -151,7 +258,13 @@ def build_parser():
                              help='Convert the date/time of the log to UTC')
     logs_parser.add_argument('bundle',
                              help='The ID or name of the bundle')
-    logs_parser.set_defaults(func=conduct_logs.logs)
+    logs_parser.set_defaults(func=command('conduct_logs', 'logs'))
+
+    # Sub-parser for `agent` sub-command
+    agent_parser = subparsers.add_parser('agent',
+                                         help='run an agent that further commands are forwarded to, '
+                                              'sparing their startup')
+    agent_parser.set_defaults(func=command('conduct_agent', 'agent'))
 
     return parser
 
@@ -167,11 +280,14 @@ def get_cli_parameters(args):
     return ' '.join(parameters)
 
 
-def run():
+def run(argv=None):
     # Parse arguments
     parser = build_parser()
-    argcomplete.autocomplete(parser)
-    args = parser.parse_args()
+    if '_ARGCOMPLETE' in os.environ:
+        # Tab completion, which exits once the completions are printed
+        import argcomplete
+        argcomplete.autocomplete(parser)
+    args = parser.parse_args(argv)
     if vars(args).get('func') is None:
         parser.print_help()
     else:
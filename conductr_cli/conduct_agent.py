@@ -0,0 +1,300 @@
+import array
+import json
+import os
+import socket
+import struct
+import sys
+
+
+# The Unix socket of the agent, $CONDUCTR_AGENT_SOCKET or ~/.conductr/agent.sock
+socket_path = os.getenv('CONDUCTR_AGENT_SOCKET', os.path.join(os.path.expanduser('~'), '.conductr', 'agent.sock'))
+
+# The environment variables that commands depend on, besides those prefixed by CONDUCTR_. A command is only forwarded
+# to the agent if their values are the same for the agent, as the agent has read them already, e.g. as defaults.
+environment_names = ['home', 'lang', 'lc_all', 'lc_ctype', 'pythonioencoding', 'http_proxy', 'https_proxy',
+                     'all_proxy', 'no_proxy', 'requests_ca_bundle', 'curl_ca_bundle']
+
+# The standard input, output and error of the client, passed to the agent along with the command
+fd_count = 3
+
+# The seconds between the checks of a running command for the client having gone away
+poll_interval = 0.1
+
+
+def run():
+    """
+    The `conduct` entry point: runs the command in the agent if one is running, else in process. Either way the command
+    reads and writes the standard streams of the client, and its exit status is that of the client.
+    """
+
+    try:
+        status = forward(sys.argv[1:])
+    except KeyboardInterrupt:
+        # Exiting closes the connection to the agent, which interrupts the command in turn
+        sys.exit(130)
+
+    if status is None:
+        from conductr_cli import conduct
+        conduct.run()
+    else:
+        sys.exit(status)
+
+
+def forward(argv):
+    """
+    Forwards a command to the agent, returning its exit status, or None if it must be run in process instead:
+    if no agent of the user is running, or if it runs in a different environment.
+    Tab completion is never forwarded, nor is `conduct agent`.
+    """
+
+    if not hasattr(socket, 'AF_UNIX') or not hasattr(socket.socket, 'sendmsg') or \
+            '_ARGCOMPLETE' in os.environ or argv[:1] == ['agent']:
+        return None
+
+    try:
+        fds = [stream.fileno() for stream in [sys.stdin, sys.stdout, sys.stderr]]
+    except (AttributeError, OSError, ValueError):
+        # Closed or replaced streams
+        return None
+
+    request = {'argv': argv, 'cwd': os.getcwd(), 'environment': environment()}
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        try:
+            client.connect(socket_path)
+            # The standard streams are only passed to an agent of the same user
+            if not is_own(client):
+                return None
+            sys.stdout.flush()
+            sys.stderr.flush()
+            client.sendmsg([json.dumps(request).encode('utf-8') + b'\n'],
+                           [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array('i', fds))])
+            lines = client.makefile('rb')
+            accepted = json.loads(lines.readline().decode('utf-8'))['accepted']
+        except (OSError, ValueError, KeyError):
+            return None
+        if not accepted:
+            return None
+
+        # The command has started, so it must not be run again
+        try:
+            return json.loads(lines.readline().decode('utf-8'))['status']
+        except (OSError, ValueError, KeyError):
+            print('ERROR: The conduct agent stopped while running the command', file=sys.stderr)
+            return 1
+
+
+def environment():
+    return {name: value for name, value in os.environ.items()
+            if name.startswith('CONDUCTR_') or name.lower() in environment_names}
+
+
+def agent(args):
+    """`conduct agent` command"""
+
+    from conductr_cli import conduct_context
+    import signal
+
+    if is_running():
+        print('ERROR: An agent is running already at {}'.format(socket_path), file=sys.stderr)
+        sys.exit(1)
+
+    # The commands are otherwise imported once run, while the agent is to spare any command their import
+    from conductr_cli import conduct_events, conduct_info, conduct_load, conduct_logs, conduct_run, \
+        conduct_services, conduct_stop, conduct_unload  # noqa
+
+    os.makedirs(os.path.dirname(socket_path), mode=0o700, exist_ok=True)
+    remove_socket()
+    server = create_server(environment())
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print('Agent listening on {}'.format(socket_path))
+    sys.stdout.flush()
+    try:
+        with conduct_context.standard_streams():
+            server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        remove_socket()
+
+
+def create_server(agent_environment):
+    """Returns the server of the agent, listening on `socket_path`, for clients of the given environment"""
+
+    import socketserver
+
+    class AgentHandler(socketserver.BaseRequestHandler):
+        def handle(self):
+            try:
+                serve(self.request, agent_environment, self.server.commands)
+            except OSError:
+                # The client went away, e.g. after checking that the agent is running
+                pass
+
+    class AgentServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+        # The commands being run
+        commands = set()
+
+    # Commands are run with the permissions of the agent, so only its user may connect
+    umask = os.umask(0o177)
+    try:
+        return AgentServer(socket_path, AgentHandler)
+    finally:
+        os.umask(umask)
+
+
+def peer_uid(connection):
+    """The user ID of the process at the other end of a Unix socket connection, or None if it cannot be told"""
+
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return None
+    credentials = connection.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+    pid, uid, gid = struct.unpack('3i', credentials)
+    return uid
+
+
+def is_own(connection):
+    """
+    Tells whether the process at the other end of a Unix socket connection runs as the same user. Where the user
+    of the peer cannot be told, the socket must be owned by the user, and is only accessible to them.
+    """
+
+    uid = peer_uid(connection)
+    if uid is None:
+        return os.stat(socket_path).st_uid == os.getuid()
+    return uid == os.getuid()
+
+
+def is_running():
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        try:
+            client.connect(socket_path)
+            return True
+        except OSError:
+            return False
+
+
+def remove_socket():
+    try:
+        os.remove(socket_path)
+    except FileNotFoundError:
+        pass
+
+
+def serve(connection, agent_environment, commands):
+    """
+    Runs a command forwarded over the given connection, with the standard streams and working directory of the client,
+    adding it to the given set of running commands meanwhile. Only commands of clients running as the same user as the
+    agent are run.
+    """
+
+    from conductr_cli import conduct_context
+
+    request, fds = receive(connection)
+    try:
+        if request is None or len(fds) != fd_count or request.get('environment') != agent_environment or \
+                not is_own(connection):
+            reply(connection, {'accepted': False})
+            return
+        reply(connection, {'accepted': True})
+        streams = [open(fd, mode) for fd, mode in zip(fds, ['r', 'w', 'w'])]
+        fds = []
+    finally:
+        for fd in fds:
+            os.close(fd)
+
+    command = conduct_context.Command(*streams, cwd=request['cwd'])
+    commands.add(command)
+    try:
+        status = run_command(request['argv'], command, connection)
+    finally:
+        commands.discard(command)
+        for stream in streams:
+            try:
+                stream.close()
+            except OSError:
+                # The client went away
+                pass
+    reply(connection, {'status': status})
+
+
+def receive(connection):
+    """Returns the request and the file descriptors passed with it, or None and the descriptors if it is malformed"""
+
+    fds = array.array('i')
+    data, ancillary, flags, address = connection.recvmsg(64 * 1024, socket.CMSG_LEN(fd_count * fds.itemsize))
+    for level, kind, fd_data in ancillary:
+        if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+            fds.frombytes(fd_data[:len(fd_data) - len(fd_data) % fds.itemsize])
+    while data and not data.endswith(b'\n'):
+        chunk = connection.recv(64 * 1024)
+        if not chunk:
+            break
+        data += chunk
+    try:
+        request = json.loads(data.decode('utf-8'))
+    except ValueError:
+        request = None
+    return request if isinstance(request, dict) else None, list(fds)
+
+
+def reply(connection, message):
+    connection.sendall(json.dumps(message).encode('utf-8') + b'\n')
+
+
+def watch(connection, command, finished):
+    """Cancels the given command should its client go away, e.g. on Ctrl-C, until the command is finished"""
+
+    import select
+
+    while not finished.is_set():
+        readable, writable, exceptional = select.select([connection], [], [], poll_interval)
+        if readable and not is_open(connection):
+            command.cancel()
+            return
+
+
+def is_open(connection):
+    """Tells whether the client is still connected, given that the connection is readable"""
+
+    try:
+        # The client sends nothing once the command is accepted
+        return connection.recv(1) != b''
+    except OSError:
+        return False
+
+
+def run_command(argv, command, connection):
+    """
+    Runs a command in the thread of its connection, returning its exit status. Commands share the modules, the
+    pooled ConductR connections and the state of the ConductR members of the agent, while each has the streams and
+    working directory of its client.
+    """
+
+    from conductr_cli import conduct, conduct_context
+    from threading import Event, Thread
+    import traceback
+
+    finished = Event()
+    Thread(target=watch, args=(connection, command, finished), daemon=True).start()
+    with conduct_context.running(command):
+        try:
+            conduct.run(argv)
+            status = 0
+        except SystemExit as exit:
+            if exit.code is None or isinstance(exit.code, int):
+                status = exit.code or 0
+            else:
+                print(exit.code, file=sys.stderr)
+                status = 1
+        except KeyboardInterrupt:
+            # The command was cancelled, and only the agent waits for it any more
+            status = 130
+        except Exception:
+            traceback.print_exc()
+            status = 1
+        finally:
+            finished.set()
+    return status
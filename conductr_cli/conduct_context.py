@@ -0,0 +1,111 @@
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+
+import io
+import os
+import sys
+
+
+# The command being run by the agent, or None when run from the command line, which runs one command per process.
+# The agent runs several commands at once, each in a thread of its own and in the threads the command starts.
+current = ContextVar('command', default=None)
+
+
+class Command:
+    """The standard streams and working directory of a command run by the agent, which are those of its client"""
+
+    def __init__(self, stdin, stdout, stderr, cwd):
+        self.stdin = stdin
+        self.stdout = stdout
+        self.stderr = stderr
+        self.cwd = cwd
+        self.cancelled = False
+
+    def cancel(self):
+        """
+        Cancels the command, e.g. as its client went away: it is interrupted before its next request or upload chunk,
+        and nothing it writes reaches the client any more
+        """
+
+        self.stdout = self.stderr = Discarded()
+        self.cancelled = True
+
+
+class Discarded(io.TextIOBase):
+    """An output stream discarding what is written to it"""
+
+    def write(self, text):
+        return len(text)
+
+
+class Stream:
+    """A standard stream standing for that of the command being run, or for the given stream if there is none"""
+
+    def __init__(self, name, default):
+        self.name = name
+        self.default = default
+
+    def stream(self):
+        command = current.get()
+        return self.default if command is None else getattr(command, self.name)
+
+    def __getattr__(self, name):
+        return getattr(self.stream(), name)
+
+    def __iter__(self):
+        return iter(self.stream())
+
+
+@contextmanager
+def standard_streams():
+    """Replaces the standard streams by those of the command being run, for the agent to run several at once"""
+
+    saved = sys.stdin, sys.stdout, sys.stderr
+    sys.stdin, sys.stdout, sys.stderr = [Stream(name, stream) for name, stream in
+                                         zip(['stdin', 'stdout', 'stderr'], saved)]
+    try:
+        yield
+    finally:
+        sys.stdin, sys.stdout, sys.stderr = saved
+
+
+@contextmanager
+def running(command):
+    token = current.set(command)
+    try:
+        yield
+    finally:
+        current.reset(token)
+
+
+def propagated(func):
+    """
+    Returns a function calling the given one in the context of the command being run, for the command to be run on
+    in another thread. The returned function is to be called once.
+    """
+
+    context = copy_context()
+
+    def call(*args, **kwargs):
+        return context.run(func, *args, **kwargs)
+
+    return call
+
+
+def cwd():
+    command = current.get()
+    return os.getcwd() if command is None else command.cwd
+
+
+def path(name):
+    """Returns the given path relative to the working directory of the command being run; absolute paths are kept"""
+
+    return os.path.join(cwd(), name)
+
+
+def check_cancelled():
+    """Interrupts the command being run if it is cancelled, as Ctrl-C interrupts a command run from the command line"""
+
+    command = current.get()
+    if command is not None and command.cancelled:
+        raise KeyboardInterrupt
@@ -0,0 +1,188 @@
+from conductr_cli import conduct_context, conduct_members
+from contextlib import contextmanager
+from contextvars import ContextVar
+from queue import Empty, Queue
+from threading import Lock, Thread
+from time import monotonic
+
+import requests
+import requests.adapters
+
+
+# The seconds to wait for a connection to a ConductR node, unless given by `--timeout`. Responses are waited for
+# without a timeout by default, as ConductR only responds to a load once the bundle is stored.
+connect_timeout = 10
+read_timeout = None
+
+# The (connect, read) timeouts and the monotonic deadline of the command being run, if given
+command_timeouts = ContextVar('command_timeouts', default=None)
+command_deadline = ContextVar('command_deadline', default=None)
+
+# The connections kept alive per ConductR node, unless more concurrent requests are expected
+pool_size = 4
+
+shared_session = None
+session_lock = Lock()
+
+
+def session():
+    """
+    Returns the session through which every ConductR request is sent, created on first use. Its pool keeps the
+    connections alive across requests, so that commands sending several requests, and programs calling several
+    commands, pay for the TCP handshake only once per node.
+    """
+
+    global shared_session
+    with session_lock:
+        if shared_session is None:
+            shared_session = requests.Session()
+            mount(shared_session, pool_size)
+        return shared_session
+
+
+def grow_pool(size):
+    """Keeps at least the given number of connections alive per ConductR node, for as many concurrent requests"""
+
+    global pool_size
+    http_session = session()
+    with session_lock:
+        if size > pool_size:
+            pool_size = size
+            mount(http_session, pool_size)
+
+
+def mount(http_session, size):
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=size)
+    http_session.mount('http://', adapter)
+    http_session.mount('https://', adapter)
+
+
+def close():
+    """Closes the pooled connections; the next request creates a new session"""
+
+    global shared_session
+    with session_lock:
+        if shared_session is not None:
+            shared_session.close()
+            shared_session = None
+
+
+def request(method, url, **kwargs):
+    """
+    Sends a request, failing over to the next healthy member on a connection error when several ConductR members are
+    given. Requests with a body are not sent again, as the body may be a stream consumed already.
+    """
+
+    timeout = kwargs.pop('timeout', None)
+    while True:
+        conduct_context.check_cancelled()
+        try:
+            response = session().request(method, url, timeout=timeout or request_timeouts(), **kwargs)
+        except requests.exceptions.ConnectionError:
+            next_url = conduct_members.record_failure(url)
+            if next_url is None or kwargs.get('data') is not None:
+                raise
+            url = next_url
+        else:
+            # The time of a request with a body includes its upload, which says little of how fast the member responds
+            has_body = kwargs.get('data') is not None or kwargs.get('files') is not None
+            conduct_members.record_response(url, None if has_body else response.elapsed.total_seconds())
+            return response
+
+
+def with_timeouts(func):
+    """
+    Sends the requests of a command with the timeouts given by `args.timeout`, and within the deadline given by
+    `args.deadline`: the requests share its time, each being sent with no more than the time left.
+    """
+
+    def handler(args, *other_args, **kwargs):
+        with timeouts(args.timeout, args.deadline):
+            return func(args, *other_args, **kwargs)
+
+    # Do not change the wrapped function name,
+    # so argparse configuration can be tested.
+    handler.__name__ = func.__name__
+
+    return handler
+
+
+@contextmanager
+def timeouts(timeout, deadline):
+    timeouts_token = command_timeouts.set(timeout)
+    deadline_token = command_deadline.set(None if deadline is None else monotonic() + deadline)
+    try:
+        yield
+    finally:
+        command_deadline.reset(deadline_token)
+        command_timeouts.reset(timeouts_token)
+
+
+def time_left():
+    """The seconds left before the deadline of the command, or None if it has none"""
+
+    deadline = command_deadline.get()
+    return None if deadline is None else deadline - monotonic()
+
+
+def request_timeouts():
+    """
+    Returns the (connect, read) timeouts of the next request, bounded by the time left before the deadline,
+    raising `requests.exceptions.Timeout` if there is none left
+    """
+
+    connect, read = command_timeouts.get() or (connect_timeout, read_timeout)
+    left = time_left()
+    if left is None:
+        return connect, read
+    if left <= 0:
+        raise requests.exceptions.Timeout('The deadline of the command passed')
+    return min(connect, left), left if read is None else min(read, left)
+
+
+def hedged_request(method, url, **kwargs):
+    """
+    Sends a request, which must be safe to send twice, and sends it again to a second member if the first is slower
+    to respond than usual, returning the response that arrives first. The other request is left to complete.
+    """
+
+    alternative_url = conduct_members.alternative(url)
+    if alternative_url is None:
+        return request(method, url, **kwargs)
+
+    results = Queue()
+
+    def send(request_url):
+        try:
+            results.put((request(method, request_url, **kwargs), None))
+        except Exception as err:
+            results.put((None, err))
+
+    Thread(target=conduct_context.propagated(send), args=(url,), daemon=True).start()
+    try:
+        response, err = results.get(timeout=conduct_members.hedge_delay(url))
+    except Empty:
+        Thread(target=conduct_context.propagated(send), args=(alternative_url,), daemon=True).start()
+        response, err = results.get()
+        if err is not None:
+            # The other request may yet succeed
+            response, err = results.get()
+    if err is not None:
+        raise err
+    return response
+
+
+def get(url, hedge=False, **kwargs):
+    return hedged_request('GET', url, **kwargs) if hedge else request('GET', url, **kwargs)
+
+
+def put(url, **kwargs):
+    return request('PUT', url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request('POST', url, **kwargs)
+
+
+def delete(url, **kwargs):
+    return request('DELETE', url, **kwargs)
@@ -1,106 +1,478 @@
-from pyhocon import ConfigFactory, ConfigTree
-from pyhocon.exceptions import ConfigMissingException
-from conductr_cli import bundle_utils, conduct_url, conduct_logging
+from conductr_cli import bundle_utils, conduct_context, conduct_http, conduct_info, conduct_members, conduct_url, conduct_logging, \
+    conf_cache, conf_parser, download_cache, multipart, progress, rate_limit
+from conductr_cli.conf_parser import Config
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import ExitStack, contextmanager
 from functools import partial
+from time import perf_counter, sleep
 from urllib.parse import ParseResult, urlparse, urlunparse
-from urllib.request import urlretrieve
+from urllib.request import url2pathname, urlretrieve
 from pathlib import Path
 
+import hashlib
 import json
+import random
 import requests
+import sys
+import tempfile
+
+
+# The responses of ConductR, or of a proxy in front of it, telling that it is temporarily unavailable
+retry_status_codes = [502, 503, 504]
+
+# The size in bytes up to which a bundle read from stdin is held in memory rather than in a temporary file
+stdin_spool_size = 16 * 1024 * 1024
+
+# The delay in seconds before the first retry of an upload, doubling with each further retry
+retry_delay_base = 1.0
+max_retry_delay = 30.0
 
 
 @conduct_logging.handle_connection_error
+@conduct_logging.handle_timeout
 @conduct_logging.handle_http_error
 @conduct_logging.handle_invalid_config
 @conduct_logging.handle_no_file
 @conduct_logging.handle_bad_zip
+@conduct_http.with_timeouts
 def load(args):
     """`conduct load` command"""
 
-    print('Retrieving bundle...')
-    bundle_name, bundle_url = get_url(args.bundle)
-    bundle_file, bundle_headers = urlretrieve(bundle_url)
+    if args.bundles or args.manifest is not None:
+        try:
+            loads = requested_loads(args)
+        except ValueError as err:
+            conduct_logging.error(err.args[0])
+            return
+        load_all(args, loads)
+        return
+    if args.bundle is None:
+        # A usage error, exiting with the status of those reported by argparse
+        conduct_logging.error('No bundle to load: give a bundle, --bundle or --manifest')
+        sys.exit(2)
 
-    configuration_file, configuration_headers, configuration_name = (None, None, None)
-    if args.configuration is not None:
-        print('Retrieving configuration...')
-        configuration_name, configuration_url = get_url(args.configuration)
-        configuration_file, configuration_headers = urlretrieve(configuration_url)
+    # The progress of the upload is only shown on a terminal, keeping logs small
+    result = load_bundle(args, args.bundle, args.configuration, show_progress=progress.is_tty(sys.stdout),
+                         rate_limiters=rate_limiters(args))
 
-    bundle_conf = ConfigFactory.parse_string(bundle_utils.conf(bundle_file))
-    overlay_bundle_conf = None if configuration_file is None else \
-        ConfigFactory.parse_string(bundle_utils.conf(configuration_file))
+    if args.verbose:
+        if result['response_text'] is not None:
+            conduct_logging.pretty_json(result['response_text'])
+        print_timeline(result['timeline'])
+        if result['upload'] is not None:
+            print(json.dumps(result['upload'], sort_keys=True))
 
-    with_bundle_configurations = partial(apply_to_configurations, bundle_conf, overlay_bundle_conf)
+    print('Bundle already loaded.' if result['already_loaded'] else 'Bundle loaded.')
+    print_next_steps(args, result['bundle_id'])
 
-    url = conduct_url.url('bundles', args)
-    files = get_payload(args.api_version, bundle_name, bundle_file, with_bundle_configurations)
-    if configuration_file is not None:
-        files.append(('configuration', (configuration_name, open(configuration_file, 'rb'))))
 
-    print('Loading bundle to ConductR...')
-    response = requests.post(url, files=files)
-    conduct_logging.raise_for_status_inc_3xx(response)
+def load_bundle(args, bundle, configuration, log=print, show_progress=False, rate_limiters=(None, None)):
+    """
+    Loads a bundle and its optional configuration, logging the progress with the given function. The upload and the
+    retrieval of remote files are throttled by the given pair of rate limiters, if any. Returns a dict of the ID of the loaded bundle, whether it was
+    loaded already, the size and duration of the upload, the response text, the timeline of the phases and the
+    summary of the upload.
+    """
 
-    if args.verbose:
-        conduct_logging.pretty_json(response.text)
+    upload_limiter, download_limiter = rate_limiters
+    # The durations of the phases of the load, printed in verbose mode
+    timeline = []
+    with ExitStack() as stack:
+        # The bundle and its configuration are retrieved, and then parsed, concurrently
+        executor = stack.enter_context(ThreadPoolExecutor(2))
+
+        log('Retrieving bundle...')
+        # The digest of a bundle read from stdin names it, and is computed as the bundle is read
+        stdin_digest = None
+        if bundle == '-':
+            stdin_digest = hashlib.sha256()
+            bundle_name, openers = None, [partial(read_stdin, stdin_digest)]
+        else:
+            bundle_name, bundle_url = get_url(bundle)
+            openers = [partial(open_url, bundle_url, rate_limiter=download_limiter)]
+
+        configuration_name = None
+        if configuration is not None:
+            log('Retrieving configuration...')
+            configuration_name, configuration_url = get_url(configuration)
+            openers.append(partial(open_url, configuration_url, rate_limiter=download_limiter))
+
+        with timed(timeline, 'Retrieval'):
+            files = run_all(executor, openers, stack)
+        bundle_file, configuration_file = files if len(files) == 2 else (files[0], None)
+
+        if args.skip_if_loaded:
+            with timed(timeline, 'Loaded bundle check'):
+                bundle_digest, configuration_digest = run_all(executor, [
+                    partial(digest, bundle_name, bundle_file) if stdin_digest is None else stdin_digest.hexdigest,
+                    partial(digest, configuration_name, configuration_file)
+                ])
+                log('Checking for a loaded bundle...')
+                loaded_bundle_id = find_loaded_bundle(args, bundle_digest, configuration_digest)
+            if loaded_bundle_id is not None:
+                return {'bundle_id': loaded_bundle_id, 'already_loaded': True, 'size': 0, 'upload_duration': 0.0,
+                        'response_text': None, 'timeline': timeline, 'upload': None}
+
+        # Parsing is skipped altogether for digested bundles and configurations loaded before
+        cache_key = conf_cache.key(args.api_version, bundle_name, configuration_name)
+        payload = conf_cache.get(cache_key)
+        if payload is None:
+            with timed(timeline, 'Parsing'):
+                bundle_conf, overlay_bundle_conf = run_all(executor, [
+                    partial(parse_conf, bundle_file),
+                    partial(parse_conf, configuration_file)
+                ])
+
+                with_bundle_configurations = partial(apply_to_configurations, bundle_conf, overlay_bundle_conf)
+                if bundle_name is None:
+                    bundle_name = '{}-{}.zip'.format(with_bundle_configurations(Config.get_string, 'name'),
+                                                     stdin_digest.hexdigest())
+                payload = get_payload(args.api_version, with_bundle_configurations)
+            conf_cache.put(cache_key, payload)
+
+        url = conduct_url.url('bundles', args)
+        files = payload + [('bundle', (bundle_name, bundle_file))]
+        if configuration_file is not None:
+            files.append(('configuration', (configuration_name, configuration_file)))
+
+        log('Loading bundle to ConductR...')
+        with timed(timeline, 'Upload'):
+            response, size, upload = post_with_retries(args, url, files, log, show_progress, upload_limiter)
+        conduct_logging.raise_for_status_inc_3xx(response)
+
+    return {'bundle_id': json.loads(response.text)['bundleId'], 'already_loaded': False, 'size': size,
+            'upload_duration': timeline[-1][1], 'response_text': response.text, 'timeline': timeline,
+            'upload': upload}
+
+
+def post_with_retries(args, url, files, log, show_progress=False, rate_limiter=None):
+    """
+    Posts the bundle, retrying up to `args.retries` times with exponential backoff when the connection fails or
+    ConductR responds that it is temporarily unavailable. ConductR does not support resuming an upload, so every retry
+    sends the whole body again, from the start of each file. Returns the last response, the size of the body and the
+    summary of the last upload, along with the number of attempts and of bytes sent by the failed ones.
+    """
+
+    file_positions = [(value[1], value[1].tell()) for name, value in files if isinstance(value, tuple)]
+    resent_bytes = 0
+    attempt = 0
+    while True:
+        multipart_files = multipart.MultipartEncoder(files)
+        upload = progress.UploadProgress(len(multipart_files), sys.stdout if show_progress else None)
+        multipart_files.callback = partial(chunk_sent, rate_limiter, upload.sent)
+        response, connection_error = None, None
+        try:
+            response = conduct_http.post(url, data=multipart_files, headers={'Content-Type': multipart_files.content_type})
+            failure = None if response.status_code not in retry_status_codes else \
+                '{} {}'.format(response.status_code, response.reason)
+        except requests.exceptions.ConnectionError as err:
+            if attempt == args.retries:
+                raise
+            failure, connection_error = str(err), err
+            # The retry goes to another member when several are given
+            url = conduct_members.alternative(url) or url
+        finally:
+            upload.finish()
+
+        delay = retry_delay(attempt)
+        # No retry is made that the deadline of the command would pass before it is sent
+        time_left = conduct_http.time_left()
+        out_of_time = time_left is not None and time_left <= delay
+        if out_of_time and connection_error is not None:
+            raise connection_error
+        if failure is None or attempt == args.retries or out_of_time:
+            return response, upload.total, dict(upload.summary(), attempts=attempt + 1, resent_bytes=resent_bytes)
 
-    response_json = json.loads(response.text)
-    bundle_id = response_json['bundleId'] if args.long_ids else bundle_utils.short_id(response_json['bundleId'])
+        resent_bytes += upload.sent_bytes
+        log('Upload failed: {}. Retrying in {:.1f}s...'.format(failure, delay))
+        sleep(delay)
+        attempt += 1
+        for file, position in file_positions:
+            file.seek(position)
 
-    print('Bundle loaded.')
+
+def retry_delay(attempt):
+    """The backoff before the given retry, doubling with each attempt, with jitter to spread concurrent retries"""
+
+    return min(max_retry_delay, retry_delay_base * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+def requested_loads(args):
+    """Returns the (bundle, configuration) pairs to load, given as arguments, by --bundle options and by the manifest"""
+
+    loads = [] if args.bundle is None else [(args.bundle, args.configuration)]
+    for bundle_and_configuration in args.bundles or []:
+        loads.append(bundle_and_configuration_pair(bundle_and_configuration, '--bundle'))
+    if args.manifest is not None:
+        loads.extend(read_manifest(args.manifest))
+    return loads
+
+
+def read_manifest(manifest):
+    """
+    Reads a manifest of bundles to load: a line per bundle, holding the path or URL of the bundle, optionally followed
+    by the path or URL of its configuration. Blank lines and lines starting with # are ignored.
+    """
+
+    with open(conduct_context.path(manifest), 'r') as f:
+        return [bundle_and_configuration_pair(line.split(), manifest) for line in f
+                if line.strip() and not line.lstrip().startswith('#')]
+
+
+def bundle_and_configuration_pair(values, source):
+    if len(values) > 2:
+        raise ValueError('Expected a bundle and an optional configuration in {}: {}'.format(source, ' '.join(values)))
+    return values[0], values[1] if len(values) == 2 else None
+
+
+def load_all(args, loads):
+    """
+    Loads several bundles, with at most `args.jobs` uploads in flight over a shared pool of connections,
+    and prints a summary of the loaded bundles. A bundle failing to load does not affect the others.
+    """
+
+    print('Loading {} bundles to ConductR...'.format(len(loads)))
+    conduct_http.grow_pool(args.jobs)
+    with ThreadPoolExecutor(args.jobs) as executor:
+        # The rates are limited for all the bundles together
+        limiters = rate_limiters(args)
+        futures = [executor.submit(conduct_context.propagated(load_quietly), args, limiters, *load) for load in loads]
+        results = [future.result() for future in futures]
+
+    print_summary(args, loads, results)
+    if None in results:
+        sys.exit(1)
+
+
+def load_quietly(args, limiters, bundle, configuration):
+    """
+    Loads one of several bundles, returning None if it failed. Failures the error handlers do not know about are
+    logged along with the bundle, rather than stopping the load of the other bundles.
+    """
+
+    try:
+        return load_reported(args, limiters, bundle, configuration)
+    except Exception as err:
+        conduct_logging.error('Failed to load {}: {}: {}', bundle, type(err).__name__, err)
+        return None
+
+
+@conduct_logging.handle_connection_error
+@conduct_logging.handle_timeout
+@conduct_logging.handle_http_error
+@conduct_logging.handle_invalid_config
+@conduct_logging.handle_no_file
+@conduct_logging.handle_bad_zip
+def load_reported(args, limiters, bundle, configuration):
+    """Loads one of several bundles, returning None if it failed, as reported by the error handlers"""
+
+    return load_bundle(args, bundle, configuration, log=lambda message: None, rate_limiters=limiters)
+
+
+def print_summary(args, loads, results):
+    rows = [{'id': 'ID', 'status': 'STATUS', 'size': 'SIZE', 'time': 'TIME', 'throughput': 'THROUGHPUT', 'bundle': 'BUNDLE'}]
+    for (bundle, configuration), result in zip(loads, results):
+        row = {'id': '', 'status': '', 'size': '', 'time': '', 'throughput': '',
+               'bundle': bundle if configuration is None else '{} {}'.format(bundle, configuration)}
+        if result is None:
+            row['status'] = 'failed'
+        else:
+            row['id'] = result['bundle_id'] if args.long_ids else bundle_utils.short_id(result['bundle_id'])
+            if result['already_loaded']:
+                row['status'] = 'skipped'
+            else:
+                duration = result['upload_duration']
+                row.update({
+                    'status': 'loaded',
+                    'size': progress.format_size(result['size']),
+                    'time': '{:.1f}s'.format(duration),
+                    'throughput': '' if duration == 0 else '{}/s'.format(progress.format_size(result['size'] / duration))
+                })
+        rows.append(row)
+
+    column_widths = dict(conduct_info.calc_column_widths(rows), **{'padding': '  '})
+    for row in rows:
+        print("""\
+{id: <{id_width}}{padding}\
+{status: <{status_width}}{padding}\
+{size: >{size_width}}{padding}\
+{time: >{time_width}}{padding}\
+{throughput: >{throughput_width}}{padding}\
+{bundle}""".format(**dict(row, **column_widths)))
+
+    loaded = [result for result in results if result is not None and not result['already_loaded']]
+    print('{} loaded, {} skipped, {} failed, {} uploaded'.format(
+        len(loaded), len([result for result in results if result is not None]) - len(loaded), results.count(None),
+        progress.format_size(sum(result['size'] for result in loaded))))
+
+
+def rate_limiters(args):
+    """Returns the limiters of the upload rate and of the retrieval rate given by --limit-rate, if any"""
+
+    if args.limit_rate is None:
+        return None, None
+    return rate_limit.TokenBucket(args.limit_rate), rate_limit.TokenBucket(args.limit_rate)
+
+
+def chunk_sent(rate_limiter, callback, count):
+    """Called as a chunk of the upload is read: interrupts a cancelled command, and throttles the upload if limited"""
+
+    conduct_context.check_cancelled()
+    if rate_limiter is not None:
+        rate_limiter.consume(count)
+    callback(count)
+
+
+def run_all(executor, calls, stack=None):
+    """
+    Runs the given calls concurrently, returning their results once all are done or raising the exception of the first
+    that failed. Given a stack, the files returned by the calls are closed on leaving it, even if another call failed.
+    """
+
+    futures = [executor.submit(conduct_context.propagated(call)) for call in calls]
+    wait(futures)
+    if stack is not None:
+        for future in futures:
+            if future.exception() is None:
+                stack.enter_context(future.result())
+    return [future.result() for future in futures]
+
+
+@contextmanager
+def timed(timeline, phase):
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timeline.append((phase, perf_counter() - start))
+
+
+def print_timeline(timeline):
+    for phase, duration in timeline:
+        print('{} took {:.3f}s'.format(phase, duration))
+
+
+def parse_conf(file):
+    return None if file is None else conf_parser.parse(bundle_utils.conf(file))
+
+
+def print_next_steps(args, bundle_id):
+    if not args.long_ids:
+        bundle_id = bundle_utils.short_id(bundle_id)
     print('Start bundle with: conduct run{} {}'.format(args.cli_parameters, bundle_id))
     print('Unload bundle with: conduct unload{} {}'.format(args.cli_parameters, bundle_id))
     print('Print ConductR info with: conduct info{}'.format(args.cli_parameters))
 
 
+def digest(name, file):
+    """
+    Returns the SHA-256 digest of a bundle or configuration: the one carried by the file name of a digested archive,
+    which ConductR verifies when loading it, or else the digest of the contents. The position of the file is restored.
+    """
+
+    if file is None:
+        return None
+    name_digest = None if name is None else conf_cache.digest(name)
+    if name_digest is not None:
+        return name_digest
+
+    return bundle_utils.file_digest(file)
+
+
+def find_loaded_bundle(args, bundle_digest, configuration_digest):
+    """Returns the ID of the loaded bundle of the given digests, or None if there is none"""
+
+    response = conduct_http.get(conduct_url.url('bundles', args))
+    conduct_logging.raise_for_status_inc_3xx(response)
+
+    for bundle in json.loads(response.text):
+        if bundle.get('bundleDigest') == bundle_digest and bundle.get('configurationDigest') == configuration_digest:
+            return bundle['bundleId']
+    return None
+
+
 def apply_to_configurations(base_conf, overlay_conf, method, key):
     if overlay_conf is None:
         return method(base_conf, key)
     else:
         try:
             return method(overlay_conf, key)
-        except ConfigMissingException:
+        except conf_parser.ConfigMissingError:
             return method(base_conf, key)
 
 
 def get_url(uri):
     parsed = urlparse(uri, scheme='file')
     op = Path(uri)
-    np = str(op.cwd() / op if parsed.scheme == 'file' and op.root == '' else parsed.path)
+    np = str(Path(conduct_context.cwd()) / op if parsed.scheme == 'file' and op.root == '' else parsed.path)
     url = urlunparse(ParseResult(parsed.scheme, parsed.netloc, np, parsed.params, parsed.query, parsed.fragment))
     return (url.split('/')[-1], url)
 
 
-def get_payload(api_version, bundle_name, bundle_file, bundle_configuration):
+def open_url(url, rate_limiter=None):
+    """
+    Opens the file behind the given URL for reading.
+    Local files are opened in place, HTTP(S) resources are retrieved through the download cache,
+    and any other resource is retrieved into a temporary file first, throttled by the optional rate limiter.
+    """
+
+    parsed = urlparse(url)
+    if parsed.scheme == 'file':
+        path = url2pathname(parsed.path)
+    elif parsed.scheme in ('http', 'https'):
+        return download_cache.retrieve(url, rate_limiter)
+    else:
+        path, headers = urlretrieve(url, reporthook=rate_limit.reporthook(rate_limiter))
+    return open(path, 'rb')
+
+
+def read_stdin(stdin_digest):
+    """
+    Reads a bundle piped to stdin, e.g. by `shazar --output-dir -`, updating the given digest with its contents.
+    The bundle is spooled to a temporary file, which is only held in memory while it is small: its digest must be
+    known to name it before it is sent, and it is only known once the whole bundle is read.
+    """
+
+    file = tempfile.SpooledTemporaryFile(max_size=stdin_spool_size)
+    try:
+        for buf in iter(partial(sys.stdin.buffer.read, 64 * 1024), b''):
+            stdin_digest.update(buf)
+            file.write(buf)
+        file.seek(0)
+    except BaseException:
+        file.close()
+        raise
+    return file
+
+
+def get_payload(api_version, bundle_configuration):
+    """Returns the form fields describing the bundle, which precede the bundle itself"""
+
     if api_version == '1.0':
-        return get_v_1_0_payload(bundle_name, bundle_file, bundle_configuration)
+        return get_v_1_0_payload(bundle_configuration)
     else:
-        return get_v_1_1_payload(bundle_name, bundle_file, bundle_configuration)
+        return get_v_1_1_payload(bundle_configuration)
 
 
-def get_v_1_0_payload(bundle_name, bundle_file, bundle_configuration):
+def get_v_1_0_payload(bundle_configuration):
     return [
-        ('nrOfCpus', bundle_configuration(ConfigTree.get_string, 'nrOfCpus')),
-        ('memory', bundle_configuration(ConfigTree.get_string, 'memory')),
-        ('diskSpace', bundle_configuration(ConfigTree.get_string, 'diskSpace')),
-        ('roles', ' '.join(bundle_configuration(ConfigTree.get_list, 'roles'))),
-        ('bundleName', bundle_configuration(ConfigTree.get_string, 'name')),
-        ('system', bundle_configuration(ConfigTree.get_string, 'system')),
-        ('bundle', (bundle_name, open(bundle_file, 'rb')))
+        ('nrOfCpus', bundle_configuration(Config.get_string, 'nrOfCpus')),
+        ('memory', bundle_configuration(Config.get_string, 'memory')),
+        ('diskSpace', bundle_configuration(Config.get_string, 'diskSpace')),
+        ('roles', ' '.join(bundle_configuration(Config.get_list, 'roles'))),
+        ('bundleName', bundle_configuration(Config.get_string, 'name')),
+        ('system', bundle_configuration(Config.get_string, 'system'))
     ]
 
 
-def get_v_1_1_payload(bundle_name, bundle_file, bundle_configuration):
+def get_v_1_1_payload(bundle_configuration):
     return [
-        ('nrOfCpus', bundle_configuration(ConfigTree.get_string, 'nrOfCpus')),
-        ('memory', bundle_configuration(ConfigTree.get_string, 'memory')),
-        ('diskSpace', bundle_configuration(ConfigTree.get_string, 'diskSpace')),
-        ('roles', ' '.join(bundle_configuration(ConfigTree.get_list, 'roles'))),
-        ('bundleName', bundle_configuration(ConfigTree.get_string, 'name')),
-        ('system', bundle_configuration(ConfigTree.get_string, 'system')),
-        ('systemVersion', bundle_configuration(ConfigTree.get_string, 'systemVersion')),
-        ('compatibilityVersion', bundle_configuration(ConfigTree.get_string, 'compatibilityVersion')),
-        ('bundle', (bundle_name, open(bundle_file, 'rb')))
+        ('nrOfCpus', bundle_configuration(Config.get_string, 'nrOfCpus')),
+        ('memory', bundle_configuration(Config.get_string, 'memory')),
+        ('diskSpace', bundle_configuration(Config.get_string, 'diskSpace')),
+        ('roles', ' '.join(bundle_configuration(Config.get_list, 'roles'))),
+        ('bundleName', bundle_configuration(Config.get_string, 'name')),
+        ('system', bundle_configuration(Config.get_string, 'system')),
+        ('systemVersion', bundle_configuration(Config.get_string, 'systemVersion')),
+        ('compatibilityVersion', bundle_configuration(Config.get_string, 'compatibilityVersion'))
     ]
@@ -3,9 +3,9 @@ import sys
 import urllib
 import arrow
 
-from pyhocon.exceptions import ConfigException
+from conductr_cli.conf_parser import ConfigError
 from requests import status_codes
-from requests.exceptions import ConnectionError, HTTPError
+from requests.exceptions import ConnectionError, HTTPError, Timeout
 from urllib.error import URLError
 from zipfile import BadZipFile
 
@@ -25,6 +25,14 @@ def connection_error(err):
     error('Make sure it can be accessed at {}'.format(err.request.url))
 
 
+def timeout_error(err):
+    error('Timed out waiting for ConductR.')
+    error('Reason: {}'.format(err.args[0]))
+    if err.request is not None:
+        error('Make sure it can be accessed at {}'.format(err.request.url))
+    error('Allow more time with --timeout and --deadline')
+
+
 def pretty_json(s):
     s_json = json.loads(s)
     print(json.dumps(s_json, sort_keys=True, indent=2, separators=(',', ': ')))
@@ -44,6 +52,20 @@ def handle_connection_error(func):
     return handler
 
 
+def handle_timeout(func):
+    def handler(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except Timeout as err:
+            timeout_error(err)
+
+    # Do not change the wrapped function name,
+    # so argparse configuration can be tested.
+    handler.__name__ = func.__name__
+
+    return handler
+
+
 def handle_http_error(func):
     def handler(*args, **kwargs):
         try:
@@ -64,7 +86,7 @@ def handle_invalid_config(func):
     def handler(*args, **kwargs):
         try:
             return func(*args, **kwargs)
-        except ConfigException as err:
+        except ConfigError as err:
             error('Unable to parse bundle.conf.')
             error('{}.', err.args[0])
 
@@ -83,6 +105,8 @@ def handle_no_file(func):
             error('Resource not found: {}', err.url)
         except URLError as err:
             error('File not found: {}', err.args[0])
+        except FileNotFoundError as err:
+            error('File not found: {}', err.filename)
 
     # Do not change the wrapped function name,
     # so argparse configuration can be tested.
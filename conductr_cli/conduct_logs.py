@@ -1,15 +1,16 @@
-from conductr_cli import conduct_logging, conduct_info, conduct_url
+from conductr_cli import conduct_logging, conduct_info, conduct_url, conduct_http
 import json
-import requests
 
 
 @conduct_logging.handle_connection_error
+@conduct_logging.handle_timeout
 @conduct_logging.handle_http_error
+@conduct_http.with_timeouts
 def logs(args):
     """`conduct logs` command"""
 
     request_url = conduct_url.url('bundles/{}/logs?count={}'.format(args.bundle, args.lines), args)
-    response = requests.get(request_url)
+    response = conduct_http.get(request_url, hedge=args.hedge)
     conduct_logging.raise_for_status_inc_3xx(response)
 
     data = [
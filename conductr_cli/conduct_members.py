@@ -0,0 +1,180 @@
+from queue import Empty, Queue
+from threading import Lock, Thread
+from time import monotonic, perf_counter
+from urllib.parse import urlsplit, urlunsplit
+
+import socket
+
+
+# The seconds to wait for a member to accept a connection when probing
+probe_timeout = 2.0
+
+# The seconds during which a member that failed is only used if every other member failed too
+failure_ttl = 30.0
+
+# The weight of the latest time in the moving averages of the response and connection times of a member
+latency_weight = 0.3
+
+# The bounds in seconds of the delay after which a hedged request is sent to a second member, and its value
+# while the response time of the first is unknown
+min_hedge_delay = 0.05
+max_hedge_delay = 1.0
+default_hedge_delay = 0.25
+
+# The (host, port) members of each cluster, by member, the moving averages of the response times and of the times to
+# connect when probing of each member, and the last failure of each member
+clusters = {}
+latencies = {}
+connect_latencies = {}
+failures = {}
+members_lock = Lock()
+
+
+def parse(ip):
+    """Returns the members given by the value of `--ip`, which is an IP or host, or a comma separated list of them"""
+
+    return [member.strip().lower() for member in ip.split(',') if member.strip()]
+
+
+def choose(ip, port):
+    """
+    Returns the host of the member to send requests to, out of those given by the value of `--ip`: the best healthy
+    member, as ranked by `rank`. Unless one member only is given, the members are probed concurrently when none of the
+    healthy members has been measured before, and the first one to accept a connection is chosen.
+    """
+
+    hosts = parse(ip)
+    if len(hosts) <= 1:
+        return ip
+
+    members = tuple((host, int(port)) for host in hosts)
+    with members_lock:
+        for member in members:
+            clusters[member] = members
+        healthy = [member for member in members if not has_failed(member)]
+        measured = [member for member in healthy if member in latencies or member in connect_latencies]
+
+    if measured:
+        return min(measured, key=rank)[0]
+    else:
+        return probe(healthy or members)[0]
+
+
+def rank(member):
+    """
+    The sort key of a member, best first: the members that responded before by their response time, then those that
+    were only probed by their time to connect, which is not comparable to a response time, then the others
+    """
+
+    if member in latencies:
+        return 0, latencies[member]
+    elif member in connect_latencies:
+        return 1, connect_latencies[member]
+    else:
+        return 2, 0.0
+
+
+def probe(members):
+    """
+    Connects to the members concurrently, returning the first one to accept a connection, or the first member if none
+    does. The connections that are yet to be accepted or refused are left to record the health of their member.
+    """
+
+    results = Queue()
+
+    def connect(member):
+        start = perf_counter()
+        try:
+            host, port = member
+            socket.create_connection((host.strip('[]'), port), timeout=probe_timeout).close()
+            succeeded(member, connect_latencies, perf_counter() - start)
+            results.put(member)
+        except OSError:
+            failed(member)
+            results.put(None)
+
+    for member in members:
+        Thread(target=connect, args=(member,), daemon=True).start()
+    for _ in members:
+        try:
+            member = results.get(timeout=probe_timeout * 2)
+        except Empty:
+            break
+        if member is not None:
+            return member
+    return members[0]
+
+
+def has_failed(member):
+    failed_at = failures.get(member)
+    return failed_at is not None and monotonic() - failed_at < failure_ttl
+
+
+def succeeded(member, averages, latency=None):
+    """Records that a member succeeded, adding the time it took, if known, to the given moving averages"""
+
+    with members_lock:
+        failures.pop(member, None)
+        if latency is not None:
+            previous = averages.get(member)
+            averages[member] = latency if previous is None else \
+                latency_weight * latency + (1 - latency_weight) * previous
+
+
+def failed(member):
+    with members_lock:
+        failures[member] = monotonic()
+
+
+def member_of(url):
+    parts = urlsplit(url)
+    return parts.hostname if ':' not in (parts.hostname or '') else '[{}]'.format(parts.hostname), parts.port
+
+
+def with_member(url, member):
+    host, port = member
+    parts = urlsplit(url)
+    return urlunsplit(parts._replace(netloc='{}:{}'.format(host, port)))
+
+
+def record_response(url, elapsed):
+    """
+    Records the response time of the member the URL is on, if it is a member of a cluster, or only that it responded
+    if the time is None
+    """
+
+    member = member_of(url)
+    if member in clusters:
+        succeeded(member, latencies, elapsed)
+
+
+def record_failure(url):
+    """Records that the member the URL is on failed, returning the URL on the next member to try, or None if none is left"""
+
+    member = member_of(url)
+    if member not in clusters:
+        return None
+    failed(member)
+    return alternative(url)
+
+
+def alternative(url):
+    """Returns the URL on the best healthy member other than the one the URL is on, as ranked by `rank`, or None"""
+
+    member = member_of(url)
+    with members_lock:
+        others = [other for other in clusters.get(member, ()) if other != member and not has_failed(other)]
+        if not others:
+            return None
+        # Members that have not been measured are tried after those that have, in the order they are given
+        best = min(others, key=rank)
+    return with_member(url, best)
+
+
+def hedge_delay(url):
+    """The delay after which a request to the member the URL is on is sent to a second member: twice its response time"""
+
+    latency = latencies.get(member_of(url))
+    if latency is None:
+        return default_hedge_delay
+    return min(max_hedge_delay, max(min_hedge_delay, 2 * latency))
@@ -1,16 +1,17 @@
-from conductr_cli import bundle_utils, conduct_info, conduct_url, conduct_logging
+from conductr_cli import bundle_utils, conduct_info, conduct_url, conduct_logging, conduct_http
 import json
-import requests
 from urllib.parse import urlparse
 
 
 @conduct_logging.handle_connection_error
+@conduct_logging.handle_timeout
 @conduct_logging.handle_http_error
+@conduct_http.with_timeouts
 def services(args):
     """`conduct services` command"""
 
     url = conduct_url.url('bundles', args)
-    response = requests.get(url)
+    response = conduct_http.get(url, hedge=args.hedge)
     conduct_logging.raise_for_status_inc_3xx(response)
 
     if args.verbose:
@@ -1,16 +1,17 @@
-from conductr_cli import bundle_utils, conduct_url, conduct_logging
+from conductr_cli import bundle_utils, conduct_url, conduct_logging, conduct_http
 import json
-import requests
 
 
 @conduct_logging.handle_connection_error
+@conduct_logging.handle_timeout
 @conduct_logging.handle_http_error
+@conduct_http.with_timeouts
 def stop(args):
     """`conduct stop` command"""
 
     path = 'bundles/{}?scale=0'.format(args.bundle)
     url = conduct_url.url(path, args)
-    response = requests.put(url)
+    response = conduct_http.put(url)
     conduct_logging.raise_for_status_inc_3xx(response)
 
     if args.verbose:
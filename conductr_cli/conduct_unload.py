@@ -1,15 +1,16 @@
-from conductr_cli import conduct_url, conduct_logging
-import requests
+from conductr_cli import conduct_url, conduct_logging, conduct_http
 
 
 @conduct_logging.handle_connection_error
+@conduct_logging.handle_timeout
 @conduct_logging.handle_http_error
+@conduct_http.with_timeouts
 def unload(args):
     """`conduct unload` command"""
 
     path = 'bundles/{}'.format(args.bundle)
     url = conduct_url.url(path, args)
-    response = requests.delete(url)
+    response = conduct_http.delete(url)
     conduct_logging.raise_for_status_inc_3xx(response)
 
     if args.verbose:
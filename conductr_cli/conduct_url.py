@@ -1,6 +1,10 @@
-# build url from ConductR base url and given path
+from conductr_cli import conduct_members
+
+
+# build url from ConductR base url and given path, on the chosen member if several are given
 def url(path, args):
-    base_url = 'http://{}:{}{}'.format(args.ip, args.port, api_version_path(args.api_version))
+    base_url = 'http://{}:{}{}'.format(conduct_members.choose(args.ip, args.port), args.port,
+                                       api_version_path(args.api_version))
     return '{}/{}'.format(base_url, path)
 
 
@@ -0,0 +1,86 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+
+
+# The directory of the cached bundle configuration values, below $CONDUCTR_CACHE_DIR or ~/.conductr/cache
+cache_dir = os.path.join(os.getenv('CONDUCTR_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.conductr', 'cache')),
+                         'conf')
+
+# The number of cached entries, beyond which the least recently used ones are evicted
+max_entries = 1000
+
+# The SHA-256 digest that shazar appends to the file name of an archive
+digest_pattern = re.compile(r'-([0-9a-f]{64})\.zip$')
+
+
+def digest(file_name):
+    """Returns the digest carried by the name of a digested archive, or None if the name has none"""
+
+    match = digest_pattern.search(file_name)
+    return None if match is None else match.group(1)
+
+
+def key(api_version, bundle_name, configuration_name=None):
+    """
+    Returns the cache key of the configuration values of a bundle and its optional configuration, or None if
+    they cannot be cached because the name of either does not carry its digest.
+    """
+
+    bundle_digest = None if bundle_name is None else digest(bundle_name)
+    configuration_digest = None if configuration_name is None else digest(configuration_name)
+    if bundle_digest is None or (configuration_name is not None and configuration_digest is None):
+        return None
+    return hashlib.sha256('{}\n{}\n{}'.format(api_version, bundle_digest, configuration_digest).encode('utf-8')).hexdigest()
+
+
+def get(cache_key):
+    """Returns the cached (name, value) configuration values, or None if there are none"""
+
+    if cache_key is None:
+        return None
+    path = os.path.join(cache_dir, '{}.json'.format(cache_key))
+    try:
+        with open(path, 'r') as f:
+            values = json.load(f)
+        # The modification time tells how recently an entry was used
+        os.utime(path)
+    except (OSError, ValueError):
+        return None
+    return [(name, value) for name, value in values]
+
+
+def put(cache_key, values):
+    """
+    Caches the (name, value) configuration values, evicting the least recently used entries beyond `max_entries`.
+    Failing to cache is not an error, as the values can always be read from the bundle again.
+    """
+
+    if cache_key is None:
+        return
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with tempfile.NamedTemporaryFile('w', dir=cache_dir, suffix='.tmp', delete=False) as f:
+            json.dump(values, f)
+        os.replace(f.name, os.path.join(cache_dir, '{}.json'.format(cache_key)))
+        evict()
+    except OSError:
+        pass
+
+
+def evict():
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith('.json'):
+            try:
+                entries.append((os.stat(os.path.join(cache_dir, name)).st_mtime, name))
+            except FileNotFoundError:
+                # Evicted concurrently by another process
+                pass
+    for mtime, name in sorted(entries)[:max(0, len(entries) - max_entries)]:
+        try:
+            os.remove(os.path.join(cache_dir, name))
+        except FileNotFoundError:
+            pass
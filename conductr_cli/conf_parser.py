@@ -0,0 +1,290 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+import re
+import string
+
+
+# The tokens of the HOCON subset understood by `parse_simple`; anything else makes it fall back to pyhocon
+token_pattern = re.compile(r"""
+      (?P<whitespace>[ \t]+)
+    | (?P<newline>[\r\n])
+    | (?P<comment>(\#|//)[^\r\n]*)
+    | (?P<punctuation>[{}\[\],=:])
+    | (?P<string>"[^"\\\r\n]*")
+    | (?P<unquoted>([^\s{}\[\],=:\#"\\$/]|/(?!/))+)
+""", re.VERBOSE)
+
+# The numbers of pyhocon, which are ints if possible, else floats
+number_pattern = re.compile(r'[+-]?(\d*\.\d+|\d+(\.\d+)?)([eE]\d+)?')
+
+key_pattern = re.compile(r'[A-Za-z0-9_-]+(\.[A-Za-z0-9_-]+)*')
+
+# The characters that may not follow the true, false and null keywords in pyhocon
+keyword_chars = string.ascii_letters + string.digits + '_$'
+
+
+class ConfigError(Exception):
+    """A bundle.conf setting of the wrong type, or a bundle.conf that pyhocon fails to resolve"""
+    pass
+
+
+class ConfigMissingError(ConfigError):
+    pass
+
+
+class UnsupportedError(Exception):
+    """Raised by `parse_simple` for HOCON beyond the subset it understands"""
+    pass
+
+
+def parse(text):
+    """
+    Parses the contents of a bundle.conf. Bundle configurations are parsed by `parse_simple` as long as they only use
+    the subset of HOCON it understands, which is considerably faster than pyhocon, including its import.
+    Any other configuration is parsed by pyhocon.
+    """
+
+    try:
+        return SimpleConfig(parse_simple(text))
+    except UnsupportedError:
+        return parse_hocon(text)
+
+
+def parse_hocon(text):
+    from pyhocon import ConfigFactory
+    from pyhocon.exceptions import ConfigException
+
+    try:
+        return HoconConfig(ConfigFactory.parse_string(text))
+    except ConfigException as err:
+        raise ConfigError(err.args[0])
+
+
+class Config(ABC):
+    """The settings of a bundle.conf, with the semantics of pyhocon 0.2.1"""
+
+    @abstractmethod
+    def get(self, key):
+        """Returns the value of a key, raising `ConfigMissingError` if it is missing"""
+
+    def get_string(self, key):
+        return str(self.get(key))
+
+    def get_list(self, key):
+        value = self.get(key)
+        if isinstance(value, list):
+            return value
+        else:
+            raise ConfigError("{key} has type '{type}' rather than 'list'".format(key=key, type=type_name(value)))
+
+
+def type_name(value):
+    """The name of the type of a value, as pyhocon reports it"""
+
+    if isinstance(value, OrderedDict):
+        return 'ConfigTree'
+    elif isinstance(value, list):
+        return 'ConfigList'
+    else:
+        return type(value).__name__
+
+
+class SimpleConfig(Config):
+
+    def __init__(self, tree):
+        self.tree = tree
+
+    def get(self, key):
+        key_path = [element.strip('"') for element in re.findall(r'"[^"]+"|[^\.]+', key)]
+        value = self.tree
+        for index, element in enumerate(key_path):
+            if not isinstance(value, OrderedDict):
+                raise ConfigError('{key} has type {type} rather than dict'.format(
+                    key='.'.join(key_path[:index]), type=type_name(value)))
+            value = value.get(element)
+            if value is None:
+                raise ConfigMissingError('No configuration setting found for key {key}'.format(
+                    key='.'.join(key_path[:index + 1])))
+        return value
+
+
+class HoconConfig(Config):
+
+    def __init__(self, tree):
+        self.tree = tree
+
+    def get(self, key):
+        from pyhocon.exceptions import ConfigException, ConfigMissingException
+
+        try:
+            return self.tree.get(key)
+        except ConfigMissingException as err:
+            raise ConfigMissingError(err.args[0])
+        except ConfigException as err:
+            raise ConfigError(err.args[0])
+
+
+def parse_simple(text):
+    """
+    Parses the subset of HOCON used by bundle configurations to nested OrderedDicts, exactly as pyhocon 0.2.1 does:
+    objects, lists of values, quoted strings without escapes, unquoted strings without whitespace, numbers,
+    booleans and comments. Raises `UnsupportedError` for anything else, e.g. includes, substitutions or concatenations,
+    and wherever pyhocon's behaviour is peculiar, e.g. for null or a value ending the text without a newline.
+    """
+
+    return SimpleParser(tokenize(text)).parse()
+
+
+def tokenize(text):
+    tokens = []
+    position = 0
+    while position < len(text):
+        match = token_pattern.match(text, position)
+        if match is None:
+            raise UnsupportedError()
+        kind, value = match.lastgroup, match.group()
+        if kind == 'comment' and match.end() == len(text):
+            # pyhocon requires a comment to end with a newline
+            raise UnsupportedError()
+        if kind not in ('whitespace', 'comment'):
+            tokens.append((kind, value))
+        position = match.end()
+    tokens.append(('end', None))
+    return tokens
+
+
+class SimpleParser:
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+
+    def parse(self):
+        self.skip('newline')
+        if self.peek() == ('punctuation', '{'):
+            self.position += 1
+            tree = self.fields('}')
+            self.expect(('punctuation', '}'))
+            self.skip('newline', ',')
+        else:
+            tree = self.fields(None)
+        self.expect(('end', None))
+        return tree
+
+    def fields(self, closing):
+        tree = OrderedDict()
+        while True:
+            self.skip('newline', ',')
+            if self.peek() == (('end', None) if closing is None else ('punctuation', closing)):
+                return tree
+
+            key_path = self.key()
+            if self.peek() in [('punctuation', '='), ('punctuation', ':')]:
+                self.position += 1
+            elif self.peek() != ('punctuation', '{'):
+                raise UnsupportedError()
+            put(tree, key_path, self.object() if self.peek() == ('punctuation', '{') else self.value())
+
+    def key(self):
+        kind, value = self.next()
+        if kind == 'string' and len(value) > 2:
+            return [value[1:-1]]
+        elif kind == 'unquoted' and key_pattern.fullmatch(value):
+            return value.split('.')
+        else:
+            raise UnsupportedError()
+
+    def object(self):
+        self.expect(('punctuation', '{'))
+        tree = self.fields('}')
+        self.expect(('punctuation', '}'))
+        self.follow('newline', ',', '}', 'end')
+        return tree
+
+    def value(self):
+        kind, value = self.next()
+        if (kind, value) == ('punctuation', '['):
+            return self.list()
+        elif kind == 'string':
+            self.follow('newline', ',', '}', ']', 'end')
+            return value[1:-1]
+        elif kind == 'unquoted':
+            # pyhocon only ends numbers and unquoted strings at one of these, not at the end of the text
+            self.follow('newline', ',', '}', ']')
+            return convert(value)
+        else:
+            raise UnsupportedError()
+
+    def list(self):
+        values = []
+        while True:
+            self.skip('newline', ',')
+            if self.peek() == ('punctuation', ']'):
+                self.position += 1
+                self.follow('newline', ',', '}', 'end')
+                return values
+            elif self.peek() in [('punctuation', '['), ('punctuation', '{')]:
+                raise UnsupportedError()
+            values.append(self.value())
+
+    def peek(self):
+        return self.tokens[self.position]
+
+    def next(self):
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def expect(self, token):
+        if self.next() != token:
+            raise UnsupportedError()
+
+    def skip(self, *kinds):
+        while is_token(self.peek(), kinds):
+            self.position += 1
+
+    def follow(self, *kinds):
+        """Requires the next token to be one of the given kinds or punctuation, without consuming it"""
+
+        if not is_token(self.peek(), kinds):
+            raise UnsupportedError()
+
+
+def is_token(token, kinds):
+    kind, value = token
+    return kind in kinds or (kind == 'punctuation' and value in kinds)
+
+
+def put(tree, key_path, value):
+    """Puts a value like pyhocon: objects put on objects replace their fields, anything else is replaced"""
+
+    for element in key_path[:-1]:
+        child = tree.get(element)
+        if not isinstance(child, OrderedDict):
+            child = OrderedDict()
+            tree[element] = child
+        tree = child
+
+    previous = tree.get(key_path[-1])
+    if isinstance(previous, OrderedDict) and isinstance(value, OrderedDict):
+        previous.update(value)
+    else:
+        tree[key_path[-1]] = value
+
+
+def convert(unquoted):
+    """Converts an unquoted value to a number, a boolean or a string like pyhocon"""
+
+    if number_pattern.fullmatch(unquoted):
+        try:
+            return int(unquoted)
+        except ValueError:
+            return float(unquoted)
+
+    lowered = unquoted.lower()
+    for keyword in ['true', 'false', 'null']:
+        if lowered.startswith(keyword) and (len(unquoted) == len(keyword) or unquoted[len(keyword)] not in keyword_chars):
+            if len(unquoted) != len(keyword) or keyword == 'null':
+                raise UnsupportedError()
+            return keyword == 'true'
+    return unquoted
@@ -0,0 +1,195 @@
+from conductr_cli import bundle_utils, conduct_http, conf_cache, rate_limit
+from functools import partial
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen, urlretrieve
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+
+# The directory of the retrieved bundles and configurations, next to the cached bundle configuration values
+cache_dir = os.path.join(os.path.dirname(conf_cache.cache_dir), 'downloads')
+
+# The total size in bytes of the cached files, beyond which the least recently used ones are evicted
+max_size = 2 * 1024 ** 3
+
+# The age in seconds beyond which the temporary file of an interrupted download is removed
+max_temporary_age = 24 * 60 * 60
+
+
+def retrieve(url, rate_limiter=None):
+    """
+    Returns an open file of the resource at the given HTTP(S) URL, which is only retrieved if it is not cached,
+    throttled by the optional rate limiter.
+
+    Cached files are named by their SHA-256 digest and described by an entry per URL, holding the digest and the
+    ETag and Last-Modified headers of the response. A cached file is revalidated with If-None-Match and
+    If-Modified-Since, unless the file name of the URL carries a digest, as shazar names bundles: such a resource
+    cannot change without changing its URL, so the cached file is used without a request once its digest matches.
+
+    Files and entries are only ever replaced atomically, so that concurrent processes can share the cache.
+    """
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+    except OSError:
+        # Without a cache, retrieve into a temporary file, as done for any other URL
+        path, headers = urlretrieve(url, reporthook=rate_limit.reporthook(rate_limiter))
+        return open(path, 'rb')
+
+    entry_path = os.path.join(cache_dir, '{}.json'.format(hashlib.sha256(url.encode('utf-8')).hexdigest()))
+    entry = read_entry(entry_path)
+    name_digest = conf_cache.digest(url.split('/')[-1])
+    cached_file = None if entry is None else open_cached(entry['digest'], name_digest)
+
+    if cached_file is not None and name_digest is not None:
+        touch(entry_path)
+        return cached_file
+
+    headers = {}
+    if cached_file is not None:
+        if entry.get('etag') is not None:
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified') is not None:
+            headers['If-Modified-Since'] = entry['last_modified']
+
+    # The timeout applies to connecting and to every read, so a stalled server fails the retrieval
+    connect_timeout, read_timeout = conduct_http.request_timeouts()
+    try:
+        response = urlopen(Request(url, headers=headers), timeout=read_timeout or connect_timeout)
+    except HTTPError as err:
+        if err.code == 304 and cached_file is not None:
+            touch(entry_path)
+            return cached_file
+        if cached_file is not None:
+            cached_file.close()
+        raise
+    if cached_file is not None:
+        cached_file.close()
+
+    with response:
+        digest = download(response, rate_limiter)
+        new_entry = {
+            'url': url,
+            'digest': digest,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified')
+        }
+    # Opened before the eviction, which may remove it if it exceeds the cache size on its own
+    downloaded_file = open(data_path(digest), 'rb')
+    write_entry(entry_path, new_entry)
+    evict()
+    return downloaded_file
+
+
+def data_path(digest):
+    return os.path.join(cache_dir, '{}.data'.format(digest))
+
+
+def read_entry(entry_path):
+    try:
+        with open(entry_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_entry(entry_path, entry):
+    with tempfile.NamedTemporaryFile('w', dir=cache_dir, suffix='.tmp', delete=False) as f:
+        json.dump(entry, f)
+    os.replace(f.name, entry_path)
+
+
+def open_cached(digest, name_digest):
+    """
+    Returns the open cached file of the given digest, or None if it is missing, e.g. evicted concurrently, or if it does
+    not match the digest carried by the file name of its URL
+    """
+
+    if name_digest is not None and name_digest != digest:
+        return None
+    try:
+        cached_file = open(data_path(digest), 'rb')
+    except FileNotFoundError:
+        return None
+    if name_digest is not None and bundle_utils.file_digest(cached_file) != name_digest:
+        cached_file.close()
+        return None
+    touch(cached_file.name)
+    return cached_file
+
+
+def download(response, rate_limiter=None):
+    """Writes the body of the response to the cache, returning its digest"""
+
+    digest = hashlib.sha256()
+    with tempfile.NamedTemporaryFile(dir=cache_dir, suffix='.tmp', delete=False) as f:
+        try:
+            for buf in iter(partial(response.read, 64 * 1024), b''):
+                if rate_limiter is not None:
+                    rate_limiter.consume(len(buf))
+                digest.update(buf)
+                f.write(buf)
+        except BaseException:
+            f.close()
+            os.remove(f.name)
+            raise
+    # Identical contents downloaded concurrently replace each other harmlessly
+    os.replace(f.name, data_path(digest.hexdigest()))
+    return digest.hexdigest()
+
+
+def touch(path):
+    """The modification time tells how recently a file was used"""
+
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def evict():
+    """
+    Evicts the least recently used files beyond `max_size`, along with the entries of evicted files and the temporary
+    files of interrupted downloads. Files removed concurrently by another process are skipped.
+    """
+
+    files, entries, temporary_files = [], [], []
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        if name.endswith('.data'):
+            files.append((stat.st_mtime, stat.st_size, path))
+        elif name.endswith('.json'):
+            entries.append(path)
+        elif name.endswith('.tmp') and stat.st_mtime < time.time() - max_temporary_age:
+            temporary_files.append(path)
+
+    total_size = sum(size for mtime, size, path in files)
+    for mtime, size, path in sorted(files):
+        if total_size <= max_size:
+            break
+        remove(path)
+        total_size -= size
+
+    for path in entries:
+        entry = read_entry(path)
+        if entry is not None and not os.path.exists(data_path(entry['digest'])):
+            remove(path)
+
+    for path in temporary_files:
+        remove(path)
+
+
+def remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        # Removed concurrently, or still open by another process on Windows
+        pass
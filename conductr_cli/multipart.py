@@ -0,0 +1,84 @@
+import os
+import uuid
+
+
+# Size of the chunks read from the files being sent
+chunk_size = 64 * 1024
+
+
+class MultipartEncoder:
+    """
+    Streams a multipart/form-data request body.
+
+    The fields are given in the same format as the `files` argument of `requests.post`, i.e. a list of
+    `(name, value)` tuples where `value` is either a string or a `(filename, file object)` tuple.
+    The encoder is a read-only file-like object, so the files are read in chunks of `chunk_size` bytes
+    while the request is sent and never held in memory as a whole. The optional callback is called with the
+    number of bytes returned by each read, e.g. to report the progress of the request.
+    """
+
+    def __init__(self, fields, boundary=None, callback=None):
+        self.fields = fields
+        self.boundary = uuid.uuid4().hex if boundary is None else boundary
+        self.callback = callback
+        self.content_type = 'multipart/form-data; boundary={}'.format(self.boundary)
+        self._parts = None
+        self._buffer = bytearray()
+
+    def __len__(self):
+        length = len(self._closing_boundary())
+        for name, value in self.fields:
+            length += len(self._part_header(name, value)) + len(b'\r\n')
+            if isinstance(value, tuple):
+                length += file_size(value[1])
+            else:
+                length += len(value.encode('utf-8'))
+        return length
+
+    def read(self, size=-1):
+        if self._parts is None:
+            self._parts = self._iter_parts()
+
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._parts, None)
+            if chunk is None:
+                break
+            self._buffer.extend(chunk)
+
+        if size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        if self.callback is not None and data:
+            self.callback(len(data))
+        return data
+
+    def _iter_parts(self):
+        for name, value in self.fields:
+            yield self._part_header(name, value)
+            if isinstance(value, tuple):
+                file = value[1]
+                for chunk in iter(lambda: file.read(chunk_size), b''):
+                    yield chunk
+            else:
+                yield value.encode('utf-8')
+            yield b'\r\n'
+        yield self._closing_boundary()
+
+    def _part_header(self, name, value):
+        disposition = 'form-data; name="{}"'.format(name)
+        if isinstance(value, tuple):
+            disposition += '; filename="{}"'.format(value[0])
+        return '--{}\r\nContent-Disposition: {}\r\n\r\n'.format(self.boundary, disposition).encode('utf-8')
+
+    def _closing_boundary(self):
+        return '--{}--\r\n'.format(self.boundary).encode('utf-8')
+
+
+def file_size(file):
+    """Returns the number of bytes left to read from the given file object"""
+
+    position = file.tell()
+    size = file.seek(0, os.SEEK_END)
+    file.seek(position)
+    return size - position
@@ -0,0 +1,87 @@
+from time import perf_counter
+
+import io
+
+
+# The least number of seconds between two redraws of the progress line
+redraw_interval = 0.5
+
+
+def is_tty(stream):
+    """Tells whether the given stream is a terminal, as opposed to e.g. a pipe or a file of CI logs"""
+
+    return isinstance(stream, io.IOBase) and not stream.closed and stream.isatty()
+
+
+class UploadProgress:
+    """
+    Tracks the progress of an upload of the given number of bytes, fed with the number of bytes of each chunk sent.
+
+    Given a stream, the bytes sent so far, the throughput and the estimated time left are redrawn on a single line
+    of it, at most every `redraw_interval` seconds. The stream is meant to be a terminal: see `is_tty`.
+    """
+
+    def __init__(self, total, stream=None):
+        self.total = total
+        self.stream = stream
+        self.sent_bytes = 0
+        self.start = perf_counter()
+        self.last_sent = None
+        self.responded = None
+        self.last_redraw = None
+        self.line_length = 0
+
+    def sent(self, count):
+        self.sent_bytes += count
+        self.last_sent = perf_counter()
+        if self.stream is None:
+            return
+        if self.last_redraw is None or self.last_sent - self.last_redraw >= redraw_interval \
+                or self.sent_bytes == self.total:
+            self.last_redraw = self.last_sent
+            self.redraw(self.last_sent)
+
+    def finish(self):
+        """Records the response to the upload, ending the progress line"""
+
+        self.responded = perf_counter()
+        if self.stream is not None and self.last_redraw is not None:
+            self.stream.write('\n')
+            self.stream.flush()
+
+    def redraw(self, now):
+        elapsed = now - self.start
+        throughput = self.sent_bytes / elapsed if elapsed > 0 else 0
+        eta = '{:.0f}s'.format((self.total - self.sent_bytes) / throughput) if throughput > 0 else '-'
+        line = 'Sent {} of {} ({:.0%}), {}/s, ETA {}'.format(
+            format_size(self.sent_bytes), format_size(self.total),
+            self.sent_bytes / self.total if self.total > 0 else 1, format_size(throughput), eta)
+        # Spaces clear what remains of a longer former line
+        self.stream.write('\r' + line.ljust(self.line_length))
+        self.stream.flush()
+        self.line_length = len(line)
+
+    def summary(self):
+        """
+        Returns the number of bytes sent, the duration of the upload until its response and the time to the first
+        byte of the response, i.e. from the last byte sent to the response, in seconds
+        """
+
+        responded = perf_counter() if self.responded is None else self.responded
+        return {
+            'bytes': self.sent_bytes,
+            'duration': round(responded - self.start, 3),
+            'time_to_first_byte': round(responded - (self.start if self.last_sent is None else self.last_sent), 3)
+        }
+
+
+def format_size(size):
+    """Formats a number of bytes in the largest of B, KB, MB and GB that it holds at least one of"""
+
+    if size < 1000:
+        return '{:.0f} B'.format(size)
+    for unit in ['KB', 'MB']:
+        size /= 1000
+        if round(size, 1) < 1000:
+            return '{:.1f} {}'.format(size, unit)
+    return '{:.1f} GB'.format(size / 1000)
@@ -0,0 +1,54 @@
+from threading import Lock
+from time import monotonic, sleep
+
+import argparse
+import re
+
+
+rate_pattern = re.compile(r'(\d+(\.\d+)?)([kKmMgG]?)$')
+
+# The factors of the rate suffixes, in bytes, as for curl's --limit-rate
+rate_factors = {'': 1, 'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3}
+
+
+def parse_rate(rate):
+    """Parses a rate in bytes per second, optionally suffixed with K, M or G, e.g. 500K or 1.5M"""
+
+    match = rate_pattern.match(rate)
+    if match is None or float(match.group(1)) <= 0:
+        raise argparse.ArgumentTypeError('invalid rate: {}, expected e.g. 500K or 2M bytes per second'.format(rate))
+    return int(float(match.group(1)) * rate_factors[match.group(3).lower()])
+
+
+def reporthook(rate_limiter):
+    """Returns a reporthook throttling `urlretrieve` by the given rate limiter, or None if there is none"""
+
+    if rate_limiter is None:
+        return None
+    return lambda block_number, block_size, total_size: rate_limiter.consume(block_size) if block_number > 0 else None
+
+
+class TokenBucket:
+    """
+    Limits the throughput of one or more concurrent streams to `rate` bytes per second, allowing bursts of up to
+    `capacity` bytes. Each chunk sent or received is accounted for with `consume`, which sleeps as long as needed to
+    keep the rate. Chunks larger than the capacity are let through on credit, so that the cost per chunk is a single
+    computation whatever its size.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        # A quarter of a second worth of bytes smooths the rate without hurting small uploads
+        self.capacity = max(1, rate // 4) if capacity is None else capacity
+        self.tokens = self.capacity
+        self.updated = monotonic()
+        self.lock = Lock()
+
+    def consume(self, count):
+        with self.lock:
+            now = monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate) - count
+            self.updated = now
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0
+        if delay > 0:
+            sleep(delay)
@@ -1,58 +1,517 @@
 import argcomplete
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+import fnmatch
+from conductr_cli import progress, shazar_cache
+from conductr_cli.zip_writer import ZipWriter
 from functools import partial
 import hashlib
+import multiprocessing
 import os
-import shutil
+import stat
+import sys
 import tempfile
+import time
 import zipfile
+import zlib
+
+
+# Files with these extensions are stored without compression by default, as they are compressed already
+default_stored_extensions = [
+    '.jar', '.war', '.ear', '.zip', '.gz', '.tgz', '.bz2', '.xz', '.7z',
+    '.png', '.jpg', '.jpeg', '.gif', '.webp', '.woff', '.woff2', '.mp3', '.mp4'
+]
+
+# The file in a source directory listing patterns of files to exclude, like a .gitignore
+ignore_file_name = '.shazarignore'
+
+# The number of largest files listed by --report
+report_largest = 10
+
+# The range of the timestamps of ZIP entries
+earliest_date_time = (1980, 1, 1, 0, 0, 0)
+latest_date_time = (2107, 12, 31, 23, 59, 59)
+
+# The size of the sample compressed to tell whether a file is worth compressing, and the saving required
+sample_size = 64 * 1024
+min_sample_saving = 0.05
+
+# Files larger than this are compressed in chunks of `chunk_size` to a temporary file rather than in memory,
+# so that the memory used by each compressing process does not grow with the size of the files
+large_entry_size = 16 * 1024 * 1024
+chunk_size = 1024 * 1024
 
 
 def run(argv=None):
     parser = build_parser()
     argcomplete.autocomplete(parser)
     args = parser.parse_args(argv)
+    if not args.sources and not args.bundles_dir:
+        parser.error('a source or --bundles-dir is required')
+    if args.output_dir == '-' and (len(args.sources) != 1 or args.bundles_dir or args.cache_dir is not None):
+        parser.error('an archive written to stdout requires a single source and no --cache-dir')
+    for bundles_dir in args.bundles_dir:
+        if not os.path.isdir(bundles_dir):
+            parser.error('--bundles-dir {} is not a directory'.format(bundles_dir))
     args.func(args)
 
 
 def build_parser():
     parser = argparse.ArgumentParser(
-        description='Package a bundle directory or bundle configuration file'
+        description='Package bundle directories or bundle configuration files'
     )
     parser.add_argument('--output-dir',
                         default='.',
-                        help="The optional output directory, defaults to '.'")
-    parser.add_argument('source',
-                        help='Path to a bundle directory or bundle configuration file')
+                        help="The optional output directory, defaults to '.'; "
+                             "given '-', the archive is written to stdout and its name to stderr")
+    parser.add_argument('--jobs',
+                        type=int,
+                        default=multiprocessing.cpu_count(),
+                        help='The optional number of processes compressing files in parallel, and of sources packaged '
+                             'concurrently, defaults to the number of CPUs')
+    parser.add_argument('--cache-dir',
+                        default=None,
+                        help='The optional build cache directory; files unchanged since the previous build are not compressed again')
+    parser.add_argument('--reproducible',
+                        default=False,
+                        action='store_true',
+                        help='Create the same archive for the same files on any machine, by sorting the files '
+                             'and normalizing their timestamps and permissions; '
+                             'the timestamp is taken from $SOURCE_DATE_EPOCH if set')
+    parser.add_argument('--compression-level',
+                        type=int,
+                        default=6,
+                        choices=range(10),
+                        help='The optional level of compression from 0 (store only) to 9 (best), defaults to 6')
+    parser.add_argument('--stored-extensions',
+                        default=','.join(default_stored_extensions),
+                        help='The optional comma separated extensions of already compressed files which are stored '
+                             'without compression, defaults to "{}"'.format(','.join(default_stored_extensions)))
+    parser.add_argument('--exclude',
+                        default=[],
+                        action='append',
+                        help='The optional glob pattern of files and directories to leave out, may be given multiple times; '
+                             'patterns are also read from a {} file in the source directory'.format(ignore_file_name))
+    parser.add_argument('--report',
+                        default=False,
+                        action='store_true',
+                        help='Print how much the files were compressed, how much compression time was saved '
+                             'and which files are the largest')
+    parser.add_argument('--bundles-dir',
+                        default=[],
+                        action='append',
+                        help='The optional directory whose every subdirectory is packaged as a bundle directory, '
+                             'may be given multiple times')
+    parser.add_argument('sources',
+                        nargs='*',
+                        metavar='source',
+                        help='Path to a bundle directory or bundle configuration file, may be given multiple times')
     parser.set_defaults(func=shazar)
     return parser
 
 
 def shazar(args):
-    source_base_name = os.path.basename(args.source.rstrip('\\/'))
-    temp_file = tempfile.NamedTemporaryFile(suffix='.zip', delete=False).name
-
-    with zipfile.ZipFile(temp_file, 'w') as zip_file:
-        if os.path.isdir(args.source):
-            for (dir_path, dir_names, file_names) in os.walk(args.source):
-                for file_name in file_names:
-                    path = os.path.join(dir_path, file_name)
-                    name = os.path.join(source_base_name, os.path.relpath(path, start=args.source))
-                    zip_file.write(path, name)
+    """
+    Packages every source, and every bundle directory of the --bundles-dir directories, to a digested archive.
+    The sources are packaged concurrently, sharing one pool of compressing processes. The path of each archive
+    is printed in the order of the sources; a source failing to be packaged does not affect the others, but makes
+    the exit code non-zero.
+    """
+
+    sources = args.sources + bundles_dir_sources(args.bundles_dir)
+    # When the archive is written to stdout, everything else is printed to stderr
+    out = sys.stderr if args.output_dir == '-' else sys.stdout
+    pool = multiprocessing.Pool(args.jobs) if args.jobs > 1 else None
+    failures = 0
+    try:
+        with ThreadPoolExecutor(max(1, min(args.jobs, len(sources)))) as executor:
+            packaged = [executor.submit(package, source, args, pool) for source in sources]
+            for source, future in zip(sources, packaged):
+                try:
+                    dest, written_entries = future.result()
+                except Exception as err:
+                    failures += 1
+                    print('ERROR: Unable to package {}: {}'.format(source, err), file=sys.stderr)
+                    continue
+
+                if args.output_dir == '-':
+                    print('Wrote digested ZIP archive {} to stdout'.format(dest), file=out)
+                else:
+                    print('Created digested ZIP archive at {}'.format(dest), file=out)
+                if args.report and written_entries is not None:
+                    with redirect_stdout(out):
+                        print_report(written_entries)
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+    if failures > 0:
+        sys.exit(1)
+
+
+def bundles_dir_sources(bundles_dirs):
+    """Returns the bundle directories of the given directories, i.e. their subdirectories which are not hidden"""
+
+    sources = []
+    for bundles_dir in bundles_dirs:
+        sources.extend(os.path.join(bundles_dir, name) for name in sorted(os.listdir(bundles_dir))
+                       if not name.startswith('.') and os.path.isdir(os.path.join(bundles_dir, name)))
+    return sources
+
+
+def package(source, args, pool=None):
+    """
+    Packages a source to a digested archive in the output directory, compressing its files with the given pool
+    of processes if any. Returns the path of the archive and the written entries, or None as written entries
+    if the archive of the previous build was up to date.
+    """
+
+    source_base_name = os.path.basename(source.rstrip('\\/'))
+    entries = source_entries(source, source_base_name, exclude_patterns(source, args.exclude))
+    if args.reproducible:
+        entries.sort(key=lambda entry: entry[1])
+    stats = [os.stat(path) for path, name in entries]
+    options = entry_options(args)
+    settings = cache_settings(options)
+
+    manifest = None if args.cache_dir is None else \
+        shazar_cache.load(args.cache_dir, source, args.output_dir, settings)
+    if manifest is not None and shazar_cache.is_up_to_date(manifest, entries, stats):
+        # The cache holds the absolute path, while the path is reported as given by --output-dir
+        return os.path.join(args.output_dir, os.path.basename(manifest['archive'])), None
+
+    if args.output_dir == '-':
+        digest, manifest_entries, written_entries = write_archive(sys.stdout.buffer, entries, stats, manifest, pool, options)
+        return '{}-{}.zip'.format(source_base_name, digest), written_entries
+
+    # The archive is written next to its destination, so that moving it there never copies it
+    temp_file = tempfile.NamedTemporaryFile(dir=args.output_dir, prefix='.', suffix='.zip', delete=False)
+    try:
+        with temp_file:
+            digest, manifest_entries, written_entries = write_archive(temp_file, entries, stats, manifest, pool, options)
+    except BaseException:
+        os.remove(temp_file.name)
+        raise
+
+    dest = os.path.join(args.output_dir, '{}-{}.zip'.format(source_base_name, digest))
+    os.replace(temp_file.name, dest)
+    if args.cache_dir is not None:
+        shazar_cache.save(args.cache_dir, source, args.output_dir, settings, dest, manifest_entries)
+    return dest, written_entries
+
+
+def write_archive(file, entries, stats, manifest, pool, options):
+    """
+    Writes the archive of the given entries to a file, which need not be seekable.
+    Returns the digest of the archive, the manifest entries for the build cache and the written entries.
+    """
+
+    manifest_entries = []
+    written_entries = []
+    digest_writer = DigestWriter(file)
+    # Holds the compressed data of the large files until it is written
+    with tempfile.TemporaryDirectory(prefix='shazar-') as temp_dir, ZipWriter(digest_writer) as zip_writer:
+        for file_stat, (zinfo, data, content_digest, compress_time) in \
+                zip(stats, build_entries(entries, stats, manifest, pool, options, temp_dir)):
+            if isinstance(data, EntryData):
+                with data.open() as data_file:
+                    data_offset = zip_writer.write_entry(zinfo, data_file)
+                data.discard()
+            else:
+                data_offset = zip_writer.write_entry(zinfo, data)
+            manifest_entries.append(shazar_cache.manifest_entry(file_stat, zinfo, content_digest, data_offset))
+            written_entries.append((zinfo, compress_time))
+    return digest_writer.hexdigest(), manifest_entries, written_entries
+
+
+def entry_options(args):
+    """The options given to `compress_entry`"""
+
+    return {
+        'date_time': reproducible_date_time() if args.reproducible else None,
+        'compression_level': args.compression_level,
+        'stored_extensions': sorted(set(extension.strip().lower()
+                                        for extension in args.stored_extensions.split(',') if extension.strip()))
+    }
+
+
+def cache_settings(options):
+    """The settings affecting the archive contents; a previous build is only reused if it had the same settings"""
+
+    return dict((key, list(value) if isinstance(value, tuple) else value) for key, value in options.items())
+
+
+def reproducible_date_time():
+    """The timestamp of all entries of a reproducible archive: $SOURCE_DATE_EPOCH if set, else the earliest ZIP timestamp"""
+
+    source_date_epoch = os.getenv('SOURCE_DATE_EPOCH')
+    return earliest_date_time if source_date_epoch is None else \
+        min(max(earliest_date_time, time.gmtime(int(source_date_epoch))[:6]), latest_date_time)
+
+
+def source_entries(source, source_base_name, patterns=()):
+    """
+    Returns the path and archive name of every file to package, in the order they are written.
+    Excluded directories are pruned from the walk, so that nothing below them is traversed.
+    """
+
+    if os.path.isdir(source):
+        entries = []
+        for (dir_path, dir_names, file_names) in os.walk(source):
+            relative_dir_path = os.path.relpath(dir_path, start=source)
+            dir_names[:] = [dir_name for dir_name in dir_names
+                            if not is_excluded(os.path.join(relative_dir_path, dir_name), patterns, is_dir=True)]
+            for file_name in file_names:
+                relative_path = os.path.join(relative_dir_path, file_name)
+                if not is_excluded(relative_path, patterns):
+                    entries.append((os.path.join(dir_path, file_name),
+                                    os.path.join(source_base_name, os.path.normpath(relative_path))))
+        return entries
+    else:
+        return [(source, source_base_name)]
+
+
+def exclude_patterns(source, exclude):
+    """Returns the patterns given with --exclude and those of the ignore file of the source directory"""
+
+    patterns = list(exclude)
+    ignore_file = os.path.join(source, ignore_file_name)
+    if os.path.isfile(ignore_file):
+        patterns.append(ignore_file_name)
+        with open(ignore_file, 'r') as f:
+            patterns.extend(line.strip() for line in f if line.strip() and not line.strip().startswith('#'))
+    return patterns
+
+
+def is_excluded(relative_path, patterns, is_dir=False):
+    """
+    Tells whether a path relative to the source directory matches one of the given glob patterns.
+    Patterns containing a '/' are matched against the whole relative path, the others against the last path element.
+    Patterns ending with a '/' only match directories.
+    """
+
+    relative_path = os.path.normpath(relative_path).replace(os.sep, '/')
+    name = relative_path.split('/')[-1]
+    for pattern in patterns:
+        if pattern.endswith('/'):
+            if not is_dir:
+                continue
+            pattern = pattern.rstrip('/')
+        if '/' in pattern:
+            if fnmatch.fnmatchcase(relative_path, pattern.lstrip('/')):
+                return True
+        elif fnmatch.fnmatchcase(name, pattern):
+            return True
+    return False
+
+
+def build_entries(entries, stats, manifest, pool, options, temp_dir=None):
+    """
+    Yields the compressed entries in the given order. The compressed data of files that are unchanged since the
+    build described by the given manifest is read from its archive; only the other files are compressed.
+    """
+
+    reusable = [None] * len(entries) if manifest is None else shazar_cache.reusable_entries(manifest, entries, stats)
+    compressed = compress_entries([entry for entry, previous in zip(entries, reusable) if previous is None], pool,
+                                  dict(options, temp_dir=temp_dir))
+
+    if manifest is None:
+        yield from compressed
+    else:
+        with open(manifest['archive'], 'rb') as archive_file:
+            for (path, name), previous in zip(entries, reusable):
+                yield next(compressed) if previous is None else \
+                    shazar_cache.read_entry(archive_file, entry_info(path, name, options['date_time']), previous)
+
+
+def compress_entries(entries, pool, options):
+    """
+    Compresses the given entries, using the given pool of worker processes if any.
+    The compressed entries are yielded in the given order, so the archive is the same regardless of the number of jobs.
+    """
+
+    if pool is not None and len(entries) > 1:
+        yield from pool.imap(partial(compress_entry, **options), entries)
+    else:
+        yield from map(partial(compress_entry, **options), entries)
+
+
+def compress_entry(entry, date_time=None, compression_level=6, stored_extensions=(), temp_dir=None):
+    """
+    Returns the ZipInfo, the data, the SHA-256 of the contents and the compression time of a file.
+    Files that are already compressed are stored as they are, see `is_compressible`.
+    The data of files larger than `large_entry_size` is an `EntryData` rather than bytes.
+    """
+
+    path, name = entry
+    zinfo = entry_info(path, name, date_time)
+    if zinfo.file_size > large_entry_size:
+        return compress_large_entry(path, zinfo, compression_level, stored_extensions, temp_dir)
+
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    start = time.perf_counter()
+    compressed = None
+    if compression_level > 0 and is_compressible(name, data[:sample_size], len(data), stored_extensions):
+        compressor = zlib.compressobj(compression_level, zlib.DEFLATED, -15)
+        compressed = compressor.compress(data) + compressor.flush()
+        # Store files that do not get smaller, like zip does
+        compressed = compressed if len(compressed) < len(data) else None
+    compress_time = time.perf_counter() - start
+
+    zinfo.compress_type = zipfile.ZIP_STORED if compressed is None else zipfile.ZIP_DEFLATED
+    zinfo.CRC = zlib.crc32(data)
+    zinfo.file_size = len(data)
+    zinfo.compress_size = len(data if compressed is None else compressed)
+    return zinfo, data if compressed is None else compressed, hashlib.sha256(data).hexdigest(), compress_time
+
+
+def compress_large_entry(path, zinfo, compression_level, stored_extensions, temp_dir):
+    """
+    Returns the entry of a large file like `compress_entry` does, compressing the file in chunks to a temporary file
+    in the given directory. The data is an `EntryData` of the compressed file, or of the file itself if it is stored.
+    """
+
+    crc = 0
+    content_digest = hashlib.sha256()
+    start = time.perf_counter()
+    with open(path, 'rb') as f:
+        compressed = None
+        if compression_level > 0 and is_compressible(zinfo.filename, f.read(sample_size), zinfo.file_size, stored_extensions):
+            f.seek(0)
+            compressor = zlib.compressobj(compression_level, zlib.DEFLATED, -15)
+            compressed = tempfile.NamedTemporaryFile(dir=temp_dir, delete=False)
+            with compressed:
+                for buf in iter(partial(f.read, chunk_size), b''):
+                    crc = zlib.crc32(buf, crc)
+                    content_digest.update(buf)
+                    compressed.write(compressor.compress(buf))
+                compressed.write(compressor.flush())
+            compress_size = os.path.getsize(compressed.name)
+            # Store files that do not get smaller, like zip does
+            if compress_size >= zinfo.file_size:
+                os.remove(compressed.name)
+                compressed = None
         else:
-            zip_file.write(args.source, source_base_name)
+            f.seek(0)
+            for buf in iter(partial(f.read, chunk_size), b''):
+                crc = zlib.crc32(buf, crc)
+                content_digest.update(buf)
+    compress_time = time.perf_counter() - start
+
+    zinfo.compress_type = zipfile.ZIP_STORED if compressed is None else zipfile.ZIP_DEFLATED
+    zinfo.CRC = crc
+    zinfo.compress_size = zinfo.file_size if compressed is None else compress_size
+    data = EntryData(path, False) if compressed is None else EntryData(compressed.name, True)
+    return zinfo, data, content_digest.hexdigest(), compress_time
+
+
+def is_compressible(name, sample, size, stored_extensions):
+    """
+    Files with one of the given extensions are considered to be compressed already. Files of any other type larger
+    than `sample_size` are only compressed if a fast compression of a sample of their start saves at least
+    `min_sample_saving`.
+    """
+
+    if os.path.splitext(name)[1].lower() in stored_extensions:
+        return False
+    if size <= sample_size:
+        return True
+    sample = sample[:sample_size]
+    return len(zlib.compress(sample, 1)) <= len(sample) * (1 - min_sample_saving)
+
+
+def entry_info(path, name, date_time=None):
+    """
+    Returns the ZipInfo of a file. Given a date_time, the entry is made reproducible: the date_time replaces the
+    modification time, and the permissions are normalized to 644, or 755 for files executable by their owner.
+    Modification times the ZIP format cannot hold, e.g. the epoch of files built by Nix, are clamped to its range.
+    """
+
+    file_stat = os.stat(path)
+    if date_time is None:
+        zinfo = zipfile.ZipInfo(name, min(max(earliest_date_time, time.localtime(file_stat.st_mtime)[:6]), latest_date_time))
+        zinfo.external_attr = (file_stat.st_mode & 0xFFFF) << 16
+    else:
+        mode = 0o755 if file_stat.st_mode & stat.S_IXUSR else 0o644
+        zinfo = zipfile.ZipInfo(name, date_time)
+        zinfo.external_attr = (stat.S_IFREG | mode) << 16
+        zinfo.create_system = 3
+    zinfo.file_size = file_stat.st_size
+    return zinfo
+
+
+def print_report(written_entries):
+    deflated = [(zinfo, compress_time) for zinfo, compress_time in written_entries
+                if zinfo.compress_type == zipfile.ZIP_DEFLATED]
+    stored = [zinfo for zinfo, compress_time in written_entries if zinfo.compress_type == zipfile.ZIP_STORED]
+
+    deflated_size = sum(zinfo.file_size for zinfo, compress_time in deflated)
+    print('Deflated {} files from {} to {}'.format(
+        len(deflated), progress.format_size(deflated_size), progress.format_size(sum(zinfo.compress_size for zinfo, compress_time in deflated))))
+
+    # Entries reused from the build cache have no compression time
+    timed_entries = [(zinfo, compress_time) for zinfo, compress_time in deflated if compress_time is not None]
+    compress_time = sum(compress_time for zinfo, compress_time in timed_entries)
+    timed_size = sum(zinfo.file_size for zinfo, compress_time in timed_entries)
+    stored_size = sum(zinfo.file_size for zinfo in stored)
+    saved_time = '' if compress_time == 0 or timed_size == 0 else \
+        ', saving an estimated {:.2f}s of compression'.format(stored_size * compress_time / timed_size)
+    print('Stored {} files of {} without compression{}'.format(len(stored), progress.format_size(stored_size), saved_time))
+
+    print('Total of {} files compressed from {} to {}'.format(
+        len(written_entries),
+        progress.format_size(sum(zinfo.file_size for zinfo, compress_time in written_entries)),
+        progress.format_size(sum(zinfo.compress_size for zinfo, compress_time in written_entries))))
+
+    largest = sorted((zinfo for zinfo, compress_time in written_entries), key=lambda zinfo: zinfo.file_size, reverse=True)
+    print('Largest files:')
+    print('{: >10}  {: >10}  {}'.format('SIZE', 'COMPRESSED', 'NAME'))
+    for zinfo in largest[:report_largest]:
+        print('{: >10}  {: >10}  {}'.format(progress.format_size(zinfo.file_size), progress.format_size(zinfo.compress_size), zinfo.filename))
+
+
+class EntryData:
+    """The data of an entry held in a file rather than in memory, which is removed once written if it is temporary"""
+
+    def __init__(self, path, temporary):
+        self.path = path
+        self.temporary = temporary
+
+    def open(self):
+        return open(self.path, 'rb')
+
+    def discard(self):
+        if self.temporary:
+            os.remove(self.path)
+
+
+class DigestWriter:
+    """
+    Writes to the given file while computing the SHA-256 digest of everything written.
+    It is not seekable on purpose: archives are written sequentially, so nothing is rewritten after being digested.
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.digest = hashlib.sha256()
+        self.position = 0
+
+    def write(self, data):
+        self.digest.update(data)
+        self.position += len(data)
+        return self.file.write(data)
 
-    dest = os.path.join(args.output_dir, '{}-{}.zip'.format(source_base_name, create_digest(temp_file)))
-    shutil.move(temp_file, dest)
-    print('Created digested ZIP archive at {}'.format(dest))
+    def tell(self):
+        return self.position
 
+    def flush(self):
+        self.file.flush()
 
-def create_digest(file_name):
-    with open(file_name, mode='rb') as f:
-        d = hashlib.sha256()
-        for buf in iter(partial(f.read, 128), b''):
-            d.update(buf)
-    return d.hexdigest()
+    def hexdigest(self):
+        return self.digest.hexdigest()
 
 
 if __name__ == '__main__':
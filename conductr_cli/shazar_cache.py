@@ -0,0 +1,118 @@
+from conductr_cli import bundle_utils
+
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+
+
+def manifest_path(cache_dir, source, output_dir):
+    key = '{}\n{}'.format(os.path.abspath(source), os.path.abspath(output_dir))
+    return os.path.join(cache_dir, '{}.json'.format(hashlib.sha256(key.encode('utf-8')).hexdigest()))
+
+
+def load(cache_dir, source, output_dir, settings):
+    """
+    Returns the manifest of the previous build of the source to the output directory, or None if there is none
+    or if it was built with different settings. The manifest is only returned while its archive still exists.
+    """
+
+    try:
+        with open(manifest_path(cache_dir, source, output_dir), 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    archive = manifest.get('archive')
+    if manifest.get('settings') != settings or archive is None or not os.path.isfile(archive) or \
+            os.path.getsize(archive) != manifest['archive_size']:
+        return None
+    return manifest
+
+
+def save(cache_dir, source, output_dir, settings, archive, entries):
+    """Saves the manifest of a build, replacing the one of the previous build atomically"""
+
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest = {
+        'settings': settings,
+        'archive': os.path.abspath(archive),
+        'archive_size': os.path.getsize(archive),
+        'entries': entries
+    }
+    with tempfile.NamedTemporaryFile('w', dir=cache_dir, suffix='.tmp', delete=False) as f:
+        json.dump(manifest, f)
+    os.replace(f.name, manifest_path(cache_dir, source, output_dir))
+
+
+def manifest_entry(stat, zinfo, content_digest, data_offset):
+    return {
+        'name': zinfo.filename,
+        'size': stat.st_size,
+        'mode': stat.st_mode,
+        'mtime': stat.st_mtime_ns,
+        'ctime': stat.st_ctime_ns,
+        'ino': stat.st_ino,
+        'sha256': content_digest,
+        'crc': zinfo.CRC,
+        'compress_type': zinfo.compress_type,
+        'compress_size': zinfo.compress_size,
+        'data_offset': data_offset
+    }
+
+
+def is_up_to_date(manifest, entries, stats):
+    """
+    Tells whether the given (path, name) entries are exactly the ones of the previous build, unmodified and with the
+    same permissions
+    """
+
+    previous_entries = manifest['entries']
+    if len(previous_entries) != len(entries):
+        return False
+
+    for (path, name), stat, previous in zip(entries, stats, previous_entries):
+        if zipfile.ZipInfo(name).filename != previous['name'] or stat.st_mode != previous.get('mode') or \
+                not is_unmodified(stat, previous):
+            return False
+    return True
+
+
+def is_unmodified(stat, previous):
+    """
+    Tells whether a file is unmodified since the previous build, as far as its status tells. Besides the size and the
+    modification time, which tools such as `cp -p` or `touch -r` preserve, the change time and the inode must match,
+    which tell a file replaced or written to since.
+    """
+
+    return stat.st_size == previous['size'] and stat.st_mtime_ns == previous['mtime'] and \
+        stat.st_ctime_ns == previous.get('ctime') and stat.st_ino == previous.get('ino')
+
+
+def reusable_entries(manifest, entries, stats):
+    """
+    Returns the manifest entry of the previous build for every given (path, name) entry whose content is unchanged,
+    and None for every other one. The content of a file is only hashed when its status tells it may have changed.
+    """
+
+    previous_entries = dict((entry['name'], entry) for entry in manifest['entries'])
+    result = []
+    for (path, name), stat in zip(entries, stats):
+        previous = previous_entries.get(zipfile.ZipInfo(name).filename)
+        if previous is not None and stat.st_size == previous['size'] and \
+                (is_unmodified(stat, previous) or bundle_utils.file_digest(path) == previous['sha256']):
+            result.append(previous)
+        else:
+            result.append(None)
+    return result
+
+
+def read_entry(archive_file, zinfo, previous):
+    """Returns the entry of the file described by the given ZipInfo from the archive of the previous build"""
+
+    zinfo.compress_type = previous['compress_type']
+    zinfo.CRC = previous['crc']
+    zinfo.compress_size = previous['compress_size']
+    archive_file.seek(previous['data_offset'])
+    return zinfo, archive_file.read(previous['compress_size']), previous['sha256'], None
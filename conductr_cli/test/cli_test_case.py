@@ -1,7 +1,7 @@
 import os
 import shutil
 import tempfile
-from requests.exceptions import ConnectionError, HTTPError
+from requests.exceptions import ConnectionError, HTTPError, ReadTimeout
 
 try:
     from unittest.mock import MagicMock  # 3.3 and beyond
@@ -19,6 +19,14 @@ class CliTestCase():
                                |ERROR: Make sure it can be accessed at {}
                                |""")
 
+    @property
+    def default_timeout_error(self):
+        return strip_margin("""|ERROR: Timed out waiting for ConductR.
+                               |ERROR: Reason: test reason
+                               |ERROR: Make sure it can be accessed at {}
+                               |ERROR: Allow more time with --timeout and --deadline
+                               |""")
+
     def respond_with(self, status_code=200, text=''):
         reasons = {
             200: 'OK',
@@ -46,6 +54,9 @@ class CliTestCase():
     def raise_connection_error(self, reason, url):
         return MagicMock(side_effect=ConnectionError(reason, request=MagicMock(url=url)))
 
+    def raise_timeout(self, reason, url):
+        return MagicMock(side_effect=ReadTimeout(reason, request=MagicMock(url=url)))
+
     def output(self, logger):
         return ''.join([args[0].rstrip(' ') for name, args, kwargs in logger.method_calls])
 
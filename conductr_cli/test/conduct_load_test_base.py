@@ -1,12 +1,22 @@
 from conductr_cli.test.cli_test_case import CliTestCase, create_temp_bundle, create_temp_bundle_with_contents, strip_margin
 from conductr_cli import conduct_load
+from conductr_cli.bundle_utils import file_digest
+from requests.exceptions import ConnectionError
 from urllib.error import URLError
+import hashlib
+import io
+import json
+import os
+import re
 import shutil
+import tempfile
+import threading
+import time
 
 try:
-    from unittest.mock import call, patch, MagicMock  # 3.3 and beyond
+    from unittest.mock import patch, call, MagicMock  # 3.3 and beyond
 except ImportError:
-    from mock import call, patch, MagicMock
+    from mock import patch, call, MagicMock
 
 
 class ConductLoadTestBase(CliTestCase):
@@ -19,6 +29,9 @@ class ConductLoadTestBase(CliTestCase):
                          |Print ConductR info with: conduct info{params}
                          |"""
 
+    # The size of the upload of a test bundle, which differs between API versions
+    size_pattern = r'[0-9.]+ KB'
+
     @property
     def default_response(self):
         return strip_margin("""|{
@@ -33,78 +46,163 @@ class ConductLoadTestBase(CliTestCase):
             'downloading_configuration': downloading_configuration,
             'verbose': verbose}))
 
+    def assert_load_request(self, http_method, expected_files):
+        (url,), kwargs = http_method.call_args
+        self.assertEqual(url, self.default_url)
+        # Files are sent from open file objects; compare them by their path
+        self.assertEqual(
+            [(name, (value[0], value[1].name) if isinstance(value, tuple) else value) for name, value in kwargs['data'].fields],
+            expected_files)
+        self.assertEqual(kwargs['headers'], {'Content-Type': kwargs['data'].content_type})
+
     def test_success(self):
-        urlretrieve_mock = MagicMock(return_value=(self.bundle_file, ()))
         http_method = self.respond_with(200, self.default_response)
         stdout = MagicMock()
-        open_mock = MagicMock(return_value=1)
 
-        with patch('conductr_cli.conduct_load.urlretrieve', urlretrieve_mock), \
-                patch('requests.post', http_method), \
-                patch('sys.stdout', stdout), \
-                patch('builtins.open', open_mock):
+        with patch('conductr_cli.conduct_http.post', http_method), patch('sys.stdout', stdout):
             conduct_load.load(MagicMock(**self.default_args))
 
-        open_mock.assert_called_with(self.bundle_file, 'rb')
-        http_method.assert_called_with(self.default_url, files=self.default_files)
+        self.assert_load_request(http_method, self.default_files)
 
         self.assertEqual(self.default_output(), self.output(stdout))
 
     def test_success_verbose(self):
-        urlretrieve_mock = MagicMock(return_value=(self.bundle_file, ()))
         http_method = self.respond_with(200, self.default_response)
+        # The body is sent at once, 0.5s after the upload started, and responded to 0.5s later
+        sent_sizes = []
+        http_method.side_effect = lambda url, data, headers: sent_sizes.append(len(data.read())) or http_method.return_value
         stdout = MagicMock()
-        open_mock = MagicMock(return_value=1)
 
-        with patch('conductr_cli.conduct_load.urlretrieve', urlretrieve_mock), \
-                patch('requests.post', http_method), \
-                patch('sys.stdout', stdout), \
-                patch('builtins.open', open_mock):
+        with patch('conductr_cli.conduct_http.post', http_method), patch('sys.stdout', stdout), \
+                patch('conductr_cli.conduct_load.perf_counter', MagicMock(side_effect=[0.0, 0.25, 0.5, 0.75, 1.0, 3.0])), \
+                patch('conductr_cli.progress.perf_counter', MagicMock(side_effect=[1.0, 1.5, 2.0])):
             args = self.default_args.copy()
             args.update({'verbose': True})
             conduct_load.load(MagicMock(**args))
 
-        open_mock.assert_called_with(self.bundle_file, 'rb')
-        http_method.assert_called_with(self.default_url, files=self.default_files)
+        self.assert_load_request(http_method, self.default_files)
+
+        timeline = strip_margin("""|Retrieval took 0.250s
+                                   |Parsing took 0.250s
+                                   |Upload took 2.000s
+                                   |{{"attempts": 1, "bytes": {}, "duration": 1.0, "resent_bytes": 0, "time_to_first_byte": 0.5}}
+                                   |""").format(sent_sizes[0])
+        self.assertEqual(self.default_output(verbose=self.default_response + timeline), self.output(stdout))
+
+    def test_success_progress_on_tty(self):
+        http_method = self.respond_with(200, self.default_response)
+        http_method.side_effect = lambda url, data, headers: data.read() and http_method.return_value
+        stdout = io.StringIO()
+
+        with patch('conductr_cli.conduct_http.post', http_method), patch('sys.stdout', stdout), \
+                patch('conductr_cli.progress.is_tty', MagicMock(return_value=True)):
+            conduct_load.load(MagicMock(**self.default_args))
+
+        self.assert_load_request(http_method, self.default_files)
+
+        output = stdout.getvalue()
+        self.assertRegex(output, r'Loading bundle to ConductR...\n\rSent [0-9.]+ KB of [0-9.]+ KB \(100%\), .+\nBundle loaded.\n')
+
+    def test_success_limit_rate(self):
+        http_method = self.respond_with(200, self.default_response)
+        sent_sizes = []
+        http_method.side_effect = lambda url, data, headers: sent_sizes.append(len(data.read())) or http_method.return_value
+        consume = MagicMock()
+        stdout = MagicMock()
+
+        with patch('conductr_cli.conduct_http.post', http_method), patch('sys.stdout', stdout), \
+                patch('conductr_cli.rate_limit.TokenBucket.consume', consume):
+            args = self.default_args.copy()
+            args.update({'limit_rate': 1024})
+            conduct_load.load(MagicMock(**args))
+
+        self.assert_load_request(http_method, self.default_files)
+        self.assertEqual(consume.call_args_list, [call(sent_sizes[0])])
+        self.assertEqual(self.default_output(), self.output(stdout))
+
+    def test_success_retry_connection_error(self):
+        response = self.respond_with(200, self.default_response).return_value
+        attempts = []
+
+        def post(url, data, headers):
+            attempts.append(len(data))
+            if len(attempts) == 1:
+                # The connection drops part of the way through the body
+                data.read(100)
+                raise ConnectionError('Connection reset by peer', request=MagicMock(url=url))
+            data.read()
+            return response
+
+        sleep = MagicMock()
+        stdout = MagicMock()
+
+        with patch('conductr_cli.conduct_http.post', MagicMock(side_effect=post)), patch('sys.stdout', stdout), \
+                patch('conductr_cli.conduct_load.sleep', sleep), \
+                patch('conductr_cli.conduct_load.random.uniform', MagicMock(return_value=1.0)):
+            args = self.default_args.copy()
+            args.update({'retries': 2, 'verbose': True})
+            conduct_load.load(MagicMock(**args))
+
+        sleep.assert_called_once_with(1.0)
+        # The whole body is sent again, from the start of the bundle
+        self.assertEqual(attempts, [attempts[1]] * 2)
+        output = self.output(stdout)
+        self.assertIn('Loading bundle to ConductR...\nUpload failed: Connection reset by peer. Retrying in 1.0s...\n', output)
+        self.assertIn('"attempts": 2, "bytes": {}'.format(attempts[1]), output)
+        self.assertIn('"resent_bytes": 100', output)
+        self.assertIn('Bundle loaded.\n', output)
+
+    def test_success_retry_unavailable(self):
+        unavailable = MagicMock(status_code=503, reason='Service Unavailable', text='')
+        http_method = MagicMock(side_effect=[unavailable, unavailable, self.respond_with(200, self.default_response).return_value])
+        sleep = MagicMock()
+        stdout = MagicMock()
+
+        with patch('conductr_cli.conduct_http.post', http_method), patch('sys.stdout', stdout), \
+                patch('conductr_cli.conduct_load.sleep', sleep), \
+                patch('conductr_cli.conduct_load.random.uniform', MagicMock(return_value=1.0)):
+            args = self.default_args.copy()
+            args.update({'retries': 3})
+            conduct_load.load(MagicMock(**args))
+
+        self.assertEqual(sleep.call_args_list, [call(1.0), call(2.0)])
+        self.assert_load_request(http_method, self.default_files)
+        self.assertEqual(
+            self.default_output().replace('Loading bundle to ConductR...\n', strip_margin(
+                """|Loading bundle to ConductR...
+                   |Upload failed: 503 Service Unavailable. Retrying in 1.0s...
+                   |Upload failed: 503 Service Unavailable. Retrying in 2.0s...
+                   |""")),
+            self.output(stdout))
 
-        self.assertEqual(self.default_output(verbose=self.default_response), self.output(stdout))
+    def test_retry_delay(self):
+        with patch('conductr_cli.conduct_load.random.uniform', MagicMock(return_value=1.0)):
+            self.assertEqual([conduct_load.retry_delay(attempt) for attempt in range(7)], [1.0, 2.0, 4.0, 8.0, 16.0, 30.0, 30.0])
 
     def test_success_long_ids(self):
-        urlretrieve_mock = MagicMock(return_value=(self.bundle_file, ()))
         http_method = self.respond_with(200, self.default_response)
         stdout = MagicMock()
-        open_mock = MagicMock(return_value=1)
 
-        with patch('conductr_cli.conduct_load.urlretrieve', urlretrieve_mock), \
-                patch('requests.post', http_method), \
-                patch('sys.stdout', stdout), \
-                patch('builtins.open', open_mock):
+        with patch('conductr_cli.conduct_http.post', http_method), patch('sys.stdout', stdout):
             args = self.default_args.copy()
             args.update({'long_ids': True})
             conduct_load.load(MagicMock(**args))
 
-        open_mock.assert_called_with(self.bundle_file, 'rb')
-        http_method.assert_called_with(self.default_url, files=self.default_files)
+        self.assert_load_request(http_method, self.default_files)
 
         self.assertEqual(self.default_output(bundle_id='45e0c477d3e5ea92aa8d85c0d8f3e25c'), self.output(stdout))
 
     def test_success_custom_ip_port(self):
-        urlretrieve_mock = MagicMock(return_value=(self.bundle_file, ()))
         http_method = self.respond_with(200, self.default_response)
         stdout = MagicMock()
-        open_mock = MagicMock(return_value=1)
 
         cli_parameters = ' --ip 127.0.1.1 --port 9006'
-        with patch('conductr_cli.conduct_load.urlretrieve', urlretrieve_mock),\
-                patch('requests.post', http_method), \
-                patch('sys.stdout', stdout), \
-                patch('builtins.open', open_mock):
+        with patch('conductr_cli.conduct_http.post', http_method), patch('sys.stdout', stdout):
             args = self.default_args.copy()
             args.update({'cli_parameters': cli_parameters})
             conduct_load.load(MagicMock(**args))
 
-        open_mock.assert_called_with(self.bundle_file, 'rb')
-        http_method.assert_called_with(self.default_url, files=self.default_files)
+        self.assert_load_request(http_method, self.default_files)
 
         self.assertEqual(
             self.default_output(params=cli_parameters),
@@ -116,64 +214,459 @@ class ConductLoadTestBase(CliTestCase):
             'config.sh': 'echo configuring'
         })
 
-        urlretrieve_mock = MagicMock(side_effect=[(self.bundle_file, ()), (config_file, ())])
         http_method = self.respond_with(200, self.default_response)
         stdout = MagicMock()
-        open_mock = MagicMock(return_value=1)
+
+        with patch('conductr_cli.conduct_http.post', http_method), patch('sys.stdout', stdout):
+            args = self.default_args.copy()
+            args.update({'configuration': config_file})
+            conduct_load.load(MagicMock(**args))
+
+        expected_files = self.default_files + [('configuration', ('bundle.zip', config_file))]
+        expected_files[4] = ('bundleName', 'overlaid-name')
+        self.assert_load_request(http_method, expected_files)
+
+        self.assertEqual(self.default_output(downloading_configuration='Retrieving configuration...\n'), self.output(stdout))
+
+        shutil.rmtree(tmpdir)
+
+    def test_success_local_file_not_copied(self):
+        urlretrieve_mock = MagicMock()
+        http_method = self.respond_with(200, self.default_response)
+        stdout = MagicMock()
 
         with patch('conductr_cli.conduct_load.urlretrieve', urlretrieve_mock), \
-                patch('requests.post', http_method), \
-                patch('sys.stdout', stdout), \
-                patch('builtins.open', open_mock):
+                patch('conductr_cli.conduct_http.post', http_method), \
+                patch('sys.stdout', stdout):
+            conduct_load.load(MagicMock(**self.default_args))
+
+        urlretrieve_mock.assert_not_called()
+        self.assert_load_request(http_method, self.default_files)
+
+    def test_success_remote_bundle(self):
+        tmpdir = tempfile.mkdtemp()
+        with open(self.bundle_file, 'rb') as f:
+            urlopen_mock = MagicMock(return_value=MagicMock(**{
+                'read.side_effect': [f.read(), b''],
+                'headers': {'ETag': '"1"'},
+                '__enter__.side_effect': lambda: urlopen_mock.return_value
+            }))
+        http_method = self.respond_with(200, self.default_response)
+        stdout = MagicMock()
+
+        with patch('conductr_cli.download_cache.cache_dir', tmpdir), \
+                patch('conductr_cli.download_cache.urlopen', urlopen_mock), \
+                patch('conductr_cli.conduct_http.post', http_method), \
+                patch('sys.stdout', stdout):
+            args = self.default_args.copy()
+            args.update({'bundle': 'http://site.com/bundle.zip'})
+            conduct_load.load(MagicMock(**args))
+
+        (request,), kwargs = urlopen_mock.call_args
+        self.assertEqual(request.full_url, 'http://site.com/bundle.zip')
+        (url,), kwargs = http_method.call_args
+        name, (bundle_name, bundle_file) = kwargs['data'].fields[-1]
+        self.assertEqual(bundle_name, 'bundle.zip')
+        self.assertEqual(bundle_file.name, os.path.join(tmpdir, '{}.data'.format(file_digest(self.bundle_file))))
+        self.assertEqual(kwargs['data'].fields[:-1], self.default_files[:-1])
+
+        self.assertEqual(self.default_output(), self.output(stdout))
+
+        shutil.rmtree(tmpdir)
+
+    def test_success_cached_conf(self):
+        tmpdir = tempfile.mkdtemp()
+        digest = file_digest(self.bundle_file)
+        bundle_file = shutil.copy(self.bundle_file, os.path.join(tmpdir, 'bundle-{}.zip'.format(digest)))
+        http_method = self.respond_with(200, self.default_response)
+        stdout = MagicMock()
+
+        with patch('conductr_cli.conf_cache.cache_dir', os.path.join(tmpdir, 'cache')), \
+                patch('conductr_cli.conduct_http.post', http_method), \
+                patch('sys.stdout', stdout):
+            args = self.default_args.copy()
+            args.update({'bundle': bundle_file})
+            conduct_load.load(MagicMock(**args))
+            with patch('conductr_cli.conf_parser.parse') as parse:
+                conduct_load.load(MagicMock(**args))
+
+        parse.assert_not_called()
+        expected_files = self.default_files[:-1] + [('bundle', ('bundle-{}.zip'.format(digest), bundle_file))]
+        self.assert_load_request(http_method, expected_files)
+        self.assertEqual(self.default_output() * 2, self.output(stdout))
+
+        shutil.rmtree(tmpdir)
+
+    def test_success_concurrent_retrieval(self):
+        tmpdir, config_file = create_temp_bundle_with_contents({
+            'bundle.conf': '{name="overlaid-name"}',
+            'config.sh': 'echo configuring'
+        })
+        # Neither retrieval completes before the other one started
+        barrier = threading.Barrier(2, timeout=10)
+        open_url = conduct_load.open_url
+        http_method = self.respond_with(200, self.default_response)
+        stdout = MagicMock()
+
+        with patch('conductr_cli.conduct_load.open_url', side_effect=lambda url, **kwargs: barrier.wait() is None or open_url(url, **kwargs)), \
+                patch('conductr_cli.conduct_http.post', http_method), \
+                patch('sys.stdout', stdout):
             args = self.default_args.copy()
             args.update({'configuration': config_file})
             conduct_load.load(MagicMock(**args))
 
+        expected_files = self.default_files + [('configuration', ('bundle.zip', config_file))]
+        expected_files[4] = ('bundleName', 'overlaid-name')
+        self.assert_load_request(http_method, expected_files)
+
+        shutil.rmtree(tmpdir)
+
+    def test_success_stdin(self):
+        with open(self.bundle_file, 'rb') as f:
+            bundle = f.read()
+        stdin = MagicMock(buffer=io.BytesIO(bundle))
+        http_method = self.respond_with(200, self.default_response)
+        # The bundle read from stdin is discarded once sent
+        sent_bundles = []
+
+        def post(url, data, headers):
+            bundle_file = data.fields[-1][1][1]
+            # The bundle is larger than what is held in memory
+            self.assertTrue(bundle_file._rolled)
+            sent_bundles.append(bundle_file.read())
+            bundle_file.seek(0)
+            return http_method.return_value
+
+        http_method.side_effect = post
+        stdout = MagicMock()
+
+        with patch('conductr_cli.conduct_http.post', http_method), patch('sys.stdin', stdin), \
+                patch('sys.stdout', stdout), patch('conductr_cli.conduct_load.stdin_spool_size', 256):
+            args = self.default_args.copy()
+            args.update({'bundle': '-'})
+            conduct_load.load(MagicMock(**args))
+
+        (url,), kwargs = http_method.call_args
+        name, (bundle_name, bundle_file) = kwargs['data'].fields[-1]
+        self.assertEqual(name, 'bundle')
+        self.assertEqual(bundle_name, 'bundle-{}.zip'.format(hashlib.sha256(bundle).hexdigest()))
+        self.assertEqual(sent_bundles, [bundle])
+        self.assertEqual(kwargs['data'].fields[:-1], self.default_files[:-1])
+
+        self.assertEqual(self.default_output(), self.output(stdout))
+
+    def loaded_bundles(self, bundle_digest, configuration_digest=None):
+        bundle = {'bundleId': '45e0c477d3e5ea92aa8d85c0d8f3e25c', 'bundleDigest': bundle_digest}
+        if configuration_digest is not None:
+            bundle.update({'bundleId': '45e0c477d3e5ea92aa8d85c0d8f3e25c-ba5e3b1a', 'configurationDigest': configuration_digest})
+        return json.dumps([{'bundleId': 'f804d644a01a5ab9f679f76939f5c7e2', 'bundleDigest': 'f804d644'}, bundle])
+
+    def test_success_skip_if_loaded(self):
+        get_method = self.respond_with(200, self.loaded_bundles(file_digest(self.bundle_file)))
+        post_method = self.respond_with(200, self.default_response)
+        stdout = MagicMock()
+
+        with patch('conductr_cli.conduct_http.get', get_method), patch('conductr_cli.conduct_http.post', post_method), patch('sys.stdout', stdout):
+            args = self.default_args.copy()
+            args.update({'skip_if_loaded': True})
+            conduct_load.load(MagicMock(**args))
+
+        get_method.assert_called_with(self.default_url)
+        post_method.assert_not_called()
+        self.assertEqual(strip_margin("""|Retrieving bundle...
+                                         |Checking for a loaded bundle...
+                                         |Bundle already loaded.
+                                         |Start bundle with: conduct run 45e0c47
+                                         |Unload bundle with: conduct unload 45e0c47
+                                         |Print ConductR info with: conduct info
+                                         |"""), self.output(stdout))
+
+    def test_success_skip_if_loaded_digest_of_name(self):
+        tmpdir = tempfile.mkdtemp()
+        # The digest carried by the name is trusted, as ConductR verifies it
+        digest = 'a' * 64
+        bundle_file = shutil.copy(self.bundle_file, os.path.join(tmpdir, 'bundle-{}.zip'.format(digest)))
+        get_method = self.respond_with(200, self.loaded_bundles(digest))
+        post_method = self.respond_with(200, self.default_response)
+        stdout = MagicMock()
+
+        with patch('conductr_cli.conduct_http.get', get_method), patch('conductr_cli.conduct_http.post', post_method), patch('sys.stdout', stdout):
+            args = self.default_args.copy()
+            args.update({'bundle': bundle_file, 'skip_if_loaded': True, 'long_ids': True})
+            conduct_load.load(MagicMock(**args))
+
+        post_method.assert_not_called()
+        self.assertIn('Start bundle with: conduct run 45e0c477d3e5ea92aa8d85c0d8f3e25c\n', self.output(stdout))
+
+        shutil.rmtree(tmpdir)
+
+    def test_success_skip_if_loaded_with_configuration(self):
+        tmpdir, config_file = create_temp_bundle_with_contents({
+            'bundle.conf': '{name="overlaid-name"}',
+            'config.sh': 'echo configuring'
+        })
+        get_method = self.respond_with(200, self.loaded_bundles(file_digest(self.bundle_file), file_digest(config_file)))
+        post_method = self.respond_with(200, self.default_response)
+        stdout = MagicMock()
+
+        with patch('conductr_cli.conduct_http.get', get_method), patch('conductr_cli.conduct_http.post', post_method), patch('sys.stdout', stdout):
+            args = self.default_args.copy()
+            args.update({'configuration': config_file, 'skip_if_loaded': True})
+            conduct_load.load(MagicMock(**args))
+
+        post_method.assert_not_called()
+        self.assertIn('Start bundle with: conduct run 45e0c47-ba5e3b1\n', self.output(stdout))
+
+        shutil.rmtree(tmpdir)
+
+    def test_success_skip_if_loaded_not_loaded(self):
+        # The bundle is loaded, but with a configuration
+        get_method = self.respond_with(200, self.loaded_bundles(file_digest(self.bundle_file), 'ba5e3b1a'))
+        post_method = self.respond_with(200, self.default_response)
+        stdout = MagicMock()
+
+        with patch('conductr_cli.conduct_http.get', get_method), patch('conductr_cli.conduct_http.post', post_method), patch('sys.stdout', stdout):
+            args = self.default_args.copy()
+            args.update({'skip_if_loaded': True})
+            conduct_load.load(MagicMock(**args))
+
+        self.assert_load_request(post_method, self.default_files)
+        self.assertEqual('Retrieving bundle...\nChecking for a loaded bundle...\n' + self.default_output()[len('Retrieving bundle...\n'):],
+                         self.output(stdout))
+
+    def test_success_skip_if_loaded_stdin(self):
+        with open(self.bundle_file, 'rb') as f:
+            bundle = f.read()
+        stdin = MagicMock(buffer=io.BytesIO(bundle))
+        get_method = self.respond_with(200, self.loaded_bundles(hashlib.sha256(bundle).hexdigest()))
+        post_method = self.respond_with(200, self.default_response)
+        stdout = MagicMock()
+
+        with patch('conductr_cli.conduct_http.get', get_method), patch('conductr_cli.conduct_http.post', post_method), \
+                patch('sys.stdin', stdin), patch('sys.stdout', stdout):
+            args = self.default_args.copy()
+            args.update({'bundle': '-', 'skip_if_loaded': True})
+            conduct_load.load(MagicMock(**args))
+
+        post_method.assert_not_called()
+        self.assertIn('Bundle already loaded.\n', self.output(stdout))
+
+    def test_success_bulk(self):
+        tmpdir, config_file = create_temp_bundle_with_contents({
+            'bundle.conf': '{name="overlaid-name"}',
+            'config.sh': 'echo configuring'
+        })
+        manifest = os.path.join(tmpdir, 'manifest')
+        with open(manifest, 'w') as f:
+            f.write('# The bundles of the system\n\n{}\n'.format(self.bundle_file))
+        http_method = self.respond_with(200, self.default_response)
+        grow_pool = MagicMock()
+        stdout = MagicMock()
+
+        with patch('conductr_cli.conduct_http.post', http_method), \
+                patch('conductr_cli.conduct_http.grow_pool', grow_pool), patch('sys.stdout', stdout), \
+                patch('conductr_cli.conduct_load.perf_counter', MagicMock(return_value=0.0)):
+            args = self.default_args.copy()
+            args.update({'bundles': [[self.bundle_file, config_file]], 'manifest': manifest, 'jobs': 2})
+            conduct_load.load(MagicMock(**args))
+
+        grow_pool.assert_called_with(2)
+        self.assertEqual(http_method.call_count, 3)
+        uploads = sorted([(name, value[0]) for name, value in kwargs['data'].fields if isinstance(value, tuple)]
+                         for (url,), kwargs in http_method.call_args_list)
+        self.assertEqual(uploads, [
+            [('bundle', 'bundle.zip')],
+            [('bundle', 'bundle.zip')],
+            [('bundle', 'bundle.zip'), ('configuration', 'bundle.zip')]
+        ])
+        self.assertRegex(
+            self.output(stdout),
+            '^' + strip_margin("""|Loading 3 bundles to ConductR...
+                            |ID       STATUS    SIZE  TIME  THROUGHPUT  BUNDLE
+                            |45e0c47  loaded  {size}  0.0s              {bundle}
+                            |45e0c47  loaded  {size}  0.0s              {bundle} {configuration}
+                            |45e0c47  loaded  {size}  0.0s              {bundle}
+                            |3 loaded, 0 skipped, 0 failed, {size} uploaded
+                            |""").format(size=self.size_pattern, bundle=re.escape(self.bundle_file),
+                                         configuration=re.escape(config_file)) + '$')
+
+        shutil.rmtree(tmpdir)
+
+    def test_success_bulk_bounded(self):
+        in_flight, max_in_flight = [0], [0]
+        lock = threading.Lock()
+        response = self.respond_with(200, self.default_response).return_value
+
+        def post(url, data, headers):
+            with lock:
+                in_flight[0] += 1
+                max_in_flight[0] = max(max_in_flight[0], in_flight[0])
+            time.sleep(0.05)
+            with lock:
+                in_flight[0] -= 1
+            return response
+
+        stdout = MagicMock()
+
+        with patch('conductr_cli.conduct_http.post', MagicMock(side_effect=post)), patch('sys.stdout', stdout):
+            args = self.default_args.copy()
+            args.update({'bundle': None, 'bundles': [[self.bundle_file]] * 6, 'jobs': 2})
+            conduct_load.load(MagicMock(**args))
+
+        self.assertEqual(max_in_flight[0], 2)
+        self.assertIn('6 loaded, 0 skipped, 0 failed', self.output(stdout))
+
+    def test_failure_bulk_partial(self):
+        http_method = self.respond_with(200, self.default_response)
+        stdout = MagicMock()
+        stderr = MagicMock()
+
+        with patch('conductr_cli.conduct_http.post', http_method), \
+                patch('sys.stdout', stdout), patch('sys.stderr', stderr), \
+                patch('conductr_cli.conduct_load.perf_counter', MagicMock(return_value=0.0)):
+            args = self.default_args.copy()
+            args.update({'bundles': [['no_such.bundle'], [self.bundle_file]]})
+            with self.assertRaises(SystemExit) as exit:
+                conduct_load.load(MagicMock(**args))
+
+        self.assertEqual(exit.exception.code, 1)
+        self.assertEqual(http_method.call_count, 2)
+        self.assertEqual(
+            strip_margin("""|ERROR: File not found: {}
+                            |""").format(os.path.join(os.getcwd(), 'no_such.bundle')),
+            self.output(stderr))
+        self.assertRegex(
+            self.output(stdout),
+            '^' + strip_margin("""|Loading 3 bundles to ConductR...
+                            |ID       STATUS    SIZE  TIME  THROUGHPUT  BUNDLE
+                            |45e0c47  loaded  {size}  0.0s              {bundle}
+                            |         failed                            no_such.bundle
+                            |45e0c47  loaded  {size}  0.0s              {bundle}
+                            |2 loaded, 0 skipped, 1 failed, {size} uploaded
+                            |""").format(size=self.size_pattern, bundle=re.escape(self.bundle_file)) + '$')
+
+    def test_failure_bulk_unexpected(self):
+        tmpdir = tempfile.mkdtemp()
+        http_method = self.respond_with(200, self.default_response)
+        stdout = MagicMock()
+        stderr = MagicMock()
+
+        with patch('conductr_cli.conduct_http.post', http_method), \
+                patch('sys.stdout', stdout), patch('sys.stderr', stderr), \
+                patch('conductr_cli.conduct_load.perf_counter', MagicMock(return_value=0.0)):
+            args = self.default_args.copy()
+            # A directory cannot be opened as a bundle, which none of the error handlers reports
+            args.update({'bundle': None, 'bundles': [[tmpdir], [self.bundle_file]]})
+            with self.assertRaises(SystemExit) as exit:
+                conduct_load.load(MagicMock(**args))
+
+        self.assertEqual(exit.exception.code, 1)
+        self.assertEqual(http_method.call_count, 1)
+        self.assertEqual(
+            strip_margin("""|ERROR: Failed to load {0}: IsADirectoryError: [Errno 21] Is a directory: '{0}'
+                            |""").format(tmpdir),
+            self.output(stderr))
+        self.assertRegex(
+            self.output(stdout),
+            '^' + strip_margin("""|Loading 2 bundles to ConductR...
+                            |ID       STATUS    SIZE  TIME  THROUGHPUT  BUNDLE
+                            |         failed                            {tmpdir}
+                            |45e0c47  loaded  {size}  0.0s              {bundle}
+                            |1 loaded, 0 skipped, 1 failed, {size} uploaded
+                            |""").format(size=self.size_pattern, tmpdir=re.escape(tmpdir), bundle=re.escape(self.bundle_file)) + '$')
+
+        shutil.rmtree(tmpdir)
+
+    def test_failure_bulk_invalid_manifest(self):
+        tmpdir = tempfile.mkdtemp()
+        manifest = os.path.join(tmpdir, 'manifest')
+        with open(manifest, 'w') as f:
+            f.write('bundle.zip config.zip other.zip\n')
+        stderr = MagicMock()
+
+        with patch('sys.stderr', stderr):
+            args = self.default_args.copy()
+            args.update({'manifest': manifest})
+            conduct_load.load(MagicMock(**args))
+
         self.assertEqual(
-            open_mock.call_args_list,
-            [call(self.bundle_file, 'rb'), call(config_file, 'rb')]
-        )
+            strip_margin("""|ERROR: Expected a bundle and an optional configuration in {}: bundle.zip config.zip other.zip
+                            |""").format(manifest),
+            self.output(stderr))
 
-        expected_files = self.default_files + [('configuration', ('bundle.zip', 1))]
-        expected_files[4] = ('bundleName', 'overlaid-name')
-        http_method.assert_called_with(self.default_url, files=expected_files)
+        shutil.rmtree(tmpdir)
 
-        self.assertEqual(self.default_output(downloading_configuration='Retrieving configuration...\n'), self.output(stdout))
+    def test_failure_no_bundle_given(self):
+        stderr = MagicMock()
+
+        with patch('sys.stderr', stderr):
+            args = self.default_args.copy()
+            args.update({'bundle': None})
+            with self.assertRaises(SystemExit) as exit:
+                conduct_load.load(MagicMock(**args))
+
+        self.assertEqual(exit.exception.code, 2)
+        self.assertEqual(
+            strip_margin("""|ERROR: No bundle to load: give a bundle, --bundle or --manifest
+                            |"""),
+            self.output(stderr))
 
     def test_failure(self):
-        urlretrieve_mock = MagicMock(return_value=(self.bundle_file, ()))
         http_method = self.respond_with(404)
         stderr = MagicMock()
-        open_mock = MagicMock(return_value=1)
 
-        with patch('conductr_cli.conduct_load.urlretrieve', urlretrieve_mock), \
-                patch('requests.post', http_method), \
-                patch('sys.stderr', stderr), \
-                patch('builtins.open', open_mock):
+        with patch('conductr_cli.conduct_http.post', http_method), patch('sys.stderr', stderr):
             conduct_load.load(MagicMock(**self.default_args))
 
-        open_mock.assert_called_with(self.bundle_file, 'rb')
-        http_method.assert_called_with(self.default_url, files=self.default_files)
+        self.assert_load_request(http_method, self.default_files)
 
         self.assertEqual(
             strip_margin("""|ERROR: 404 Not Found
                             |"""),
             self.output(stderr))
 
+    def test_failure_retries_exhausted(self):
+        http_method = self.raise_connection_error('test reason', self.default_url)
+        sleep = MagicMock()
+        stdout = MagicMock()
+        stderr = MagicMock()
+
+        with patch('conductr_cli.conduct_http.post', http_method), patch('sys.stdout', stdout), patch('sys.stderr', stderr), \
+                patch('conductr_cli.conduct_load.sleep', sleep):
+            args = self.default_args.copy()
+            args.update({'retries': 2})
+            conduct_load.load(MagicMock(**args))
+
+        self.assertEqual(http_method.call_count, 3)
+        self.assertEqual(sleep.call_count, 2)
+        self.assertEqual(self.output(stdout).count('Upload failed: test reason.'), 2)
+        self.assertEqual(
+            self.default_connection_error.format(self.default_url),
+            self.output(stderr))
+
+    def test_failure_not_retried(self):
+        http_method = self.respond_with(404)
+        stderr = MagicMock()
+
+        with patch('conductr_cli.conduct_http.post', http_method), patch('sys.stderr', stderr):
+            args = self.default_args.copy()
+            args.update({'retries': 3})
+            conduct_load.load(MagicMock(**args))
+
+        self.assertEqual(http_method.call_count, 1)
+        self.assertEqual(
+            strip_margin("""|ERROR: 404 Not Found
+                            |"""),
+            self.output(stderr))
+
     def test_failure_invalid_address(self):
-        urlretrieve_mock = MagicMock(return_value=(self.bundle_file, ()))
         http_method = self.raise_connection_error('test reason', self.default_url)
         stderr = MagicMock()
-        open_mock = MagicMock(return_value=1)
 
-        with patch('conductr_cli.conduct_load.urlretrieve', urlretrieve_mock), \
-                patch('requests.post', http_method), \
-                patch('sys.stderr', stderr), \
-                patch('builtins.open', open_mock):
+        with patch('conductr_cli.conduct_http.post', http_method), patch('sys.stderr', stderr):
             conduct_load.load(MagicMock(**self.default_args))
 
-        open_mock.assert_called_with(self.bundle_file, 'rb')
-        http_method.assert_called_with(self.default_url, files=self.default_files)
+        self.assert_load_request(http_method, self.default_files)
 
         self.assertEqual(
             self.default_connection_error.format(self.default_url),
@@ -291,30 +784,78 @@ class ConductLoadTestBase(CliTestCase):
         shutil.rmtree(tmpdir)
 
     def test_failure_no_bundle(self):
-        urlretrieve_mock = MagicMock(side_effect=URLError('no_such.bundle'))
         stderr = MagicMock()
 
-        with patch('conductr_cli.conduct_load.urlretrieve', urlretrieve_mock), patch('sys.stderr', stderr):
+        with patch('sys.stderr', stderr):
             args = self.default_args.copy()
             args.update({'bundle': 'no_such.bundle'})
             conduct_load.load(MagicMock(**args))
 
+        self.assertEqual(
+            strip_margin("""|ERROR: File not found: {}
+                            |""").format(os.path.join(os.getcwd(), 'no_such.bundle')),
+            self.output(stderr))
+
+    def test_failure_no_remote_bundle(self):
+        tmpdir = tempfile.mkdtemp()
+        urlopen_mock = MagicMock(side_effect=URLError('no_such.bundle'))
+        stderr = MagicMock()
+
+        with patch('conductr_cli.download_cache.cache_dir', tmpdir), \
+                patch('conductr_cli.download_cache.urlopen', urlopen_mock), \
+                patch('sys.stderr', stderr):
+            args = self.default_args.copy()
+            args.update({'bundle': 'http://site.com/no_such.bundle'})
+            conduct_load.load(MagicMock(**args))
+
         self.assertEqual(
             strip_margin("""|ERROR: File not found: no_such.bundle
                             |"""),
             self.output(stderr))
 
-    def test_failure_no_configuration(self):
-        urlretrieve_mock = MagicMock(side_effect=[(self.bundle_file, ()), URLError('no_such.conf')])
+        shutil.rmtree(tmpdir)
 
+    def test_failure_no_bundle_and_no_configuration(self):
         stderr = MagicMock()
 
-        with patch('conductr_cli.conduct_load.urlretrieve', urlretrieve_mock), patch('sys.stderr', stderr):
+        with patch('sys.stderr', stderr):
             args = self.default_args.copy()
-            args.update({'configuration': 'no_such.conf'})
+            args.update({'bundle': 'no_such.bundle', 'configuration': 'no_such.conf'})
             conduct_load.load(MagicMock(**args))
 
         self.assertEqual(
-            strip_margin("""|ERROR: File not found: no_such.conf
+            strip_margin("""|ERROR: File not found: {}
+                            |""").format(os.path.join(os.getcwd(), 'no_such.bundle')),
+            self.output(stderr))
+
+    def test_failure_bad_configuration(self):
+        tmpdir = tempfile.mkdtemp()
+        config_file = os.path.join(tmpdir, 'config.zip')
+        with open(config_file, 'w') as f:
+            f.write('not a zip')
+        stderr = MagicMock()
+
+        with patch('sys.stderr', stderr):
+            args = self.default_args.copy()
+            args.update({'configuration': config_file})
+            conduct_load.load(MagicMock(**args))
+
+        self.assertEqual(
+            strip_margin("""|ERROR: Problem with the bundle: File is not a zip file
                             |"""),
             self.output(stderr))
+
+        shutil.rmtree(tmpdir)
+
+    def test_failure_no_configuration(self):
+        stderr = MagicMock()
+
+        with patch('sys.stderr', stderr):
+            args = self.default_args.copy()
+            args.update({'configuration': 'no_such.conf'})
+            conduct_load.load(MagicMock(**args))
+
+        self.assertEqual(
+            strip_margin("""|ERROR: File not found: {}
+                            |""").format(os.path.join(os.getcwd(), 'no_such.conf')),
+            self.output(stderr))
@@ -1,7 +1,10 @@
 from unittest import TestCase
 from conductr_cli import bundle_utils
-from conductr_cli.test.cli_test_case import create_temp_bundle
+from conductr_cli.test.cli_test_case import create_temp_bundle, create_temp_bundle_with_contents
+from zipfile import BadZipFile, ZipFile
+import io
 import shutil
+import tempfile
 
 
 class ShortId(TestCase):
@@ -25,5 +28,60 @@ class Conf(TestCase):
         conf_contents = bundle_utils.conf(self.bundle_path)
         self.assertEqual(conf_contents, 'bundle conf contents')
 
+    def test_file_position_restored(self):
+        with open(self.bundle_path, 'rb') as bundle_file:
+            bundle_file.seek(10)
+            self.assertEqual(bundle_utils.conf(bundle_file), 'bundle conf contents')
+            self.assertEqual(bundle_file.tell(), 10)
+
+    def test_nested_bundle_conf_ignored(self):
+        tmpdir, bundle_path = create_temp_bundle_with_contents({'bundle.conf': 'top level'})
+        with ZipFile(bundle_path, 'a') as bundle_zip:
+            bundle_zip.writestr('bundle-1.0.0/lib/bundle.conf', 'nested')
+            bundle_zip.writestr('bundle-1.0.0/other-bundle.conf', 'other')
+
+        self.assertEqual(bundle_utils.conf(bundle_path), 'top level')
+        shutil.rmtree(tmpdir)
+
+    def test_archive_root(self):
+        bundle_file = io.BytesIO()
+        with ZipFile(bundle_file, 'w') as bundle_zip:
+            bundle_zip.writestr('bundle.conf', 'archive root')
+
+        self.assertEqual(bundle_utils.conf(bundle_file), 'archive root')
+
+    def test_no_bundle_conf(self):
+        tmpdir, bundle_path = create_temp_bundle_with_contents({'config.sh': 'echo configuring'})
+
+        self.assertEqual(bundle_utils.conf(bundle_path), '')
+        shutil.rmtree(tmpdir)
+
+    def test_several_bundle_confs(self):
+        bundle_file = io.BytesIO()
+        with ZipFile(bundle_file, 'w') as bundle_zip:
+            bundle_zip.writestr('first/bundle.conf', 'first')
+            bundle_zip.writestr('second/bundle.conf', 'second')
+
+        with self.assertRaisesRegex(BadZipFile, 'first/bundle.conf, second/bundle.conf'):
+            bundle_utils.conf(bundle_file)
+
     def tearDown(self):  # noqa
         shutil.rmtree(self.tmpdir)
+
+
+class FileDigest(TestCase):
+
+    digest = '1be7aaf1938cc19af7d2fdeb48a11c381dff8a98d4c4b47b3b0a5044a5255c04'
+
+    def test_path(self):
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(b'test file data')
+            f.flush()
+            self.assertEqual(bundle_utils.file_digest(f.name), self.digest)
+
+    def test_file_position_restored(self):
+        file = io.BytesIO(b'header test file data')
+        file.seek(len('header '))
+
+        self.assertEqual(bundle_utils.file_digest(file), self.digest)
+        self.assertEqual(file.tell(), len('header '))
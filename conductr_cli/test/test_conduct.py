@@ -1,6 +1,16 @@
-from unittest import TestCase
-from conductr_cli.conduct import build_parser, get_cli_parameters
+from unittest import TestCase, skipUnless
+from conductr_cli.conduct import build_parser, get_cli_parameters, run
 from argparse import Namespace
+import conductr_cli
+import os
+import subprocess
+import sys
+import tempfile
+
+try:
+    from unittest.mock import patch  # 3.3 and beyond
+except ImportError:
+    from mock import patch
 
 
 class TestConduct(TestCase):
@@ -31,6 +41,32 @@ class TestConduct(TestCase):
         self.assertEqual(args.api_version, '1.0')
         self.assertEqual(args.verbose, False)
         self.assertEqual(args.long_ids, False)
+        self.assertEqual(args.hedge, False)
+        self.assertEqual(args.timeout, None)
+        self.assertEqual(args.deadline, None)
+
+    def test_parser_info_members(self):
+        args = self.parser.parse_args('info --ip 10.0.0.1,10.0.0.2 --hedge'.split())
+
+        self.assertEqual(args.func.__name__, 'info')
+        self.assertEqual(args.ip, '10.0.0.1,10.0.0.2')
+        self.assertEqual(args.hedge, True)
+
+    def test_parser_timeouts(self):
+        args = self.parser.parse_args('logs --timeout 2,30 --deadline 60 my-bundle'.split())
+
+        self.assertEqual(args.timeout, (2.0, 30.0))
+        self.assertEqual(args.deadline, 60.0)
+
+        args = self.parser.parse_args('stop --timeout 5 my-bundle'.split())
+
+        self.assertEqual(args.timeout, (5.0, 5.0))
+
+    def test_parser_invalid_timeouts(self):
+        for timeout in ['0', '-1', '2,30,60', 'soon']:
+            with open(os.devnull, 'w') as stderr:
+                with patch('sys.stderr', stderr), self.assertRaises(SystemExit):
+                    self.parser.parse_args(['info', '--timeout', timeout])
 
     def test_parser_services(self):
         args = self.parser.parse_args('services'.split())
@@ -53,6 +89,53 @@ class TestConduct(TestCase):
         self.assertEqual(args.long_ids, False)
         self.assertEqual(args.bundle, 'path-to-bundle')
         self.assertEqual(args.configuration, 'path-to-conf')
+        self.assertEqual(args.skip_if_loaded, False)
+        self.assertEqual(args.bundles, None)
+        self.assertEqual(args.manifest, None)
+        self.assertEqual(args.jobs, 4)
+        self.assertEqual(args.limit_rate, None)
+        self.assertEqual(args.retries, 0)
+
+    def test_parser_load_skip_if_loaded(self):
+        args = self.parser.parse_args('load --skip-if-loaded path-to-bundle'.split())
+
+        self.assertEqual(args.func.__name__, 'load')
+        self.assertEqual(args.bundle, 'path-to-bundle')
+        self.assertEqual(args.configuration, None)
+        self.assertEqual(args.skip_if_loaded, True)
+
+    def test_parser_load_several(self):
+        args = self.parser.parse_args('load --bundle b1 c1 --bundle b2 --manifest bundles.txt -j 8'.split())
+
+        self.assertEqual(args.func.__name__, 'load')
+        self.assertEqual(args.bundle, None)
+        self.assertEqual(args.bundles, [['b1', 'c1'], ['b2']])
+        self.assertEqual(args.manifest, 'bundles.txt')
+        self.assertEqual(args.jobs, 8)
+
+    def test_parser_load_limit_rate(self):
+        args = self.parser.parse_args('load --limit-rate 2M path-to-bundle'.split())
+
+        self.assertEqual(args.limit_rate, 2 * 1024 * 1024)
+
+    def test_parser_load_retries(self):
+        args = self.parser.parse_args('load --retries 3 path-to-bundle'.split())
+
+        self.assertEqual(args.retries, 3)
+
+    def test_parser_load_invalid_jobs(self):
+        for jobs in ['0', '-1', 'all']:
+            with open(os.devnull, 'w') as stderr:
+                with patch('sys.stderr', stderr), self.assertRaises(SystemExit) as exit:
+                    self.parser.parse_args(['load', '--jobs', jobs, 'path-to-bundle'])
+            self.assertEqual(exit.exception.code, 2)
+
+    def test_load_no_bundle(self):
+        with open(os.devnull, 'w') as stderr:
+            with patch('sys.stderr', stderr), self.assertRaises(SystemExit) as exit:
+                run(['load'])
+
+        self.assertEqual(exit.exception.code, 2)
 
     def test_parser_run(self):
         args = self.parser.parse_args('run --scale 5 path-to-bundle'.split())
@@ -103,3 +186,49 @@ class TestConduct(TestCase):
 
         args = Namespace(ip='127.0.1.1', port=9006, api_version='1.1')
         self.assertEqual(get_cli_parameters(args), ' --ip 127.0.1.1 --port 9006 --api-version 1.1')
+
+
+@skipUnless(sys.version_info >= (3, 7), 'Requires -X importtime')
+class TestConductStartup(TestCase):
+    """Runs `conduct` in a new interpreter with `-X importtime`, checking what is imported and how long it takes"""
+
+    # The import time budgets in microseconds, which are several times the actual import times
+    parse_budget = 100000
+    completion_budget = 150000
+
+    # The modules that only the commands sending requests or loading bundles need
+    command_modules = ['requests', 'urllib3', 'pyhocon', 'arrow']
+
+    def import_times(self, code, env=None):
+        """Returns the cumulative import time of every module imported by running the given code"""
+
+        package_dir = os.path.dirname(os.path.dirname(os.path.abspath(conductr_cli.__file__)))
+        process = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                                 env=dict(os.environ, PYTHONPATH=package_dir, **(env or {})),
+                                 stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+        times = {}
+        for line in process.stderr.splitlines():
+            if line.startswith('import time:') and not line.endswith('imported package'):
+                self_time, cumulative_time, name = line[len('import time:'):].split('|')
+                times[name.strip()] = int(cumulative_time)
+        return times
+
+    def test_parse(self):
+        times = self.import_times("from conductr_cli import conduct; conduct.build_parser().parse_args(['info'])")
+
+        self.assertEqual([module for module in self.command_modules if module in times], [])
+        self.assertLess(times['conductr_cli.conduct'], self.parse_budget)
+
+    def test_completion(self):
+        with tempfile.NamedTemporaryFile('r') as completions:
+            times = self.import_times('from conductr_cli import conduct; conduct.run()', {
+                '_ARGCOMPLETE': '1',
+                '_ARGCOMPLETE_STDOUT_FILENAME': completions.name,
+                '_ARGCOMPLETE_IFS': ' ',
+                'COMP_LINE': 'conduct lo',
+                'COMP_POINT': '10'
+            })
+            self.assertEqual(completions.read(), 'load logs')
+
+        self.assertEqual([module for module in self.command_modules if module in times], [])
+        self.assertLess(times['conductr_cli.conduct'] + times['argcomplete'], self.completion_budget)
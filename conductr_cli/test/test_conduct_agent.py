@@ -0,0 +1,248 @@
+from unittest import TestCase, skipUnless
+from conductr_cli import conduct_agent, conduct_context, conduct_http
+from conductr_cli.test.test_conduct_http import CountingHandler, CountingServer
+import conductr_cli
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+try:
+    from unittest.mock import patch, MagicMock  # 3.3 and beyond
+except ImportError:
+    from mock import patch, MagicMock
+
+
+@skipUnless(hasattr(socket, 'AF_UNIX') and hasattr(socket.socket, 'sendmsg'), 'Requires Unix sockets')
+class TestConductAgent(TestCase):
+
+    def setUp(self):  # noqa
+        self.tmpdir = tempfile.mkdtemp()
+        self.socket_path_patch = patch('conductr_cli.conduct_agent.socket_path', os.path.join(self.tmpdir, 'agent.sock'))
+        self.socket_path_patch.start()
+        self.server = None
+        self.conductr = None
+        self.standard_streams = conduct_context.standard_streams()
+        self.standard_streams.__enter__()
+
+    def tearDown(self):  # noqa
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        if self.conductr is not None:
+            self.conductr.shutdown()
+            self.conductr.server_close()
+        conduct_http.close()
+        self.standard_streams.__exit__(None, None, None)
+        self.socket_path_patch.stop()
+        shutil.rmtree(self.tmpdir)
+
+    def start_agent(self, agent_environment=None):
+        self.server = conduct_agent.create_server(
+            conduct_agent.environment() if agent_environment is None else agent_environment)
+        threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+
+    def start_conductr(self, handler=CountingHandler):
+        """Starts a stand-in ConductR, responding with an empty JSON list, and returns its port"""
+
+        self.conductr = CountingServer(('127.0.0.1', 0), handler)
+        self.conductr.connections = []
+        self.conductr.delay = 0
+        threading.Thread(target=self.conductr.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+        return self.conductr.server_address[1]
+
+    def start_client(self, argv, output, cwd=None):
+        """
+        Starts a client in a process of its own, as it runs on the command line, with the given file as output.
+        The agent must have been started with `client_environment`.
+        """
+
+        package_dir = os.path.dirname(os.path.dirname(conductr_cli.__file__))
+        return subprocess.Popen(
+            [sys.executable, '-c', 'from conductr_cli import conduct_agent; conduct_agent.run()'] + argv,
+            cwd=cwd or package_dir, env=dict(os.environ, PYTHONPATH=package_dir, **self.client_environment()),
+            stdin=subprocess.DEVNULL, stdout=output, stderr=output)
+
+    def client_environment(self):
+        return dict(conduct_agent.environment(), CONDUCTR_AGENT_SOCKET=conduct_agent.socket_path)
+
+    def wait_for_client(self, client, output):
+        """Returns the exit status and the output of the given client"""
+
+        try:
+            status = client.wait(10)
+        finally:
+            client.kill()
+            client.wait()
+        output.seek(0)
+        return status, output.read()
+
+    def forward(self, argv):
+        """Forwards a command with files as standard streams, returning the status, the output and the error output"""
+
+        with open(os.devnull, 'r') as stdin, tempfile.TemporaryFile('w+') as stdout, \
+                tempfile.TemporaryFile('w+') as stderr:
+            with patch('sys.stdin', stdin), patch('sys.stdout', stdout), patch('sys.stderr', stderr):
+                status = conduct_agent.forward(argv)
+            stdout.seek(0)
+            stderr.seek(0)
+            return status, stdout.read(), stderr.read()
+
+    def test_forward(self):
+        self.start_agent()
+
+        status, output, error_output = self.forward(['version'])
+
+        self.assertEqual(status, 0)
+        self.assertIn('Supported API version(s): 1.0, 1.1', output)
+        self.assertEqual(error_output, '')
+
+    def test_forward_exit_status(self):
+        self.start_agent()
+
+        status, output, error_output = self.forward(['no-such-command'])
+
+        self.assertEqual(status, 2)
+        self.assertIn("invalid choice: 'no-such-command'", error_output)
+
+    def test_forward_cwd(self):
+        self.start_agent(self.client_environment())
+        command_cwd = os.path.realpath(self.tmpdir)
+
+        with tempfile.TemporaryFile('w+') as output:
+            status, client_output = self.wait_for_client(
+                self.start_client(['load', 'no_such.bundle'], output, command_cwd), output)
+
+        self.assertEqual(status, 0)
+        self.assertIn('ERROR: File not found: {}\n'.format(os.path.join(command_cwd, 'no_such.bundle')), client_output)
+
+    def test_forward_concurrent(self):
+        barrier = threading.Barrier(2, timeout=10)
+
+        class BarrierHandler(CountingHandler):
+            def do_GET(self):  # noqa
+                # Only responds once both commands are waiting for a response
+                barrier.wait()
+                super().do_GET()
+
+        port = self.start_conductr(BarrierHandler)
+        self.start_agent(self.client_environment())
+
+        with tempfile.TemporaryFile('w+') as first_output, tempfile.TemporaryFile('w+') as second_output:
+            argv = ['info', '--ip', '127.0.0.1', '--port', str(port)]
+            first_client = self.start_client(argv, first_output)
+            second_client = self.start_client(argv, second_output)
+            first_status, first_client_output = self.wait_for_client(first_client, first_output)
+            second_status, second_client_output = self.wait_for_client(second_client, second_output)
+
+        self.assertEqual(first_status, 0)
+        self.assertEqual(second_status, 0)
+        self.assertEqual(first_client_output, 'ID  NAME  #REP  #STR  #RUN\n')
+        self.assertEqual(second_client_output, 'ID  NAME  #REP  #STR  #RUN\n')
+
+    def test_forward_shares_connections(self):
+        port = self.start_conductr()
+        self.start_agent()
+
+        for _ in range(2):
+            status, output, error_output = self.forward(['info', '--ip', '127.0.0.1', '--port', str(port)])
+            self.assertEqual(status, 0)
+
+        # The agent sent both requests over the connection it kept alive
+        self.assertEqual(len(self.conductr.connections), 2)
+        self.assertEqual(len(set(self.conductr.connections)), 1)
+
+    def test_forward_interrupted(self):
+        self.start_agent(self.client_environment())
+
+        with socket.socket() as conductr, tempfile.TemporaryFile('w+') as output:
+            # ConductR accepts the connection, but never responds
+            conductr.bind(('127.0.0.1', 0))
+            conductr.listen(1)
+            client = self.start_client(['info', '--ip', '127.0.0.1', '--port', str(conductr.getsockname()[1])], output)
+            try:
+                deadline = time.monotonic() + 10
+                while not self.server.commands:
+                    self.assertLess(time.monotonic(), deadline, 'The command was not forwarded')
+                    time.sleep(0.05)
+
+                client.send_signal(signal.SIGINT)
+                self.assertEqual(client.wait(10), 130)
+            finally:
+                client.kill()
+                client.wait()
+
+            # The client going away cancels the command, which fails once ConductR goes away too
+            command, = self.server.commands
+            self.assertTrue(command.cancelled)
+            conductr.close()
+            deadline = time.monotonic() + 10
+            while self.server.commands:
+                self.assertLess(time.monotonic(), deadline, 'The command did not stop')
+                time.sleep(0.05)
+
+            # Nothing the command wrote once cancelled reached the client
+            output.seek(0)
+            self.assertEqual(output.read(), '')
+
+    def test_forward_other_user(self):
+        self.start_agent()
+
+        with patch('conductr_cli.conduct_agent.peer_uid', MagicMock(return_value=os.getuid() + 1)):
+            self.assertIsNone(self.forward(['version'])[0])
+
+    def test_peer_uid(self):
+        first, second = socket.socketpair()
+        with first, second:
+            self.assertTrue(conduct_agent.is_own(first))
+
+    def test_agent_socket_directory(self):
+        server = MagicMock()
+        server.serve_forever.side_effect = KeyboardInterrupt
+        socket_path = os.path.join(self.tmpdir, 'conductr', 'agent.sock')
+
+        with patch('conductr_cli.conduct_agent.socket_path', socket_path), \
+                patch('conductr_cli.conduct_agent.create_server', MagicMock(return_value=server)), \
+                patch('signal.signal'), patch('sys.stdout', MagicMock()):
+            conduct_agent.agent(MagicMock())
+
+        self.assertEqual(os.stat(os.path.dirname(socket_path)).st_mode & 0o777, 0o700)
+        server.server_close.assert_called_with()
+
+    def test_forward_other_environment(self):
+        self.start_agent({'CONDUCTR_IP': '10.0.0.1'})
+
+        self.assertIsNone(self.forward(['version'])[0])
+
+    def test_forward_no_agent(self):
+        self.assertIsNone(self.forward(['version'])[0])
+
+    def test_forward_agent_command(self):
+        self.start_agent()
+
+        self.assertIsNone(self.forward(['agent'])[0])
+
+    def test_run_in_process(self):
+        run = MagicMock()
+
+        with patch('conductr_cli.conduct_agent.forward', MagicMock(return_value=None)), \
+                patch('conductr_cli.conduct.run', run):
+            conduct_agent.run()
+
+        run.assert_called_with()
+
+    def test_run_forwarded(self):
+        run = MagicMock()
+
+        with patch('conductr_cli.conduct_agent.forward', MagicMock(return_value=3)), \
+                patch('conductr_cli.conduct.run', run):
+            with self.assertRaises(SystemExit) as exit:
+                conduct_agent.run()
+
+        self.assertEqual(exit.exception.code, 3)
+        run.assert_not_called()
@@ -0,0 +1,56 @@
+from unittest import TestCase
+from conductr_cli import conduct_context
+from io import StringIO
+import os
+import sys
+import threading
+
+
+class TestConductContext(TestCase):
+
+    def setUp(self):  # noqa
+        self.stdout = StringIO()
+        self.command = conduct_context.Command(StringIO(), self.stdout, StringIO(), '/command/cwd')
+
+    def test_path(self):
+        with conduct_context.running(self.command):
+            self.assertEqual(conduct_context.path('bundle.zip'), '/command/cwd/bundle.zip')
+            self.assertEqual(conduct_context.path('/bundle.zip'), '/bundle.zip')
+
+        self.assertEqual(conduct_context.path('bundle.zip'), os.path.join(os.getcwd(), 'bundle.zip'))
+
+    def test_standard_streams(self):
+        default_stdout = StringIO()
+        saved_stdout, sys.stdout = sys.stdout, default_stdout
+        try:
+            with conduct_context.standard_streams():
+                with conduct_context.running(self.command):
+                    print('command output')
+                print('agent output')
+        finally:
+            sys.stdout = saved_stdout
+
+        self.assertEqual(self.stdout.getvalue(), 'command output\n')
+        self.assertEqual(default_stdout.getvalue(), 'agent output\n')
+
+    def test_propagated(self):
+        cwds = []
+
+        with conduct_context.running(self.command):
+            thread = threading.Thread(target=conduct_context.propagated(lambda: cwds.append(conduct_context.cwd())))
+        thread.start()
+        thread.join()
+
+        self.assertEqual(cwds, ['/command/cwd'])
+
+    def test_cancel(self):
+        with conduct_context.running(self.command):
+            conduct_context.check_cancelled()
+            self.command.cancel()
+            self.command.stdout.write('discarded')
+            with self.assertRaises(KeyboardInterrupt):
+                conduct_context.check_cancelled()
+
+        self.assertEqual(self.stdout.getvalue(), '')
+        # Only the cancelled command is interrupted
+        conduct_context.check_cancelled()
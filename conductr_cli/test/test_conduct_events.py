@@ -12,6 +12,9 @@ class TestConductEventsCommand(TestCase, CliTestCase):
 
     default_args = {
         'ip': '127.0.0.1',
+        'timeout': None,
+        'deadline': None,
+        'hedge': False,
         'port': '9005',
         'api_version': '1.0',
         'bundle': 'ab8f513',
@@ -26,10 +29,10 @@ class TestConductEventsCommand(TestCase, CliTestCase):
         http_method = self.respond_with(text='{}')
         stdout = MagicMock()
 
-        with patch('requests.get', http_method), patch('sys.stdout', stdout):
+        with patch('conductr_cli.conduct_http.get', http_method), patch('sys.stdout', stdout):
             conduct_events.events(MagicMock(**self.default_args))
 
-        http_method.assert_called_with(self.default_url)
+        http_method.assert_called_with(self.default_url, hedge=False)
         self.assertEqual(
             strip_margin("""|TIME  EVENT  DESC
                             |"""),
@@ -50,10 +53,10 @@ class TestConductEventsCommand(TestCase, CliTestCase):
         ]""")
         stdout = MagicMock()
 
-        with patch('requests.get', http_method), patch('sys.stdout', stdout):
+        with patch('conductr_cli.conduct_http.get', http_method), patch('sys.stdout', stdout):
             conduct_events.events(MagicMock(**self.default_args))
 
-        http_method.assert_called_with(self.default_url)
+        http_method.assert_called_with(self.default_url, hedge=False)
         self.assertEqual(
             strip_margin("""|TIME                  EVENT                                       DESC
                             |2015-08-24T01:16:22Z  conductr.loadScheduler.loadBundleRequested  Load bundle requested: requestId=cba938cd-860e-41a4-9cbe-2c677feaca20, bundleName=visualizer
@@ -65,10 +68,10 @@ class TestConductEventsCommand(TestCase, CliTestCase):
         http_method = self.raise_connection_error('test reason', self.default_url)
         stderr = MagicMock()
 
-        with patch('requests.get', http_method), patch('sys.stderr', stderr):
+        with patch('conductr_cli.conduct_http.get', http_method), patch('sys.stderr', stderr):
             conduct_events.events(MagicMock(**self.default_args))
 
-        http_method.assert_called_with(self.default_url)
+        http_method.assert_called_with(self.default_url, hedge=False)
         self.assertEqual(
             self.default_connection_error.format(self.default_url),
             self.output(stderr))
@@ -0,0 +1,216 @@
+from unittest import TestCase
+from conductr_cli import conduct_http, conduct_members
+from conductr_cli.test.test_conduct_members import refused_port
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from requests.exceptions import ConnectionError, ReadTimeout, Timeout
+import threading
+import time
+
+try:
+    from unittest.mock import patch, MagicMock  # 3.3 and beyond
+except ImportError:
+    from mock import patch, MagicMock
+
+
+class CountingHandler(BaseHTTPRequestHandler):
+    """Responds with an empty JSON list over keep-alive connections, recording the connection of each request"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):  # noqa
+        self.server.connections.append(self.client_address)
+        time.sleep(self.server.delay)
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'[]')
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CountingServer(ThreadingMixIn, HTTPServer):
+    """Handles each connection in a thread, which is left to the client to close when the server shuts down"""
+
+    daemon_threads = True
+    block_on_close = False
+
+
+class TestConductHttp(TestCase):
+
+    def setUp(self):  # noqa
+        conduct_http.close()
+        self.state_patches = [patch.dict(state, clear=True) for state in
+                              [conduct_members.clusters, conduct_members.latencies,
+                               conduct_members.connect_latencies, conduct_members.failures]]
+        for state_patch in self.state_patches:
+            state_patch.start()
+        self.servers = []
+
+    def tearDown(self):  # noqa
+        conduct_http.close()
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+        for state_patch in self.state_patches:
+            state_patch.stop()
+
+    def start_server(self, delay=0.0):
+        server = CountingServer(('127.0.0.1', 0), CountingHandler)
+        server.connections, server.delay = [], delay
+        threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+        self.servers.append(server)
+        return server
+
+    def cluster(self, *ports):
+        members = tuple(('127.0.0.1', port) for port in ports)
+        conduct_members.clusters.update({member: members for member in members})
+
+    def test_session_shared(self):
+        self.assertIs(conduct_http.session(), conduct_http.session())
+
+    def test_close(self):
+        session = conduct_http.session()
+        conduct_http.close()
+        self.assertIsNot(conduct_http.session(), session)
+
+    def test_timeout(self):
+        session = MagicMock()
+
+        with patch('conductr_cli.conduct_http.session', MagicMock(return_value=session)):
+            conduct_http.put('http://127.0.0.1:9005/bundles/45e0c47?scale=3')
+            conduct_http.get('http://127.0.0.1:9005/bundles', timeout=1)
+
+        session.request.assert_any_call('PUT', 'http://127.0.0.1:9005/bundles/45e0c47?scale=3',
+                                        timeout=(conduct_http.connect_timeout, conduct_http.read_timeout))
+        session.request.assert_any_call('GET', 'http://127.0.0.1:9005/bundles', timeout=1)
+
+    def test_request_timeouts(self):
+        self.assertEqual(conduct_http.request_timeouts(), (conduct_http.connect_timeout, conduct_http.read_timeout))
+
+        with conduct_http.timeouts((2.0, 30.0), None):
+            self.assertEqual(conduct_http.request_timeouts(), (2.0, 30.0))
+
+        with conduct_http.timeouts(None, 5.0):
+            connect, read = conduct_http.request_timeouts()
+            self.assertLessEqual(connect, 5.0)
+            self.assertEqual(read, connect)
+
+        with conduct_http.timeouts((2.0, 30.0), 5.0):
+            connect, read = conduct_http.request_timeouts()
+            self.assertEqual(connect, 2.0)
+            self.assertLessEqual(read, 5.0)
+
+        self.assertIsNone(conduct_http.time_left())
+
+    def test_deadline_passed(self):
+        session = MagicMock()
+
+        with patch('conductr_cli.conduct_http.session', MagicMock(return_value=session)), \
+                conduct_http.timeouts(None, 0.0):
+            with self.assertRaises(Timeout):
+                conduct_http.get('http://127.0.0.1:9005/bundles')
+
+        session.request.assert_not_called()
+
+    def test_deadline_shared(self):
+        server = self.start_server(delay=1.0)
+
+        start = time.monotonic()
+        with conduct_http.timeouts(None, 0.2):
+            with self.assertRaises(ReadTimeout):
+                conduct_http.get('http://127.0.0.1:{}/bundles'.format(server.server_port))
+
+        self.assertLess(time.monotonic() - start, 0.9)
+
+    def test_grow_pool(self):
+        with patch('conductr_cli.conduct_http.pool_size', 4):
+            adapter = conduct_http.session().get_adapter('http://127.0.0.1:9005')
+            conduct_http.grow_pool(2)
+            self.assertIs(conduct_http.session().get_adapter('http://127.0.0.1:9005'), adapter)
+
+            conduct_http.grow_pool(8)
+            grown_adapter = conduct_http.session().get_adapter('http://127.0.0.1:9005')
+            self.assertIsNot(grown_adapter, adapter)
+            self.assertEqual(grown_adapter._pool_maxsize, 8)
+
+    def test_connection_reused(self):
+        server = self.start_server()
+
+        url = 'http://127.0.0.1:{}/bundles'.format(server.server_port)
+        for _ in range(3):
+            self.assertEqual(conduct_http.get(url).text, '[]')
+        conduct_http.close()
+
+        self.assertEqual(len(server.connections), 3)
+        self.assertEqual(len(set(server.connections)), 1)
+
+    def test_failover(self):
+        server = self.start_server()
+        dead_port = refused_port()
+        self.cluster(dead_port, server.server_port)
+
+        response = conduct_http.get('http://127.0.0.1:{}/bundles'.format(dead_port))
+
+        self.assertEqual(response.text, '[]')
+        self.assertEqual(len(server.connections), 1)
+        self.assertTrue(conduct_members.has_failed(('127.0.0.1', dead_port)))
+        self.assertIn(('127.0.0.1', server.server_port), conduct_members.latencies)
+
+    def test_upload_time_not_recorded(self):
+        member = ('127.0.0.1', refused_port())
+        self.cluster(member[1])
+        conduct_members.failed(member)
+        response = MagicMock()
+        response.elapsed.total_seconds.return_value = 30.0
+        session = MagicMock()
+        session.request.return_value = response
+
+        with patch('conductr_cli.conduct_http.session', MagicMock(return_value=session)):
+            conduct_http.post('http://127.0.0.1:{}/bundles'.format(member[1]), data=b'bundle')
+
+        self.assertFalse(conduct_members.has_failed(member))
+        self.assertNotIn(member, conduct_members.latencies)
+
+    def test_failover_exhausted(self):
+        ports = [refused_port(), refused_port()]
+        self.cluster(*ports)
+
+        with self.assertRaises(ConnectionError):
+            conduct_http.get('http://127.0.0.1:{}/bundles'.format(ports[0]))
+
+        self.assertTrue(all(conduct_members.has_failed(('127.0.0.1', port)) for port in ports))
+
+    def test_no_failover_with_body(self):
+        server = self.start_server()
+        dead_port = refused_port()
+        self.cluster(dead_port, server.server_port)
+
+        with self.assertRaises(ConnectionError):
+            conduct_http.post('http://127.0.0.1:{}/bundles'.format(dead_port), data=b'bundle')
+
+        self.assertEqual(server.connections, [])
+
+    def test_hedged(self):
+        slow_server, fast_server = self.start_server(delay=1.0), self.start_server()
+        self.cluster(slow_server.server_port, fast_server.server_port)
+        conduct_members.latencies[('127.0.0.1', slow_server.server_port)] = 0.01
+
+        start = time.monotonic()
+        response = conduct_http.get('http://127.0.0.1:{}/bundles'.format(slow_server.server_port), hedge=True)
+
+        self.assertEqual(response.text, '[]')
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(len(slow_server.connections), 1)
+        self.assertEqual(len(fast_server.connections), 1)
+
+    def test_hedged_fast(self):
+        server, other_server = self.start_server(), self.start_server()
+        self.cluster(server.server_port, other_server.server_port)
+        conduct_members.latencies[('127.0.0.1', server.server_port)] = 0.5
+
+        response = conduct_http.get('http://127.0.0.1:{}/bundles'.format(server.server_port), hedge=True)
+
+        self.assertEqual(response.text, '[]')
+        self.assertEqual(other_server.connections, [])
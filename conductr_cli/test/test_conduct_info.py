@@ -12,6 +12,9 @@ class TestConductInfoCommand(TestCase, CliTestCase):
 
     default_args = {
         'ip': '127.0.0.1',
+        'timeout': None,
+        'deadline': None,
+        'hedge': False,
         'port': 9005,
         'api_version': '1.0',
         'verbose': False,
@@ -24,10 +27,10 @@ class TestConductInfoCommand(TestCase, CliTestCase):
         http_method = self.respond_with(text='[]')
         stdout = MagicMock()
 
-        with patch('requests.get', http_method), patch('sys.stdout', stdout):
+        with patch('conductr_cli.conduct_http.get', http_method), patch('sys.stdout', stdout):
             conduct_info.info(MagicMock(**self.default_args))
 
-        http_method.assert_called_with(self.default_url)
+        http_method.assert_called_with(self.default_url, hedge=False)
         self.assertEqual(
             strip_margin("""|ID  NAME  #REP  #STR  #RUN
                             |"""),
@@ -44,10 +47,10 @@ class TestConductInfoCommand(TestCase, CliTestCase):
         ]""")
         stdout = MagicMock()
 
-        with patch('requests.get', http_method), patch('sys.stdout', stdout):
+        with patch('conductr_cli.conduct_http.get', http_method), patch('sys.stdout', stdout):
             conduct_info.info(MagicMock(**self.default_args))
 
-        http_method.assert_called_with(self.default_url)
+        http_method.assert_called_with(self.default_url, hedge=False)
         self.assertEqual(
             strip_margin("""|ID       NAME         #REP  #STR  #RUN
                             |45e0c47  test-bundle     1     0     0
@@ -77,10 +80,10 @@ class TestConductInfoCommand(TestCase, CliTestCase):
         ]""")
         stdout = MagicMock()
 
-        with patch('requests.get', http_method), patch('sys.stdout', stdout):
+        with patch('conductr_cli.conduct_http.get', http_method), patch('sys.stdout', stdout):
             conduct_info.info(MagicMock(**self.default_args))
 
-        http_method.assert_called_with(self.default_url)
+        http_method.assert_called_with(self.default_url, hedge=False)
         self.assertEqual(
             strip_margin("""|ID               NAME           #REP  #STR  #RUN
                             |45e0c47          test-bundle-1     1     0     1
@@ -106,12 +109,12 @@ class TestConductInfoCommand(TestCase, CliTestCase):
         ]""")
         stdout = MagicMock()
 
-        with patch('requests.get', http_method), patch('sys.stdout', stdout):
+        with patch('conductr_cli.conduct_http.get', http_method), patch('sys.stdout', stdout):
             args = self.default_args.copy()
             args.update({'verbose': True})
             conduct_info.info(MagicMock(**args))
 
-        http_method.assert_called_with(self.default_url)
+        http_method.assert_called_with(self.default_url, hedge=False)
         self.assertEqual(
             strip_margin("""|[
                             |  {
@@ -166,12 +169,12 @@ class TestConductInfoCommand(TestCase, CliTestCase):
         ]""")
         stdout = MagicMock()
 
-        with patch('requests.get', http_method), patch('sys.stdout', stdout):
+        with patch('conductr_cli.conduct_http.get', http_method), patch('sys.stdout', stdout):
             args = self.default_args.copy()
             args.update({'long_ids': True})
             conduct_info.info(MagicMock(**args))
 
-        http_method.assert_called_with(self.default_url)
+        http_method.assert_called_with(self.default_url, hedge=False)
         self.assertEqual(
             strip_margin("""|ID                                NAME         #REP  #STR  #RUN
                             |45e0c477d3e5ea92aa8d85c0d8f3e25c  test-bundle     1     0     0
@@ -189,10 +192,10 @@ class TestConductInfoCommand(TestCase, CliTestCase):
         ]""")
         stdout = MagicMock()
 
-        with patch('requests.get', http_method), patch('sys.stdout', stdout):
+        with patch('conductr_cli.conduct_http.get', http_method), patch('sys.stdout', stdout):
             conduct_info.info(MagicMock(**self.default_args))
 
-        http_method.assert_called_with(self.default_url)
+        http_method.assert_called_with(self.default_url, hedge=False)
         self.assertEqual(
             strip_margin("""|ID       NAME         #REP  #STR  #RUN
                             |45e0c47  test-bundle    10     0     0
@@ -211,10 +214,10 @@ class TestConductInfoCommand(TestCase, CliTestCase):
         ]""")
         stdout = MagicMock()
 
-        with patch('requests.get', http_method), patch('sys.stdout', stdout):
+        with patch('conductr_cli.conduct_http.get', http_method), patch('sys.stdout', stdout):
             conduct_info.info(MagicMock(**self.default_args))
 
-        http_method.assert_called_with(self.default_url)
+        http_method.assert_called_with(self.default_url, hedge=False)
         self.assertEqual(
             strip_margin("""|ID         NAME         #REP  #STR  #RUN
                             |! 45e0c47  test-bundle    10     0     0
@@ -226,10 +229,22 @@ class TestConductInfoCommand(TestCase, CliTestCase):
         http_method = self.raise_connection_error('test reason', self.default_url)
         stderr = MagicMock()
 
-        with patch('requests.get', http_method), patch('sys.stderr', stderr):
+        with patch('conductr_cli.conduct_http.get', http_method), patch('sys.stderr', stderr):
             conduct_info.info(MagicMock(**self.default_args))
 
-        http_method.assert_called_with(self.default_url)
+        http_method.assert_called_with(self.default_url, hedge=False)
         self.assertEqual(
             self.default_connection_error.format(self.default_url),
             self.output(stderr))
+
+    def test_failure_timeout(self):
+        http_method = self.raise_timeout('test reason', self.default_url)
+        stderr = MagicMock()
+
+        with patch('conductr_cli.conduct_http.get', http_method), patch('sys.stderr', stderr):
+            conduct_info.info(MagicMock(**self.default_args))
+
+        http_method.assert_called_with(self.default_url, hedge=False)
+        self.assertEqual(
+            self.default_timeout_error.format(self.default_url),
+            self.output(stderr))
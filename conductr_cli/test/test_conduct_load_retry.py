@@ -0,0 +1,139 @@
+from unittest import TestCase
+from conductr_cli import conduct_load
+from conductr_cli.test.cli_test_case import CliTestCase, create_temp_bundle_with_contents
+from argparse import Namespace
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import io
+import json
+import os
+import shutil
+import socket
+import struct
+import threading
+
+try:
+    from unittest.mock import patch, MagicMock  # 3.3 and beyond
+except ImportError:
+    from mock import patch, MagicMock
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    Stands in for ConductR, failing the first uploads of the server as told by its `failures`:
+    'reset' resets the connection half way through the body, any status code is responded after the whole body.
+    """
+
+    def do_POST(self):  # noqa
+        length = int(self.headers['Content-Length'])
+        failure = self.server.failures.pop(0) if self.server.failures else None
+        if failure == 'reset':
+            self.rfile.read(length // 2)
+            self.server.received.append(length // 2)
+            # Closing with a zero linger time resets the connection rather than closing it
+            self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+            self.close_connection = True
+            self.connection.close()
+            return
+
+        body = self.rfile.read(length)
+        self.server.received.append(len(body))
+        if failure is None:
+            self.server.bodies.append(body)
+            self.respond(200, json.dumps({'bundleId': '45e0c477d3e5ea92aa8d85c0d8f3e25c'}))
+        else:
+            self.respond(failure, '')
+
+    def respond(self, status_code, text):
+        self.send_response(status_code)
+        self.send_header('Content-Length', str(len(text)))
+        self.end_headers()
+        self.wfile.write(text.encode('utf-8'))
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestConductLoadRetry(TestCase, CliTestCase):
+
+    @classmethod
+    def setUpClass(cls):  # noqa
+        # Large enough not to be sent before the connection is reset
+        cls.tmpdir, cls.bundle_file = create_temp_bundle_with_contents({
+            'bundle.conf': 'nrOfCpus = 1.0\nmemory = 200\ndiskSpace = 100\nroles = [web]\nname = bundle\nsystem = bundle\n',
+            'data': os.urandom(1024 * 1024).hex()
+        })
+
+    @classmethod
+    def tearDownClass(cls):  # noqa
+        shutil.rmtree(cls.tmpdir)
+
+    def setUp(self):  # noqa
+        self.server = HTTPServer(('127.0.0.1', 0), StandInHandler)
+        self.server.failures, self.server.received, self.server.bodies = [], [], []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):  # noqa
+        self.server.shutdown()
+        self.server.server_close()
+
+    def load(self, retries, deadline=None):
+        args = Namespace(ip='127.0.0.1', port=self.server.server_port, api_version='1.0', verbose=True, long_ids=False,
+                         cli_parameters='', bundle=self.bundle_file, configuration=None, skip_if_loaded=False,
+                         bundles=None, manifest=None, jobs=1, limit_rate=None, retries=retries, timeout=None,
+                         deadline=deadline)
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with patch('sys.stdout', stdout), patch('sys.stderr', stderr), patch('conductr_cli.conduct_load.sleep', MagicMock()):
+            conduct_load.load(args)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def summary(self, output):
+        return json.loads([line for line in output.splitlines() if line.startswith('{"attempts"')][0])
+
+    def test_reset(self):
+        self.server.failures = ['reset', 'reset']
+
+        output, errors = self.load(retries=3)
+
+        self.assertEqual(errors, '')
+        self.assertEqual(output.count('Upload failed: '), 2)
+        self.assertIn('Bundle loaded.', output)
+        summary = self.summary(output)
+        self.assertEqual(summary['attempts'], 3)
+        # The last attempt sent the whole body, the failed ones at least what the server read
+        self.assertEqual(len(self.server.bodies), 1)
+        self.assertEqual(summary['bytes'], len(self.server.bodies[0]))
+        self.assertGreaterEqual(summary['resent_bytes'], sum(self.server.received[:2]))
+        self.assertTrue(self.server.bodies[0].endswith(b'--\r\n'))
+
+    def test_unavailable(self):
+        self.server.failures = [503]
+
+        output, errors = self.load(retries=1)
+
+        self.assertEqual(errors, '')
+        self.assertIn('Upload failed: 503 Service Unavailable. Retrying in ', output)
+        summary = self.summary(output)
+        self.assertEqual(summary['attempts'], 2)
+        self.assertEqual(summary['resent_bytes'], self.server.received[0])
+        self.assertEqual(self.server.received, [summary['bytes']] * 2)
+
+    def test_retries_exhausted(self):
+        self.server.failures = ['reset', 'reset']
+
+        output, errors = self.load(retries=1)
+
+        self.assertEqual(output.count('Upload failed: '), 1)
+        self.assertNotIn('Bundle loaded.', output)
+        self.assertIn('ERROR: Unable to contact ConductR.', errors)
+        self.assertEqual(self.server.bodies, [])
+
+    def test_deadline(self):
+        self.server.failures = [503]
+
+        with patch('conductr_cli.conduct_load.retry_delay', MagicMock(return_value=60.0)):
+            output, errors = self.load(retries=3, deadline=30.0)
+
+        # Waiting for the retry would take longer than the deadline allows
+        self.assertNotIn('Upload failed: ', output)
+        self.assertIn('ERROR: 503 Service Unavailable', errors)
+        self.assertEqual(len(self.server.received), 1)
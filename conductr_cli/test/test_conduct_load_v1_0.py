@@ -26,13 +26,21 @@ class TestConductLoadCommand(TestCase, ConductLoadTestBase, CliTestCase):
 
     default_args = {
         'ip': '127.0.0.1',
+        'timeout': None,
+        'deadline': None,
         'port': 9005,
         'api_version': '1.0',
         'verbose': False,
         'long_ids': False,
         'cli_parameters': '',
         'bundle': bundle_file,
-        'configuration': None
+        'configuration': None,
+        'skip_if_loaded': False,
+        'bundles': None,
+        'manifest': None,
+        'jobs': 4,
+        'limit_rate': None,
+        'retries': 0
     }
 
     default_url = 'http://127.0.0.1:9005/bundles'
@@ -44,7 +52,7 @@ class TestConductLoadCommand(TestCase, ConductLoadTestBase, CliTestCase):
         ('roles', ' '.join(roles)),
         ('bundleName', bundleName),
         ('system', system),
-        ('bundle', ('bundle.zip', 1))
+        ('bundle', ('bundle.zip', bundle_file))
     ]
 
     @classmethod
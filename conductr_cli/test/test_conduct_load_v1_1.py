@@ -28,13 +28,21 @@ class TestConductLoadCommand(TestCase, ConductLoadTestBase, CliTestCase):
 
     default_args = {
         'ip': '127.0.0.1',
+        'timeout': None,
+        'deadline': None,
         'port': 9005,
         'api_version': '1.1',
         'verbose': False,
         'long_ids': False,
         'cli_parameters': '',
         'bundle': bundle_file,
-        'configuration': None
+        'configuration': None,
+        'skip_if_loaded': False,
+        'bundles': None,
+        'manifest': None,
+        'jobs': 4,
+        'limit_rate': None,
+        'retries': 0
     }
 
     default_url = 'http://127.0.0.1:9005/v1.1/bundles'
@@ -48,7 +56,7 @@ class TestConductLoadCommand(TestCase, ConductLoadTestBase, CliTestCase):
         ('system', system),
         ('systemVersion', systemVersion),
         ('compatibilityVersion', compatibilityVersion),
-        ('bundle', ('bundle.zip', 1))
+        ('bundle', ('bundle.zip', bundle_file))
     ]
 
     @classmethod
@@ -12,6 +12,9 @@ class TestConductLogsCommand(TestCase, CliTestCase):
 
     default_args = {
         'ip': '127.0.0.1',
+        'timeout': None,
+        'deadline': None,
+        'hedge': False,
         'port': '9005',
         'api_version': '1.0',
         'bundle': 'ab8f513',
@@ -26,10 +29,10 @@ class TestConductLogsCommand(TestCase, CliTestCase):
         http_method = self.respond_with(text='{}')
         stdout = MagicMock()
 
-        with patch('requests.get', http_method), patch('sys.stdout', stdout):
+        with patch('conductr_cli.conduct_http.get', http_method), patch('sys.stdout', stdout):
             conduct_logs.logs(MagicMock(**self.default_args))
 
-        http_method.assert_called_with(self.default_url)
+        http_method.assert_called_with(self.default_url, hedge=False)
         self.assertEqual(
             strip_margin("""|TIME  HOST  LOG
                             |"""),
@@ -50,10 +53,10 @@ class TestConductLogsCommand(TestCase, CliTestCase):
         ]""")
         stdout = MagicMock()
 
-        with patch('requests.get', http_method), patch('sys.stdout', stdout):
+        with patch('conductr_cli.conduct_http.get', http_method), patch('sys.stdout', stdout):
             conduct_logs.logs(MagicMock(**self.default_args))
 
-        http_method.assert_called_with(self.default_url)
+        http_method.assert_called_with(self.default_url, hedge=False)
         self.assertEqual(
             strip_margin("""|TIME                  HOST        LOG
                             |2015-08-24T01:16:22Z  10.0.1.232  [WARN] [04/21/2015 12:54:30.079] [doc-renderer-cluster-1-akka.remote.default-remote-dispatcher-22] Association with remote system has failed.
@@ -65,10 +68,10 @@ class TestConductLogsCommand(TestCase, CliTestCase):
         http_method = self.raise_connection_error('test reason', self.default_url)
         stderr = MagicMock()
 
-        with patch('requests.get', http_method), patch('sys.stderr', stderr):
+        with patch('conductr_cli.conduct_http.get', http_method), patch('sys.stderr', stderr):
             conduct_logs.logs(MagicMock(**self.default_args))
 
-        http_method.assert_called_with(self.default_url)
+        http_method.assert_called_with(self.default_url, hedge=False)
         self.assertEqual(
             self.default_connection_error.format(self.default_url),
             self.output(stderr))
@@ -0,0 +1,123 @@
+from unittest import TestCase
+from conductr_cli import conduct_members
+import socket
+import time
+
+try:
+    from unittest.mock import patch  # 3.3 and beyond
+except ImportError:
+    from mock import patch
+
+
+def refused_port():
+    """Returns a local port that nothing listens on"""
+
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class TestConductMembers(TestCase):
+
+    def setUp(self):  # noqa
+        self.state_patches = [patch.dict(state, clear=True) for state in
+                              [conduct_members.clusters, conduct_members.latencies,
+                               conduct_members.connect_latencies, conduct_members.failures]]
+        for state_patch in self.state_patches:
+            state_patch.start()
+
+    def tearDown(self):  # noqa
+        for state_patch in self.state_patches:
+            state_patch.stop()
+
+    def test_parse(self):
+        self.assertEqual(conduct_members.parse('127.0.0.1'), ['127.0.0.1'])
+        self.assertEqual(conduct_members.parse('10.0.0.1, Node2,,[fe80::1]'), ['10.0.0.1', 'node2', '[fe80::1]'])
+
+    def test_choose_one(self):
+        self.assertEqual(conduct_members.choose('127.0.0.1', 9005), '127.0.0.1')
+        self.assertEqual(conduct_members.clusters, {})
+
+    def test_choose_probed(self):
+        with socket.socket() as server:
+            server.bind(('127.0.0.1', 0))
+            server.listen(1)
+            port = server.getsockname()[1]
+
+            # Only the listening member accepts the connection, as the other is not listening on the port
+            host = conduct_members.choose('127.0.0.2,127.0.0.1', port)
+
+        self.assertEqual(host, '127.0.0.1')
+        # The time to connect is kept apart from the response times
+        self.assertIn(('127.0.0.1', port), conduct_members.connect_latencies)
+        self.assertEqual(conduct_members.latencies, {})
+        members = (('127.0.0.2', port), ('127.0.0.1', port))
+        self.assertEqual(conduct_members.clusters, {members[0]: members, members[1]: members})
+
+    def test_choose_lowest_latency(self):
+        conduct_members.latencies.update({('10.0.0.1', 9005): 0.2, ('10.0.0.2', 9005): 0.1, ('10.0.0.3', 9005): 0.05})
+        conduct_members.failures[('10.0.0.3', 9005)] = time.monotonic()
+
+        self.assertEqual(conduct_members.choose('10.0.0.1,10.0.0.2,10.0.0.3', 9005), '10.0.0.2')
+
+    def test_choose_responded_before_probed(self):
+        # Connecting takes less time than a response, so the times are not compared
+        conduct_members.latencies[('10.0.0.2', 9005)] = 0.2
+        conduct_members.connect_latencies.update({('10.0.0.1', 9005): 0.001, ('10.0.0.2', 9005): 0.01})
+
+        self.assertEqual(conduct_members.choose('10.0.0.1,10.0.0.2', 9005), '10.0.0.2')
+
+    def test_rank(self):
+        conduct_members.latencies.update({('10.0.0.1', 9005): 0.2, ('10.0.0.2', 9005): 0.1})
+        conduct_members.connect_latencies.update({('10.0.0.2', 9005): 0.5, ('10.0.0.3', 9005): 0.02,
+                                                  ('10.0.0.4', 9005): 0.01})
+        members = [('10.0.0.{}'.format(index), 9005) for index in range(1, 6)]
+
+        self.assertEqual([member[0] for member in sorted(members, key=conduct_members.rank)],
+                         ['10.0.0.2', '10.0.0.1', '10.0.0.4', '10.0.0.3', '10.0.0.5'])
+
+    def test_choose_failed_again(self):
+        conduct_members.latencies.update({('10.0.0.1', 9005): 0.2, ('10.0.0.2', 9005): 0.1})
+        conduct_members.failures[('10.0.0.2', 9005)] = time.monotonic() - conduct_members.failure_ttl - 1
+
+        self.assertEqual(conduct_members.choose('10.0.0.1,10.0.0.2', 9005), '10.0.0.2')
+
+    def test_probe_none_accepting(self):
+        members = (('127.0.0.1', refused_port()), ('127.0.0.1', refused_port()))
+
+        self.assertEqual(conduct_members.probe(members), members[0])
+        self.assertEqual(set(conduct_members.failures), set(members))
+
+    def test_record_failure(self):
+        members = (('10.0.0.1', 9005), ('10.0.0.2', 9005), ('10.0.0.3', 9005))
+        conduct_members.clusters.update({member: members for member in members})
+        conduct_members.latencies[('10.0.0.3', 9005)] = 0.1
+
+        self.assertEqual(conduct_members.record_failure('http://10.0.0.1:9005/v1.1/bundles'),
+                         'http://10.0.0.3:9005/v1.1/bundles')
+        self.assertEqual(conduct_members.record_failure('http://10.0.0.3:9005/v1.1/bundles'),
+                         'http://10.0.0.2:9005/v1.1/bundles')
+        self.assertEqual(conduct_members.record_failure('http://10.0.0.2:9005/v1.1/bundles'), None)
+
+    def test_record_failure_not_member(self):
+        self.assertEqual(conduct_members.record_failure('http://127.0.0.1:9005/bundles'), None)
+        self.assertEqual(conduct_members.failures, {})
+
+    def test_record_response(self):
+        members = (('[fe80::1]', 9005), ('[fe80::2]', 9005))
+        conduct_members.clusters.update({member: members for member in members})
+        conduct_members.failures[members[0]] = time.monotonic()
+
+        conduct_members.record_response('http://[fe80::1]:9005/bundles', 0.1)
+        conduct_members.record_response('http://[fe80::1]:9005/bundles', 0.2)
+
+        self.assertAlmostEqual(conduct_members.latencies[members[0]], 0.13)
+        self.assertEqual(conduct_members.failures, {})
+
+    def test_hedge_delay(self):
+        conduct_members.latencies.update({('10.0.0.1', 9005): 0.1, ('10.0.0.2', 9005): 0.001})
+
+        self.assertAlmostEqual(conduct_members.hedge_delay('http://10.0.0.1:9005/bundles'), 0.2)
+        self.assertEqual(conduct_members.hedge_delay('http://10.0.0.2:9005/bundles'), conduct_members.min_hedge_delay)
+        self.assertEqual(conduct_members.hedge_delay('http://10.0.0.3:9005/bundles'),
+                         conduct_members.default_hedge_delay)
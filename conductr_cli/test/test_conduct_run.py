@@ -19,6 +19,8 @@ class TestConductRunCommand(TestCase, CliTestCase):
 
     default_args = {
         'ip': '127.0.0.1',
+        'timeout': None,
+        'deadline': None,
         'port': 9005,
         'api_version': '1.0',
         'verbose': False,
@@ -42,7 +44,7 @@ class TestConductRunCommand(TestCase, CliTestCase):
         http_method = self.respond_with(200, self.default_response)
         stdout = MagicMock()
 
-        with patch('requests.put', http_method), patch('sys.stdout', stdout):
+        with patch('conductr_cli.conduct_http.put', http_method), patch('sys.stdout', stdout):
             conduct_run.run(MagicMock(**self.default_args))
 
         http_method.assert_called_with(self.default_url)
@@ -53,7 +55,7 @@ class TestConductRunCommand(TestCase, CliTestCase):
         http_method = self.respond_with(200, self.default_response)
         stdout = MagicMock()
 
-        with patch('requests.put', http_method), patch('sys.stdout', stdout):
+        with patch('conductr_cli.conduct_http.put', http_method), patch('sys.stdout', stdout):
             args = self.default_args.copy()
             args.update({'verbose': True})
             conduct_run.run(MagicMock(**args))
@@ -66,7 +68,7 @@ class TestConductRunCommand(TestCase, CliTestCase):
         http_method = self.respond_with(200, self.default_response)
         stdout = MagicMock()
 
-        with patch('requests.put', http_method), patch('sys.stdout', stdout):
+        with patch('conductr_cli.conduct_http.put', http_method), patch('sys.stdout', stdout):
             args = self.default_args.copy()
             args.update({'long_ids': True})
             conduct_run.run(MagicMock(**args))
@@ -80,7 +82,7 @@ class TestConductRunCommand(TestCase, CliTestCase):
         stdout = MagicMock()
 
         cli_parameters = ' --ip 127.0.1.1 --port 9006'
-        with patch('requests.put', http_method), patch('sys.stdout', stdout):
+        with patch('conductr_cli.conduct_http.put', http_method), patch('sys.stdout', stdout):
             args = self.default_args.copy()
             args.update({'cli_parameters': cli_parameters})
             conduct_run.run(MagicMock(**args))
@@ -95,7 +97,7 @@ class TestConductRunCommand(TestCase, CliTestCase):
         http_method = self.respond_with(404)
         stderr = MagicMock()
 
-        with patch('requests.put', http_method), patch('sys.stderr', stderr):
+        with patch('conductr_cli.conduct_http.put', http_method), patch('sys.stderr', stderr):
             conduct_run.run(MagicMock(**self.default_args))
 
         http_method.assert_called_with(self.default_url)
@@ -109,7 +111,7 @@ class TestConductRunCommand(TestCase, CliTestCase):
         http_method = self.raise_connection_error('test reason', self.default_url)
         stderr = MagicMock()
 
-        with patch('requests.put', http_method), patch('sys.stderr', stderr):
+        with patch('conductr_cli.conduct_http.put', http_method), patch('sys.stderr', stderr):
             conduct_run.run(MagicMock(**self.default_args))
 
         http_method.assert_called_with(self.default_url)
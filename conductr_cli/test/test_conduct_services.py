@@ -12,6 +12,9 @@ class TestConductServicesCommand(TestCase, CliTestCase):
 
     default_args = {
         'ip': '127.0.0.1',
+        'timeout': None,
+        'deadline': None,
+        'hedge': False,
         'port': 9005,
         'api_version': '1.0',
         'verbose': False,
@@ -24,10 +27,10 @@ class TestConductServicesCommand(TestCase, CliTestCase):
         http_method = self.respond_with(200, '[]')
         stdout = MagicMock()
 
-        with patch('requests.get', http_method), patch('sys.stdout', stdout):
+        with patch('conductr_cli.conduct_http.get', http_method), patch('sys.stdout', stdout):
             conduct_services.services(MagicMock(**self.default_args))
 
-        http_method.assert_called_with(self.default_url)
+        http_method.assert_called_with(self.default_url, hedge=False)
         self.assertEqual(
             strip_margin("""|SERVICE  BUNDLE ID  BUNDLE NAME  STATUS
                             |"""),
@@ -37,10 +40,10 @@ class TestConductServicesCommand(TestCase, CliTestCase):
         http_method = self.respond_with_file_contents('data/two_bundles.json')
         stdout = MagicMock()
 
-        with patch('requests.get', http_method), patch('sys.stdout', stdout):
+        with patch('conductr_cli.conduct_http.get', http_method), patch('sys.stdout', stdout):
             conduct_services.services(MagicMock(**self.default_args))
 
-        http_method.assert_called_with(self.default_url)
+        http_method.assert_called_with(self.default_url, hedge=False)
         self.assertEqual(
             strip_margin("""|SERVICE                   BUNDLE ID  BUNDLE NAME                   STATUS
                             |http://:6011/comp2-endp2  6e4560e    multi2-comp-multi-endp-1.0.0  Running
@@ -61,10 +64,10 @@ class TestConductServicesCommand(TestCase, CliTestCase):
         http_method = self.respond_with_file_contents('data/two_bundles_no_path.json')
         stdout = MagicMock()
 
-        with patch('requests.get', http_method), patch('sys.stdout', stdout):
+        with patch('conductr_cli.conduct_http.get', http_method), patch('sys.stdout', stdout):
             conduct_services.services(MagicMock(**self.default_args))
 
-        http_method.assert_called_with(self.default_url)
+        http_method.assert_called_with(self.default_url, hedge=False)
         self.assertEqual(
             strip_margin("""|SERVICE                   BUNDLE ID  BUNDLE NAME                   STATUS
                             |http://:6011              6e4560e    multi2-comp-multi-endp-1.0.0  Running
@@ -82,10 +85,10 @@ class TestConductServicesCommand(TestCase, CliTestCase):
         http_method = self.respond_with_file_contents('data/one_bundle_starting.json')
         stdout = MagicMock()
 
-        with patch('requests.get', http_method), patch('sys.stdout', stdout):
+        with patch('conductr_cli.conduct_http.get', http_method), patch('sys.stdout', stdout):
             conduct_services.services(MagicMock(**self.default_args))
 
-        http_method.assert_called_with(self.default_url)
+        http_method.assert_called_with(self.default_url, hedge=False)
         self.assertEqual(
             strip_margin("""|SERVICE                   BUNDLE ID  BUNDLE NAME                  STATUS
                             |http://:8010/comp1-endp1  f804d64    multi-comp-multi-endp-1.0.0  Starting
@@ -100,12 +103,12 @@ class TestConductServicesCommand(TestCase, CliTestCase):
         http_method = self.respond_with_file_contents('data/one_bundle_starting.json')
         stdout = MagicMock()
 
-        with patch('requests.get', http_method), patch('sys.stdout', stdout):
+        with patch('conductr_cli.conduct_http.get', http_method), patch('sys.stdout', stdout):
             args = self.default_args.copy()
             args.update({'long_ids': True})
             conduct_services.services(MagicMock(**args))
 
-        http_method.assert_called_with(self.default_url)
+        http_method.assert_called_with(self.default_url, hedge=False)
         self.assertEqual(
             strip_margin("""|SERVICE                   BUNDLE ID                         BUNDLE NAME                  STATUS
                             |http://:8010/comp1-endp1  f804d644a01a5ab9f679f76939f5c7e2  multi-comp-multi-endp-1.0.0  Starting
@@ -1,6 +1,7 @@
 from unittest import TestCase
 from conductr_cli.test.cli_test_case import CliTestCase, strip_margin
 from conductr_cli import conduct_stop
+from requests.exceptions import ConnectTimeout
 
 try:
     from unittest.mock import patch, MagicMock  # 3.3 and beyond
@@ -19,6 +20,8 @@ class TestConductStopCommand(TestCase, CliTestCase):
 
     default_args = {
         'ip': '127.0.0.1',
+        'timeout': None,
+        'deadline': None,
         'port': 9005,
         'api_version': '1.0',
         'verbose': False,
@@ -41,7 +44,7 @@ class TestConductStopCommand(TestCase, CliTestCase):
         http_method = self.respond_with(200, self.default_response)
         stdout = MagicMock()
 
-        with patch('requests.put', http_method), patch('sys.stdout', stdout):
+        with patch('conductr_cli.conduct_http.put', http_method), patch('sys.stdout', stdout):
             conduct_stop.stop(MagicMock(**self.default_args))
 
         http_method.assert_called_with(self.default_url)
@@ -52,7 +55,7 @@ class TestConductStopCommand(TestCase, CliTestCase):
         http_method = self.respond_with(200, self.default_response)
         stdout = MagicMock()
 
-        with patch('requests.put', http_method), patch('sys.stdout', stdout):
+        with patch('conductr_cli.conduct_http.put', http_method), patch('sys.stdout', stdout):
             args = self.default_args.copy()
             args.update({'verbose': True})
             conduct_stop.stop(MagicMock(**args))
@@ -65,7 +68,7 @@ class TestConductStopCommand(TestCase, CliTestCase):
         http_method = self.respond_with(200, self.default_response)
         stdout = MagicMock()
 
-        with patch('requests.put', http_method), patch('sys.stdout', stdout):
+        with patch('conductr_cli.conduct_http.put', http_method), patch('sys.stdout', stdout):
             args = self.default_args.copy()
             args.update({'long_ids': True})
             conduct_stop.stop(MagicMock(**args))
@@ -79,7 +82,7 @@ class TestConductStopCommand(TestCase, CliTestCase):
         stdout = MagicMock()
 
         cli_parameters = ' --ip 127.0.1.1 --port 9006'
-        with patch('requests.put', http_method), patch('sys.stdout', stdout):
+        with patch('conductr_cli.conduct_http.put', http_method), patch('sys.stdout', stdout):
             args = self.default_args.copy()
             args.update({'cli_parameters': cli_parameters})
             conduct_stop.stop(MagicMock(**args))
@@ -94,7 +97,7 @@ class TestConductStopCommand(TestCase, CliTestCase):
         http_method = self.respond_with(404)
         stderr = MagicMock()
 
-        with patch('requests.put', http_method), patch('sys.stderr', stderr):
+        with patch('conductr_cli.conduct_http.put', http_method), patch('sys.stderr', stderr):
             conduct_stop.stop(MagicMock(**self.default_args))
 
         http_method.assert_called_with(self.default_url)
@@ -108,7 +111,7 @@ class TestConductStopCommand(TestCase, CliTestCase):
         http_method = self.raise_connection_error('test reason', self.default_url)
         stderr = MagicMock()
 
-        with patch('requests.put', http_method), patch('sys.stderr', stderr):
+        with patch('conductr_cli.conduct_http.put', http_method), patch('sys.stderr', stderr):
             conduct_stop.stop(MagicMock(**self.default_args))
 
         http_method.assert_called_with(self.default_url)
@@ -116,3 +119,15 @@ class TestConductStopCommand(TestCase, CliTestCase):
         self.assertEqual(
             self.default_connection_error.format(self.default_url),
             self.output(stderr))
+
+    def test_failure_connect_timeout(self):
+        http_method = MagicMock(side_effect=ConnectTimeout('test reason', request=MagicMock(url=self.default_url)))
+        stderr = MagicMock()
+
+        with patch('conductr_cli.conduct_http.put', http_method), patch('sys.stderr', stderr):
+            conduct_stop.stop(MagicMock(**self.default_args))
+
+        # A connect timeout is a connection error too, but is reported as a timeout
+        self.assertEqual(
+            self.default_timeout_error.format(self.default_url),
+            self.output(stderr))
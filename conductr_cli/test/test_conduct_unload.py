@@ -19,6 +19,8 @@ class TestConductUnloadCommand(TestCase, CliTestCase):
 
     default_args = {
         'ip': '127.0.0.1',
+        'timeout': None,
+        'deadline': None,
         'port': 9005,
         'api_version': '1.0',
         'verbose': False,
@@ -39,7 +41,7 @@ class TestConductUnloadCommand(TestCase, CliTestCase):
         http_method = self.respond_with(200, self.default_response)
         stdout = MagicMock()
 
-        with patch('requests.delete', http_method), patch('sys.stdout', stdout):
+        with patch('conductr_cli.conduct_http.delete', http_method), patch('sys.stdout', stdout):
             conduct_unload.unload(MagicMock(**self.default_args))
 
         http_method.assert_called_with(self.default_url)
@@ -50,7 +52,7 @@ class TestConductUnloadCommand(TestCase, CliTestCase):
         http_method = self.respond_with(200, self.default_response)
         stdout = MagicMock()
 
-        with patch('requests.delete', http_method), patch('sys.stdout', stdout):
+        with patch('conductr_cli.conduct_http.delete', http_method), patch('sys.stdout', stdout):
             args = self.default_args.copy()
             args.update({'verbose': True})
             conduct_unload.unload(MagicMock(**args))
@@ -64,7 +66,7 @@ class TestConductUnloadCommand(TestCase, CliTestCase):
         stdout = MagicMock()
 
         cli_parameters = ' --ip 127.0.1.1 --port 9006'
-        with patch('requests.delete', http_method), patch('sys.stdout', stdout):
+        with patch('conductr_cli.conduct_http.delete', http_method), patch('sys.stdout', stdout):
             args = self.default_args.copy()
             args.update({'cli_parameters': cli_parameters})
             conduct_unload.unload(MagicMock(**args))
@@ -79,7 +81,7 @@ class TestConductUnloadCommand(TestCase, CliTestCase):
         http_method = self.respond_with(404)
         stderr = MagicMock()
 
-        with patch('requests.delete', http_method), patch('sys.stderr', stderr):
+        with patch('conductr_cli.conduct_http.delete', http_method), patch('sys.stderr', stderr):
             conduct_unload.unload(MagicMock(**self.default_args))
 
         http_method.assert_called_with(self.default_url)
@@ -93,7 +95,7 @@ class TestConductUnloadCommand(TestCase, CliTestCase):
         http_method = self.raise_connection_error('test reason', self.default_url)
         stderr = MagicMock()
 
-        with patch('requests.delete', http_method), patch('sys.stderr', stderr):
+        with patch('conductr_cli.conduct_http.delete', http_method), patch('sys.stderr', stderr):
             conduct_unload.unload(MagicMock(**self.default_args))
 
         http_method.assert_called_with(self.default_url)
@@ -1,10 +1,10 @@
 from unittest import TestCase
-from conductr_cli import conduct_url
+from conductr_cli import conduct_members, conduct_url
 
 try:
-    from unittest.mock import MagicMock  # 3.3 and beyond
+    from unittest.mock import patch, MagicMock  # 3.3 and beyond
 except ImportError:
-    from mock import MagicMock
+    from mock import patch, MagicMock
 
 
 class TestConductUrl(TestCase):
@@ -24,3 +24,13 @@ class TestConductUrl(TestCase):
         args.api_version = '1.1'
         result = conduct_url.url('test', args)
         self.assertEqual('http://127.0.0.1:9005/v1.1/test', result)
+
+    def test_url_members(self):
+        args = MagicMock()
+        args.ip = '10.0.0.1,10.0.0.2'
+        args.port = 9005
+        args.api_version = '1.1'
+        with patch.dict(conduct_members.latencies, {('10.0.0.1', 9005): 0.2, ('10.0.0.2', 9005): 0.1}), \
+                patch.dict(conduct_members.clusters):
+            result = conduct_url.url('test', args)
+        self.assertEqual('http://10.0.0.2:9005/v1.1/test', result)
@@ -0,0 +1,63 @@
+from unittest import TestCase
+from conductr_cli import conf_cache
+import os
+import shutil
+import tempfile
+
+try:
+    from unittest.mock import patch  # 3.3 and beyond
+except ImportError:
+    from mock import patch
+
+
+class TestConfCache(TestCase):
+
+    digest = '1be7aaf1938cc19af7d2fdeb48a11c381dff8a98d4c4b47b3b0a5044a5255c04'
+
+    def setUp(self):  # noqa
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmpdir, 'conf')
+
+    def test_digest(self):
+        self.assertEqual(conf_cache.digest('bundle-1.0.0-{}.zip'.format(self.digest)), self.digest)
+        self.assertIsNone(conf_cache.digest('bundle.zip'))
+        self.assertIsNone(conf_cache.digest('bundle-{}.zip.part'.format(self.digest)))
+
+    def test_key(self):
+        bundle_name = 'bundle-{}.zip'.format(self.digest)
+        configuration_name = 'config-{}.zip'.format(self.digest[::-1])
+
+        self.assertIsNone(conf_cache.key('1.1', 'bundle.zip'))
+        self.assertIsNone(conf_cache.key('1.1', bundle_name, 'config.zip'))
+        self.assertIsNotNone(conf_cache.key('1.1', bundle_name, configuration_name))
+        self.assertNotEqual(conf_cache.key('1.1', bundle_name), conf_cache.key('1.0', bundle_name))
+        self.assertNotEqual(conf_cache.key('1.1', bundle_name), conf_cache.key('1.1', bundle_name, configuration_name))
+
+    def test_put_and_get(self):
+        with patch('conductr_cli.conf_cache.cache_dir', self.cache_dir):
+            self.assertIsNone(conf_cache.get('key'))
+            conf_cache.put('key', [('nrOfCpus', '1.0'), ('roles', 'web-server')])
+
+            self.assertEqual(conf_cache.get('key'), [('nrOfCpus', '1.0'), ('roles', 'web-server')])
+            self.assertIsNone(conf_cache.get(None))
+
+    def test_least_recently_used_evicted(self):
+        with patch('conductr_cli.conf_cache.cache_dir', self.cache_dir), patch('conductr_cli.conf_cache.max_entries', 2):
+            for index, cache_key in enumerate(['first', 'second']):
+                conf_cache.put(cache_key, [('name', cache_key)])
+                os.utime(os.path.join(self.cache_dir, '{}.json'.format(cache_key)), (index, index))
+            conf_cache.get('first')
+            conf_cache.put('third', [('name', 'third')])
+
+            self.assertEqual(sorted(os.listdir(self.cache_dir)), ['first.json', 'third.json'])
+
+    def test_put_failure_ignored(self):
+        with open(self.cache_dir, 'w'):
+            pass
+        with patch('conductr_cli.conf_cache.cache_dir', self.cache_dir):
+            conf_cache.put('key', [('name', 'bundle')])
+
+            self.assertIsNone(conf_cache.get('key'))
+
+    def tearDown(self):  # noqa
+        shutil.rmtree(self.tmpdir)
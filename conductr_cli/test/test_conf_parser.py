@@ -0,0 +1,134 @@
+from unittest import TestCase
+from collections import OrderedDict
+from conductr_cli import conf_parser
+from pyhocon import ConfigFactory, ConfigTree
+import os
+
+
+corpus_dir = os.path.join(os.path.dirname(__file__), 'data', 'bundle_conf')
+
+# The corpus files using HOCON beyond the subset of the simple parser
+hocon_only = ['multiline-string.conf', 'substitutions.conf']
+
+# The keys read by conduct load
+payload_keys = ['nrOfCpus', 'memory', 'diskSpace', 'roles', 'name', 'system', 'systemVersion', 'compatibilityVersion']
+
+
+def plain(value):
+    """Converts the values of pyhocon to those of the simple parser"""
+    if isinstance(value, ConfigTree):
+        return OrderedDict((key, plain(item)) for key, item in value.items())
+    elif isinstance(value, list):
+        return [plain(item) for item in value]
+    else:
+        return value
+
+
+def types(value):
+    if isinstance(value, dict):
+        return [(key, types(item)) for key, item in value.items()]
+    elif isinstance(value, list):
+        return [types(item) for item in value]
+    else:
+        return type(value).__name__
+
+
+def read_setting(config, method, key):
+    try:
+        return method(config, key)
+    except conf_parser.ConfigError as err:
+        return type(err).__name__, err.args[0]
+
+
+class TestCorpus(TestCase):
+
+    def test_same_as_pyhocon(self):
+        for file_name in sorted(os.listdir(corpus_dir)):
+            with open(os.path.join(corpus_dir, file_name), 'r') as f:
+                text = f.read()
+
+            if file_name in hocon_only:
+                with self.assertRaises(conf_parser.UnsupportedError):
+                    conf_parser.parse_simple(text)
+                continue
+
+            simple = conf_parser.parse_simple(text)
+            hocon = plain(ConfigFactory.parse_string(text))
+            self.assertEqual(simple, hocon, file_name)
+            self.assertEqual(types(simple), types(hocon), file_name)
+
+    def test_same_settings_as_pyhocon(self):
+        for file_name in sorted(os.listdir(corpus_dir)):
+            with open(os.path.join(corpus_dir, file_name), 'r') as f:
+                text = f.read()
+            simple = conf_parser.SimpleConfig(conf_parser.parse_simple(text)) if file_name not in hocon_only else None
+            hocon = conf_parser.parse_hocon(text)
+
+            self.assertIsInstance(conf_parser.parse(text), conf_parser.HoconConfig if simple is None else conf_parser.SimpleConfig)
+            for key in payload_keys + ['components', 'components.visualizer.endpoints', 'name.first']:
+                for method in [conf_parser.Config.get_string, conf_parser.Config.get_list]:
+                    if simple is not None:
+                        self.assertEqual(read_setting(simple, method, key), read_setting(hocon, method, key), (file_name, key))
+
+
+class TestParseSimple(TestCase):
+
+    def assert_same_as_pyhocon(self, text):
+        simple = conf_parser.parse_simple(text)
+        hocon = plain(ConfigFactory.parse_string(text))
+        self.assertEqual(simple, hocon, text)
+        self.assertEqual(types(simple), types(hocon), text)
+
+    def test_values(self):
+        for value in ['bundle', '"bundle"', '200', '-5', '+5', '05', '1.50', '2.10', '.5', '1e3', '1.0.0', '1.',
+                      'TRUE', 'false', 'nullable', 'a/b', '"$WEB_BIND_IP"', '[]', '[a, "b c", 1, 2.0, true]', '[a,]',
+                      '[\n  a\n  b\n]', 'x # comment', 'x // comment', 'x#comment']:
+            self.assert_same_as_pyhocon('key = {}\n'.format(value))
+
+    def test_objects(self):
+        for text in ['a { b = 1 }\n', 'a = { b = 1, c = [x] }\na { c = 2 }\n', 'a.b = 1\na.c = 2\n', 'a = 1\na.b = 2\n',
+                     '"a.b" = 1\n', 'a : b\nc=d\n', '{name="overlaid-name"}', '\n# comment\n{ a = 1 }\n\n', 'a = 1, b = 2\n',
+                     'a = x\r\nb = y\r\n', 'roles = [a, b]']:
+            self.assert_same_as_pyhocon(text)
+
+    def test_unsupported(self):
+        for text in ['name = bundle', 'a = null\n', 'a = true-ish\n', 'a = "x" y\n', 'a = b c\n', 'a = \n',
+                     'a = http://x\n', 'a = 1 # comment', 'a = {b = 1} {c = 2}\n', 'a = [1] [2]\n', 'a = [1, [2]]\n',
+                     'a = [{b = 1}]\n', 'x = ${y}\ny = 1\n', 'include "other.conf"\n', 'a = """x"""\n', 'a = "x\\"y"\n',
+                     'a += 1\n', '{a = 1}\n{b = 2}\n', '[1, 2]\n']:
+            with self.assertRaises(conf_parser.UnsupportedError, msg=text):
+                conf_parser.parse_simple(text)
+
+
+class TestConfig(TestCase):
+
+    def test_get(self):
+        config = conf_parser.parse('name = bundle\nroles = [web]\ncomponents { a = { b = 1 } }\n')
+
+        self.assertEqual(config.get_string('name'), 'bundle')
+        self.assertEqual(config.get_list('roles'), ['web'])
+        self.assertEqual(config.get_string('components.a.b'), '1')
+
+    def test_abstract(self):
+        with self.assertRaises(TypeError):
+            conf_parser.Config()
+
+    def test_missing(self):
+        with self.assertRaisesRegex(conf_parser.ConfigMissingError, 'No configuration setting found for key nrOfCpus'):
+            conf_parser.parse('name = bundle\n').get_string('nrOfCpus')
+
+    def test_not_a_list(self):
+        with self.assertRaisesRegex(conf_parser.ConfigError, "roles has type 'str' rather than 'list'"):
+            conf_parser.parse('roles = web\n').get_list('roles')
+
+    def test_fallback(self):
+        config = conf_parser.parse('name = bundle\nsystem = ${name}\n')
+
+        self.assertIsInstance(config, conf_parser.HoconConfig)
+        self.assertEqual(config.get_string('system'), 'bundle')
+        with self.assertRaises(conf_parser.ConfigMissingError):
+            config.get_string('nrOfCpus')
+
+    def test_fallback_failure(self):
+        with self.assertRaisesRegex(conf_parser.ConfigError, 'Cannot resolve variable'):
+            conf_parser.parse('system = ${undefined_variable_of_the_test}\n')
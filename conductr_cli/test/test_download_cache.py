@@ -0,0 +1,207 @@
+from unittest import TestCase
+from conductr_cli import conduct_http, download_cache
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import time
+
+try:
+    from unittest.mock import patch, MagicMock  # 3.3 and beyond
+except ImportError:
+    from mock import patch, MagicMock
+
+
+def response(contents, headers=None):
+    body = io.BytesIO(contents)
+    body.headers = {} if headers is None else headers
+    return body
+
+
+def not_modified(request, timeout):
+    raise HTTPError(request.full_url, 304, 'Not Modified', {}, None)
+
+
+class TestDownloadCache(TestCase):
+
+    url = 'http://site.com/bundle.zip'
+    contents = b'bundle contents'
+    digest = hashlib.sha256(contents).hexdigest()
+    digested_url = 'http://site.com/bundle-{}.zip'.format(digest)
+
+    def setUp(self):  # noqa
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmpdir, 'downloads')
+        os.makedirs(self.cache_dir)
+
+    def tearDown(self):  # noqa
+        shutil.rmtree(self.tmpdir)
+
+    def retrieve(self, url, urlopen_mock):
+        with patch('conductr_cli.download_cache.cache_dir', self.cache_dir), \
+                patch('conductr_cli.download_cache.urlopen', urlopen_mock):
+            with download_cache.retrieve(url) as f:
+                return f.read()
+
+    def test_miss(self):
+        urlopen_mock = MagicMock(return_value=response(self.contents, {'ETag': '"1"', 'Last-Modified': 'Tue, 13 Oct 2015'}))
+
+        self.assertEqual(self.retrieve(self.url, urlopen_mock), self.contents)
+
+        (request,), kwargs = urlopen_mock.call_args
+        self.assertEqual(request.full_url, self.url)
+        self.assertEqual(request.headers, {})
+        self.assertEqual(sorted(os.listdir(self.cache_dir)), sorted([
+            '{}.data'.format(self.digest),
+            '{}.json'.format(hashlib.sha256(self.url.encode('utf-8')).hexdigest())
+        ]))
+
+    def test_timeout(self):
+        urlopen_mock = MagicMock(side_effect=lambda request, timeout: response(self.contents))
+        self.retrieve(self.url, urlopen_mock)
+        self.assertEqual(urlopen_mock.call_args[1], {'timeout': conduct_http.connect_timeout})
+
+        with conduct_http.timeouts((2.0, 30.0), None):
+            self.retrieve(self.digested_url, urlopen_mock)
+        self.assertEqual(urlopen_mock.call_args[1], {'timeout': 30.0})
+
+    def test_limit_rate(self):
+        rate_limiter = MagicMock()
+
+        with patch('conductr_cli.download_cache.cache_dir', self.cache_dir), \
+                patch('conductr_cli.download_cache.urlopen', MagicMock(return_value=response(self.contents))):
+            with download_cache.retrieve(self.url, rate_limiter) as f:
+                self.assertEqual(f.read(), self.contents)
+
+        rate_limiter.consume.assert_called_once_with(len(self.contents))
+
+    def test_revalidate_not_modified(self):
+        self.retrieve(self.url, MagicMock(return_value=response(self.contents, {'ETag': '"1"', 'Last-Modified': 'Tue, 13 Oct 2015'})))
+        urlopen_mock = MagicMock(side_effect=not_modified)
+
+        self.assertEqual(self.retrieve(self.url, urlopen_mock), self.contents)
+
+        (request,), kwargs = urlopen_mock.call_args
+        self.assertEqual(request.get_header('If-none-match'), '"1"')
+        self.assertEqual(request.get_header('If-modified-since'), 'Tue, 13 Oct 2015')
+
+    def test_revalidate_modified(self):
+        self.retrieve(self.url, MagicMock(return_value=response(self.contents, {'ETag': '"1"'})))
+        urlopen_mock = MagicMock(return_value=response(b'new contents', {'ETag': '"2"'}))
+
+        self.assertEqual(self.retrieve(self.url, urlopen_mock), b'new contents')
+        (request,), kwargs = urlopen_mock.call_args
+        self.assertEqual(request.get_header('If-none-match'), '"1"')
+
+        # The file of the former contents is kept until evicted, the entry refers to the new one
+        not_modified_mock = MagicMock(side_effect=not_modified)
+        self.assertEqual(self.retrieve(self.url, not_modified_mock), b'new contents')
+        (request,), kwargs = not_modified_mock.call_args
+        self.assertEqual(request.get_header('If-none-match'), '"2"')
+
+    def test_no_validators(self):
+        self.retrieve(self.url, MagicMock(return_value=response(self.contents)))
+        urlopen_mock = MagicMock(return_value=response(self.contents))
+
+        self.assertEqual(self.retrieve(self.url, urlopen_mock), self.contents)
+        (request,), kwargs = urlopen_mock.call_args
+        self.assertEqual(request.headers, {})
+
+    def test_digested_url(self):
+        self.retrieve(self.digested_url, MagicMock(return_value=response(self.contents, {'ETag': '"1"'})))
+        urlopen_mock = MagicMock()
+
+        self.assertEqual(self.retrieve(self.digested_url, urlopen_mock), self.contents)
+        urlopen_mock.assert_not_called()
+
+    def test_digested_url_corrupt(self):
+        self.retrieve(self.digested_url, MagicMock(return_value=response(self.contents, {'ETag': '"1"'})))
+        with open(os.path.join(self.cache_dir, '{}.data'.format(self.digest)), 'wb') as f:
+            f.write(b'corrupt contents')
+        urlopen_mock = MagicMock(return_value=response(self.contents))
+
+        self.assertEqual(self.retrieve(self.digested_url, urlopen_mock), self.contents)
+        # Downloaded again, without revalidation
+        (request,), kwargs = urlopen_mock.call_args
+        self.assertEqual(request.headers, {})
+
+    def test_evicted_file(self):
+        self.retrieve(self.url, MagicMock(return_value=response(self.contents, {'ETag': '"1"'})))
+        os.remove(os.path.join(self.cache_dir, '{}.data'.format(self.digest)))
+        urlopen_mock = MagicMock(return_value=response(self.contents))
+
+        self.assertEqual(self.retrieve(self.url, urlopen_mock), self.contents)
+        (request,), kwargs = urlopen_mock.call_args
+        self.assertEqual(request.headers, {})
+
+    def test_failure(self):
+        self.retrieve(self.url, MagicMock(return_value=response(self.contents, {'ETag': '"1"'})))
+        urlopen_mock = MagicMock(side_effect=HTTPError(self.url, 404, 'Not Found', {}, None))
+
+        with self.assertRaises(HTTPError):
+            self.retrieve(self.url, urlopen_mock)
+
+    def test_failure_while_downloading(self):
+        body = MagicMock(**{'read.side_effect': [b'bundle', ConnectionResetError()]})
+        body.__enter__.return_value = body
+
+        with self.assertRaises(ConnectionResetError):
+            self.retrieve(self.url, MagicMock(return_value=body))
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_evict(self):
+        for index in range(4):
+            self.retrieve('http://site.com/bundle-{}.zip'.format(index), MagicMock(return_value=response(bytes([index]) * 100)))
+            path = os.path.join(self.cache_dir, '{}.data'.format(hashlib.sha256(bytes([index]) * 100).hexdigest()))
+            os.utime(path, (time.time() - 100 + index, time.time() - 100 + index))
+        # The second bundle is the most recently used one
+        self.retrieve('http://site.com/bundle-1.zip', MagicMock(side_effect=not_modified))
+
+        with patch('conductr_cli.download_cache.cache_dir', self.cache_dir), patch('conductr_cli.download_cache.max_size', 250):
+            download_cache.evict()
+
+        files = [name for name in os.listdir(self.cache_dir) if name.endswith('.data')]
+        self.assertEqual(sorted(files), sorted('{}.data'.format(hashlib.sha256(bytes([index]) * 100).hexdigest()) for index in [1, 3]))
+        self.assertEqual(len([name for name in os.listdir(self.cache_dir) if name.endswith('.json')]), 2)
+
+    def test_evict_temporary_files(self):
+        old_file, new_file = os.path.join(self.cache_dir, 'old.tmp'), os.path.join(self.cache_dir, 'new.tmp')
+        for path in [old_file, new_file]:
+            open(path, 'w').close()
+        os.utime(old_file, (0, 0))
+
+        with patch('conductr_cli.download_cache.cache_dir', self.cache_dir):
+            download_cache.evict()
+
+        self.assertEqual(os.listdir(self.cache_dir), ['new.tmp'])
+
+    def test_concurrent(self):
+        def retrieve(index):
+            with download_cache.retrieve(self.url) as f:
+                return f.read()
+
+        urlopen_mock = MagicMock(side_effect=lambda request, timeout: response(self.contents))
+        with patch('conductr_cli.download_cache.cache_dir', self.cache_dir), \
+                patch('conductr_cli.download_cache.urlopen', urlopen_mock), \
+                ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(retrieve, range(32)))
+
+        self.assertEqual(results, [self.contents] * 32)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 2)
+
+    def test_no_cache_dir(self):
+        urlretrieve_mock = MagicMock(return_value=(os.path.join(self.tmpdir, 'downloaded'), None))
+        with open(os.path.join(self.tmpdir, 'downloaded'), 'wb') as f:
+            f.write(self.contents)
+        cache_dir = os.path.join(self.tmpdir, 'file', 'downloads')
+        open(os.path.join(self.tmpdir, 'file'), 'w').close()
+
+        with patch('conductr_cli.download_cache.cache_dir', cache_dir), \
+                patch('conductr_cli.download_cache.urlretrieve', urlretrieve_mock):
+            with download_cache.retrieve(self.url) as f:
+                self.assertEqual(f.read(), self.contents)
+
+        urlretrieve_mock.assert_called_with(self.url, reporthook=None)
@@ -0,0 +1,85 @@
+from unittest import TestCase, skipIf
+from conductr_cli.multipart import MultipartEncoder
+from conductr_cli.test.cli_test_case import strip_margin
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+class TestMultipartEncoder(TestCase):
+
+    def setUp(self):  # noqa
+        self.tmpdir = tempfile.mkdtemp()
+        self.bundle_path = os.path.join(self.tmpdir, 'bundle.zip')
+        with open(self.bundle_path, 'wb') as bundle:
+            bundle.write(b'bundle contents')
+
+    def test_encode(self):
+        with open(self.bundle_path, 'rb') as bundle:
+            encoder = MultipartEncoder([('memory', '200'), ('bundle', ('bundle.zip', bundle))], boundary='xyz')
+            body = encoder.read()
+
+        self.assertEqual('multipart/form-data; boundary=xyz', encoder.content_type)
+        self.assertEqual(
+            strip_margin("""|--xyz
+                            |Content-Disposition: form-data; name="memory"
+                            |
+                            |200
+                            |--xyz
+                            |Content-Disposition: form-data; name="bundle"; filename="bundle.zip"
+                            |
+                            |bundle contents
+                            |--xyz--
+                            |""").replace('\n', '\r\n').encode('utf-8'),
+            body)
+
+    def test_len_and_chunked_read(self):
+        with open(self.bundle_path, 'rb') as bundle:
+            encoder = MultipartEncoder([('roles', 'web-server'), ('bundle', ('bundle.zip', bundle))])
+            length = len(encoder)
+            chunks = list(iter(lambda: encoder.read(7), b''))
+
+        self.assertTrue(all(len(chunk) == 7 for chunk in chunks[:-1]))
+        self.assertEqual(length, sum(len(chunk) for chunk in chunks))
+
+    def test_callback(self):
+        read_sizes = []
+        with open(self.bundle_path, 'rb') as bundle:
+            encoder = MultipartEncoder([('bundle', ('bundle.zip', bundle))], callback=read_sizes.append)
+            chunks = list(iter(lambda: encoder.read(7), b''))
+
+        self.assertEqual(read_sizes, [len(chunk) for chunk in chunks])
+
+    @skipIf(resource is None, 'requires the resource module')
+    def test_peak_memory_independent_of_bundle_size(self):
+        bundle_size = 256 * 1024 * 1024
+        with open(self.bundle_path, 'wb') as bundle:
+            bundle.truncate(bundle_size)
+
+        # Run in a separate process so that the peak RSS of the test runner does not interfere
+        script = strip_margin("""|import resource, sys
+                                 |from conductr_cli.multipart import MultipartEncoder
+                                 |with open(sys.argv[1], 'rb') as bundle:
+                                 |    encoder = MultipartEncoder([('bundle', ('bundle.zip', bundle))])
+                                 |    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                                 |    sent = sum(len(chunk) for chunk in iter(lambda: encoder.read(8192), b''))
+                                 |    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                                 |# ru_maxrss is reported in bytes on OS X and in kilobytes elsewhere
+                                 |print(sent, (after - before) * (1 if sys.platform == 'darwin' else 1024))
+                                 |""")
+        output = subprocess.check_output([sys.executable, '-c', script, self.bundle_path],
+                                         cwd=os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+        sent, rss_growth = [int(value) for value in output.split()]
+
+        self.assertGreater(sent, bundle_size)
+        self.assertLess(rss_growth, bundle_size // 16)
+
+    def tearDown(self):  # noqa
+        shutil.rmtree(self.tmpdir)
@@ -0,0 +1,88 @@
+from unittest import TestCase
+from conductr_cli import progress
+import io
+import os
+
+try:
+    from unittest.mock import patch, MagicMock  # 3.3 and beyond
+except ImportError:
+    from mock import patch, MagicMock
+
+
+class TestIsTty(TestCase):
+
+    def test_not_a_tty(self):
+        self.assertFalse(progress.is_tty(io.StringIO()))
+        self.assertFalse(progress.is_tty(MagicMock()))
+
+    def test_tty(self):
+        try:
+            master, slave = os.openpty()
+        except (AttributeError, OSError):
+            self.skipTest('No pseudo terminal available')
+        with open(slave, 'w') as stream:
+            self.assertTrue(progress.is_tty(stream))
+        self.assertFalse(progress.is_tty(stream))
+        os.close(master)
+
+
+class TestFormatSize(TestCase):
+
+    def test_format_size(self):
+        self.assertEqual(progress.format_size(0), '0 B')
+        self.assertEqual(progress.format_size(999), '999 B')
+        self.assertEqual(progress.format_size(1234), '1.2 KB')
+        self.assertEqual(progress.format_size(999999), '1.0 MB')
+        self.assertEqual(progress.format_size(20000000), '20.0 MB')
+        self.assertEqual(progress.format_size(4500000000), '4.5 GB')
+
+
+class TestUploadProgress(TestCase):
+
+    def test_redraw(self):
+        stream = io.StringIO()
+
+        with patch('conductr_cli.progress.perf_counter', MagicMock(side_effect=[0.0, 1.0, 1.2, 2.0, 2.5])):
+            upload = progress.UploadProgress(4000000, stream)
+            upload.sent(1000000)
+            # Not redrawn within the redraw interval
+            upload.sent(500000)
+            upload.sent(2500000)
+            upload.finish()
+
+        self.assertEqual(
+            '\rSent 1.0 MB of 4.0 MB (25%), 1.0 MB/s, ETA 3s'
+            '\rSent 4.0 MB of 4.0 MB (100%), 2.0 MB/s, ETA 0s\n',
+            stream.getvalue())
+
+    def test_redraw_shorter_line(self):
+        stream = io.StringIO()
+
+        with patch('conductr_cli.progress.perf_counter', MagicMock(side_effect=[0.0, 0.0, 1.0, 2.0])):
+            upload = progress.UploadProgress(20000000, stream)
+            upload.sent(1000000)
+            upload.sent(19000000)
+            upload.finish()
+
+        first_line, last_line = stream.getvalue().rstrip('\n').split('\r')[1:]
+        self.assertEqual(first_line, 'Sent 1.0 MB of 20.0 MB (5%), 0 B/s, ETA -')
+        self.assertEqual(last_line, 'Sent 20.0 MB of 20.0 MB (100%), 20.0 MB/s, ETA 0s'.ljust(len(first_line)))
+
+    def test_no_stream(self):
+        with patch('conductr_cli.progress.perf_counter', MagicMock(side_effect=[0.0, 1.0, 2.0, 2.25])):
+            upload = progress.UploadProgress(2000, None)
+            upload.sent(1000)
+            upload.sent(1000)
+            upload.finish()
+
+        self.assertEqual(upload.summary(), {'bytes': 2000, 'duration': 2.25, 'time_to_first_byte': 0.25})
+
+    def test_nothing_sent(self):
+        stream = io.StringIO()
+
+        with patch('conductr_cli.progress.perf_counter', MagicMock(side_effect=[0.0, 0.5])):
+            upload = progress.UploadProgress(0, stream)
+            upload.finish()
+
+        self.assertEqual(upload.summary(), {'bytes': 0, 'duration': 0.5, 'time_to_first_byte': 0.5})
+        self.assertEqual(stream.getvalue(), '')
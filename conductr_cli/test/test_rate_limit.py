@@ -0,0 +1,74 @@
+from unittest import TestCase
+from conductr_cli import rate_limit
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import time
+
+try:
+    from unittest.mock import patch, call, MagicMock  # 3.3 and beyond
+except ImportError:
+    from mock import patch, call, MagicMock
+
+
+class TestParseRate(TestCase):
+
+    def test_parse_rate(self):
+        self.assertEqual(rate_limit.parse_rate('100'), 100)
+        self.assertEqual(rate_limit.parse_rate('500K'), 512000)
+        self.assertEqual(rate_limit.parse_rate('500k'), 512000)
+        self.assertEqual(rate_limit.parse_rate('1.5M'), 1572864)
+        self.assertEqual(rate_limit.parse_rate('2G'), 2147483648)
+
+    def test_parse_invalid_rate(self):
+        for rate in ['', 'fast', '0', '-1M', '2MB', '1.M']:
+            with self.assertRaises(argparse.ArgumentTypeError, msg=rate):
+                rate_limit.parse_rate(rate)
+
+
+class TestTokenBucket(TestCase):
+
+    def test_consume(self):
+        sleep = MagicMock()
+
+        with patch('conductr_cli.rate_limit.monotonic', MagicMock(side_effect=[0.0, 0.0, 0.0, 0.5, 2.0])), \
+                patch('conductr_cli.rate_limit.sleep', sleep):
+            bucket = rate_limit.TokenBucket(1000)
+            # The burst capacity is a quarter of the rate
+            bucket.consume(250)
+            # Larger chunks than the capacity are let through on credit
+            bucket.consume(500)
+            bucket.consume(100)
+            # The bucket holds no more than its capacity however long it was idle
+            bucket.consume(300)
+
+        self.assertEqual(sleep.call_args_list, [call(0.5), call(0.1), call(0.05)])
+
+    def test_throughput(self):
+        bucket = rate_limit.TokenBucket(1024 * 1024)
+        start = time.monotonic()
+
+        for _ in range(8):
+            bucket.consume(64 * 1024)
+
+        # 512 KiB less the burst capacity of 256 KiB, at 1 MiB/s
+        self.assertGreaterEqual(time.monotonic() - start, 0.24)
+
+    def test_throughput_shared_by_threads(self):
+        bucket = rate_limit.TokenBucket(1024 * 1024)
+        start = time.monotonic()
+
+        with ThreadPoolExecutor(4) as executor:
+            list(executor.map(lambda index: [bucket.consume(16 * 1024) for _ in range(8)], range(4)))
+
+        self.assertGreaterEqual(time.monotonic() - start, 0.24)
+
+    def test_reporthook(self):
+        bucket = MagicMock()
+
+        self.assertIsNone(rate_limit.reporthook(None))
+        hook = rate_limit.reporthook(bucket)
+        hook(0, 8192, 20000)
+        hook(1, 8192, 20000)
+        hook(2, 8192, 20000)
+
+        self.assertEqual(bucket.consume.call_args_list, [call(8192), call(8192)])
@@ -1,9 +1,16 @@
 from unittest import TestCase
+import hashlib
+import io
+import os
 import shutil
 import tempfile
+import zipfile
+import zlib
 from os import remove
-from conductr_cli.shazar import create_digest, build_parser, run
-from conductr_cli.test.cli_test_case import CliTestCase
+from conductr_cli import shazar
+from conductr_cli.shazar import DigestWriter, build_parser, run
+from conductr_cli.bundle_utils import file_digest
+from conductr_cli.test.cli_test_case import CliTestCase, strip_margin
 
 try:
     from unittest.mock import patch, MagicMock  # 3.3 and beyond
@@ -11,25 +18,204 @@ except ImportError:
     from mock import patch, MagicMock
 
 
-class TestShazar(TestCase):
+class TestShazar(TestCase, CliTestCase):
 
-    def test_create_digest(self):
-        temp = tempfile.NamedTemporaryFile(mode='w+b', delete=False)
-        temp.write(b'test file data')
-        temp_name = temp.name
-        temp.close()
-        self.assertEqual(
-            create_digest(temp_name),
-            '1be7aaf1938cc19af7d2fdeb48a11c381dff8a98d4c4b47b3b0a5044a5255c04'
-        )
-        remove(temp_name)
+    def test_digest_writer(self):
+        out = io.BytesIO()
+        writer = DigestWriter(out)
+        writer.write(b'test file ')
+        writer.write(b'data')
+
+        self.assertEqual(out.getvalue(), b'test file data')
+        self.assertEqual(writer.tell(), 14)
+        self.assertEqual(writer.hexdigest(), '1be7aaf1938cc19af7d2fdeb48a11c381dff8a98d4c4b47b3b0a5044a5255c04')
 
     def test_parser_success(self):
         parser = build_parser()
-        args = parser.parse_args('--output-dir output-dir source'.split())
+        args = parser.parse_args('--output-dir output-dir --jobs 4 --cache-dir cache-dir source'.split())
 
         self.assertEqual(args.output_dir, 'output-dir')
-        self.assertEqual(args.source, 'source')
+        self.assertEqual(args.jobs, 4)
+        self.assertEqual(args.cache_dir, 'cache-dir')
+        self.assertFalse(args.reproducible)
+        self.assertEqual(args.compression_level, 6)
+        self.assertEqual(args.stored_extensions, ','.join(shazar.default_stored_extensions))
+        self.assertFalse(args.report)
+        self.assertEqual(args.exclude, [])
+
+    def test_parser_exclude(self):
+        args = build_parser().parse_args('--exclude .git --exclude *.swp source'.split())
+
+        self.assertEqual(args.exclude, ['.git', '*.swp'])
+        self.assertEqual(args.sources, ['source'])
+
+    def test_parser_batch(self):
+        args = build_parser().parse_args('--bundles-dir bundles first second'.split())
+
+        self.assertEqual(args.bundles_dir, ['bundles'])
+        self.assertEqual(args.sources, ['first', 'second'])
+
+    def test_parser_no_source(self):
+        stderr = MagicMock()
+        with patch('sys.stderr', stderr), self.assertRaises(SystemExit) as exit:
+            run(['--output-dir', 'output-dir'])
+
+        self.assertEqual(exit.exception.code, 2)
+        self.assertIn('a source or --bundles-dir is required', self.output(stderr))
+
+
+class TestCompressEntry(TestCase):
+
+    def setUp(self):  # noqa
+        self.tmpdir = tempfile.mkdtemp()
+
+    def compress(self, name, data, **options):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        zinfo, compressed, content_digest, compress_time = shazar.compress_entry((path, name), **options)
+        self.assertEqual(zinfo.file_size, len(data))
+        self.assertEqual(zinfo.compress_size, len(compressed))
+        return zinfo.compress_type
+
+    def test_deflates_compressible_files(self):
+        self.assertEqual(self.compress('application.conf', b'akka.loglevel = INFO\n' * 10000), zipfile.ZIP_DEFLATED)
+
+    def test_stores_files_with_stored_extensions(self):
+        self.assertEqual(self.compress('lib.jar', b'a' * 1000, stored_extensions=['.jar']), zipfile.ZIP_STORED)
+        self.assertEqual(self.compress('LIB.JAR', b'a' * 1000, stored_extensions=['.jar']), zipfile.ZIP_STORED)
+        self.assertEqual(self.compress('lib.jar', b'a' * 1000, stored_extensions=[]), zipfile.ZIP_DEFLATED)
+
+    def test_stores_incompressible_files(self):
+        self.assertEqual(self.compress('random.bin', os.urandom(shazar.sample_size * 2)), zipfile.ZIP_STORED)
+        self.assertEqual(self.compress('small', b'abc'), zipfile.ZIP_STORED)
+
+    def test_compression_level(self):
+        self.assertEqual(self.compress('application.conf', b'a' * 1000, compression_level=0), zipfile.ZIP_STORED)
+        self.assertEqual(self.compress('application.conf', b'a' * 1000, compression_level=9), zipfile.ZIP_DEFLATED)
+
+    def test_large_file(self):
+        path = os.path.join(self.tmpdir, 'application.log')
+        data = b'akka.loglevel = INFO\n' * 10000
+        with open(path, 'wb') as f:
+            f.write(data)
+
+        with patch('conductr_cli.shazar.large_entry_size', 1024), patch('conductr_cli.shazar.chunk_size', 4096):
+            zinfo, compressed, content_digest, compress_time = \
+                shazar.compress_entry((path, 'application.log'), temp_dir=self.tmpdir)
+
+        # The compressed data is in a temporary file, rather than in memory
+        self.assertIsInstance(compressed, shazar.EntryData)
+        self.assertTrue(compressed.path.startswith(self.tmpdir))
+        with compressed.open() as f:
+            compressed_data = f.read()
+        compressed.discard()
+        self.assertFalse(os.path.exists(compressed.path))
+
+        self.assertEqual(zinfo.compress_type, zipfile.ZIP_DEFLATED)
+        self.assertEqual(zinfo.compress_size, len(compressed_data))
+        self.assertEqual(zlib.decompress(compressed_data, -15), data)
+        self.assertEqual(zinfo.CRC, zlib.crc32(data))
+        self.assertEqual(content_digest, hashlib.sha256(data).hexdigest())
+
+    def test_large_file_stored(self):
+        path = os.path.join(self.tmpdir, 'random.bin')
+        with open(path, 'wb') as f:
+            f.write(os.urandom(shazar.sample_size * 2))
+
+        with patch('conductr_cli.shazar.large_entry_size', 1024):
+            zinfo, data, content_digest, compress_time = shazar.compress_entry((path, 'random.bin'))
+
+        # Stored files are written from the file itself
+        self.assertEqual(zinfo.compress_type, zipfile.ZIP_STORED)
+        self.assertEqual((data.path, data.temporary), (path, False))
+        self.assertEqual(zinfo.compress_size, shazar.sample_size * 2)
+        self.assertEqual(os.listdir(self.tmpdir), ['random.bin'])
+
+    def test_timestamp_before_1980(self):
+        path = os.path.join(self.tmpdir, 'application.conf')
+        with open(path, 'wb') as f:
+            f.write(b'akka.loglevel = INFO\n')
+        os.chmod(path, 0o640)
+        os.utime(path, (0, 0))
+
+        zinfo = shazar.entry_info(path, 'bundle/application.conf')
+
+        self.assertEqual(zinfo.filename, 'bundle/application.conf')
+        self.assertEqual(zinfo.date_time, (1980, 1, 1, 0, 0, 0))
+        self.assertEqual(zinfo.external_attr >> 16, 0o100640)
+        self.assertEqual(zinfo.file_size, 21)
+
+    def tearDown(self):  # noqa
+        shutil.rmtree(self.tmpdir)
+
+
+class TestSourceEntries(TestCase):
+
+    def setUp(self):  # noqa
+        self.tmpdir = tempfile.mkdtemp()
+        self.source = os.path.join(self.tmpdir, 'bundle-1.0.0')
+        for name in ['bundle.conf', 'lib/bundle.jar', '.git/HEAD', '.git/objects/ab/cdef',
+                     'target/streams/out', 'target/bundle.jar', 'conf/.application.conf.swp']:
+            path = os.path.join(self.source, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(name)
+
+    def entry_names(self, patterns):
+        walked_dirs = []
+        os_walk = os.walk
+
+        def walk(top):
+            for dir_path, dir_names, file_names in os_walk(top):
+                walked_dirs.append(os.path.relpath(dir_path, self.source))
+                yield dir_path, dir_names, file_names
+
+        with patch('os.walk', walk):
+            entries = shazar.source_entries(self.source, 'bundle-1.0.0', patterns)
+        return sorted(name for path, name in entries), walked_dirs
+
+    def test_no_patterns(self):
+        names, walked_dirs = self.entry_names([])
+
+        self.assertEqual(len(names), 7)
+
+    def test_exclude(self):
+        names, walked_dirs = self.entry_names(['.git', 'target/streams/', '*.swp'])
+
+        self.assertEqual(names, [
+            os.path.join('bundle-1.0.0', 'bundle.conf'),
+            os.path.join('bundle-1.0.0', 'lib', 'bundle.jar'),
+            os.path.join('bundle-1.0.0', 'target', 'bundle.jar')
+        ])
+        self.assertNotIn('.git', walked_dirs)
+        self.assertNotIn(os.path.join('.git', 'objects'), walked_dirs)
+        self.assertNotIn(os.path.join('target', 'streams'), walked_dirs)
+
+    def test_is_excluded(self):
+        self.assertTrue(shazar.is_excluded(os.path.join('lib', 'a.swp'), ['*.swp']))
+        self.assertTrue(shazar.is_excluded(os.path.join('target', 'streams'), ['target/streams']))
+        self.assertTrue(shazar.is_excluded(os.path.join('target', 'streams'), ['/target/streams']))
+        self.assertFalse(shazar.is_excluded(os.path.join('lib', 'target', 'streams'), ['target/streams']))
+        self.assertFalse(shazar.is_excluded('bundle.conf', ['*.swp', 'target']))
+
+    def test_is_excluded_anchored(self):
+        self.assertTrue(shazar.is_excluded('target', ['/target']))
+        self.assertFalse(shazar.is_excluded(os.path.join('lib', 'target'), ['/target']))
+
+    def test_is_excluded_directory(self):
+        self.assertTrue(shazar.is_excluded('target', ['target/'], is_dir=True))
+        self.assertTrue(shazar.is_excluded(os.path.join('lib', 'target'), ['target/'], is_dir=True))
+        self.assertFalse(shazar.is_excluded('target', ['target/']))
+        self.assertTrue(shazar.is_excluded(os.path.join('target', 'streams'), ['target/streams/'], is_dir=True))
+
+    def test_ignore_file(self):
+        with open(os.path.join(self.source, '.shazarignore'), 'w') as f:
+            f.write('# Build output\ntarget\n\n.git\n')
+        self.assertEqual(shazar.exclude_patterns(self.source, ['*.swp']), ['*.swp', '.shazarignore', 'target', '.git'])
+
+    def tearDown(self):  # noqa
+        shutil.rmtree(self.tmpdir)
 
 
 class TestIntegration(TestCase, CliTestCase):
@@ -49,6 +235,380 @@ class TestIntegration(TestCase, CliTestCase):
             'Created digested ZIP archive at /tmp/tmp[a-z0-9_]{6,8}/tmp[a-z0-9_]{6,8}-[a-f0-9]{64}\.zip'
         )
 
+    def test_digest_matches_archive(self):
+        with patch('sys.stdout', MagicMock()):
+            run('--output-dir {} {}'.format(self.tmpdir, self.tmpfile.name).split())
+
+        archive_name, = os.listdir(self.tmpdir)
+        archive = os.path.join(self.tmpdir, archive_name)
+        self.assertEqual(archive_name, '{}-{}.zip'.format(os.path.basename(self.tmpfile.name), file_digest(archive)))
+        with zipfile.ZipFile(archive) as zip_file:
+            self.assertIsNone(zip_file.testzip())
+
     def tearDown(self):  # noqa
         shutil.rmtree(self.tmpdir)
         remove(self.tmpfile.name)
+
+
+class TestIntegrationBundleDirectory(TestCase, CliTestCase):
+
+    def setUp(self):  # noqa
+        self.tmpdir = tempfile.mkdtemp()
+        self.source = os.path.join(self.tmpdir, 'bundle-1.0.0')
+        os.makedirs(os.path.join(self.source, 'lib'))
+        with open(os.path.join(self.source, 'bundle.conf'), 'w') as f:
+            f.write('name = bundle')
+        for index in range(8):
+            with open(os.path.join(self.source, 'lib', 'lib-{}.jar'.format(index)), 'wb') as f:
+                f.write(os.urandom(1024) * (index + 1))
+
+    def package(self, jobs):
+        output_dir = tempfile.mkdtemp(dir=self.tmpdir)
+        with patch('sys.stdout', MagicMock()):
+            run('--output-dir {} --jobs {} {}'.format(output_dir, jobs, self.source).split())
+        archive_name, = os.listdir(output_dir)
+        return os.path.join(output_dir, archive_name)
+
+    def test_parallel_same_as_serial(self):
+        serial = self.package(1)
+        parallel = self.package(3)
+
+        self.assertEqual(os.path.basename(serial), os.path.basename(parallel))
+        with open(serial, 'rb') as serial_file, open(parallel, 'rb') as parallel_file:
+            self.assertEqual(serial_file.read(), parallel_file.read())
+
+        with zipfile.ZipFile(parallel) as zip_file:
+            self.assertIsNone(zip_file.testzip())
+            self.assertEqual(zip_file.read('bundle-1.0.0/bundle.conf'), b'name = bundle')
+            self.assertEqual(len(zip_file.namelist()), 9)
+            self.assertTrue(all(zinfo.compress_type == zipfile.ZIP_STORED for zinfo in zip_file.infolist()
+                                if zinfo.filename.endswith('.jar')))
+
+    def test_large_files_same_as_small(self):
+        with open(os.path.join(self.source, 'application.conf'), 'w') as f:
+            f.write('akka.loglevel = INFO\n' * 10000)
+        in_memory = self.package(1)
+        with patch('conductr_cli.shazar.large_entry_size', 2048):
+            chunked = self.package(1)
+
+        with open(in_memory, 'rb') as in_memory_file, open(chunked, 'rb') as chunked_file:
+            self.assertEqual(in_memory_file.read(), chunked_file.read())
+        with zipfile.ZipFile(chunked) as zip_file:
+            self.assertIsNone(zip_file.testzip())
+
+    def test_report(self):
+        with open(os.path.join(self.source, 'application.conf'), 'w') as f:
+            f.write('akka.loglevel = INFO\n' * 10000)
+        output_dir = tempfile.mkdtemp(dir=self.tmpdir)
+        stdout = MagicMock()
+        with patch('sys.stdout', stdout):
+            run('--output-dir {} --jobs 1 --report {}'.format(output_dir, self.source).split())
+
+        self.assertRegex(
+            self.output(stdout),
+            strip_margin("""|Created digested ZIP archive at .*
+                            |Deflated 1 files from 210.0 KB to [0-9]+ B
+                            |Stored 9 files of 36.9 KB without compression, saving an estimated [0-9.]+s of compression
+                            |Total of 10 files compressed from 246.9 KB to [0-9.]+ KB
+                            |Largest files:
+                            |      SIZE  COMPRESSED  NAME
+                            |  210.0 KB +[0-9]+ B  bundle-1.0.0/application.conf
+                            |    8.2 KB      8.2 KB  bundle-1.0.0/lib/lib-7.jar
+                            |"""))
+
+    def test_stdout(self):
+        stdout = MagicMock(buffer=io.BytesIO())
+        stderr = MagicMock()
+        with patch('sys.stdout', stdout), patch('sys.stderr', stderr):
+            run('--output-dir - --jobs 1 {}'.format(self.source).split())
+
+        archive = stdout.buffer.getvalue()
+        archive_name = 'bundle-1.0.0-{}.zip'.format(hashlib.sha256(archive).hexdigest())
+        self.assertEqual(self.output(stderr), 'Wrote digested ZIP archive {} to stdout\n'.format(archive_name))
+        with zipfile.ZipFile(io.BytesIO(archive)) as zip_file:
+            self.assertIsNone(zip_file.testzip())
+            self.assertEqual(zip_file.read('bundle-1.0.0/bundle.conf'), b'name = bundle')
+
+        # The archive is the same as the one written to a file
+        with open(self.package(1), 'rb') as f:
+            self.assertEqual(f.read(), archive)
+
+    def test_stdout_single_source(self):
+        stderr = MagicMock()
+        with patch('sys.stderr', stderr), self.assertRaises(SystemExit):
+            run(['--output-dir', '-', self.source, self.source])
+
+        self.assertIn('an archive written to stdout requires a single source', self.output(stderr))
+
+    def test_failure_leaves_no_temporary_file(self):
+        output_dir = tempfile.mkdtemp(dir=self.tmpdir)
+        with patch('sys.stderr', MagicMock()), \
+                patch('conductr_cli.shazar.compress_entry', MagicMock(side_effect=PermissionError('denied'))), \
+                self.assertRaises(SystemExit):
+            run('--output-dir {} --jobs 1 {}'.format(output_dir, self.source).split())
+
+        self.assertEqual(os.listdir(output_dir), [])
+
+    def tearDown(self):  # noqa
+        shutil.rmtree(self.tmpdir)
+
+
+class TestIntegrationBuildCache(TestCase, CliTestCase):
+
+    def setUp(self):  # noqa
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmpdir, 'cache')
+        self.output_dir = os.path.join(self.tmpdir, 'output')
+        os.makedirs(self.output_dir)
+        self.source = os.path.join(self.tmpdir, 'bundle-1.0.0')
+        os.makedirs(self.source)
+        for name in ['bundle.conf', 'a.jar', 'b.jar']:
+            with open(os.path.join(self.source, name), 'w') as f:
+                f.write('{} contents'.format(name))
+
+    def package(self, cache_dir=None, output_dir=None):
+        stdout = MagicMock()
+        compress_entry = MagicMock(wraps=shazar.compress_entry)
+        with patch('sys.stdout', stdout), patch('conductr_cli.shazar.compress_entry', compress_entry):
+            args = '--output-dir {} --jobs 1 {}'.format(output_dir or self.output_dir, self.source)
+            run((args if cache_dir is None else '--cache-dir {} {}'.format(cache_dir, args)).split())
+        archive = self.output(stdout)[len('Created digested ZIP archive at '):].strip()
+        compressed_names = sorted(os.path.basename(entry[0][0][0]) for entry in compress_entry.call_args_list)
+        return archive, compressed_names
+
+    def read(self, archive):
+        with open(archive, 'rb') as f:
+            return f.read()
+
+    def test_unchanged(self):
+        first_archive, first_compressed = self.package(self.cache_dir)
+        second_archive, second_compressed = self.package(self.cache_dir)
+
+        self.assertEqual(first_compressed, ['a.jar', 'b.jar', 'bundle.conf'])
+        self.assertEqual(second_compressed, [])
+        self.assertEqual(first_archive, second_archive)
+
+    def test_unchanged_relative_output_dir(self):
+        cwd = os.getcwd()
+        os.chdir(self.tmpdir)
+        try:
+            first_archive, first_compressed = self.package(self.cache_dir, 'output')
+            second_archive, second_compressed = self.package(self.cache_dir, 'output')
+        finally:
+            os.chdir(cwd)
+
+        self.assertEqual(second_compressed, [])
+        self.assertEqual(os.path.dirname(first_archive), 'output')
+        self.assertEqual(first_archive, second_archive)
+
+    def test_changed_file(self):
+        self.package(self.cache_dir)
+        with open(os.path.join(self.source, 'b.jar'), 'w') as f:
+            f.write('changed contents')
+        archive, compressed = self.package(self.cache_dir)
+        os.remove(archive)
+        expected_archive, expected_compressed = self.package()
+
+        self.assertEqual(compressed, ['b.jar'])
+        self.assertEqual(archive, expected_archive)
+        self.assertEqual(self.read(archive), self.read(expected_archive))
+
+    def test_touched_file(self):
+        first_archive, first_compressed = self.package(self.cache_dir)
+        path = os.path.join(self.source, 'a.jar')
+        os.utime(path, (os.stat(path).st_atime, os.stat(path).st_mtime + 60))
+        archive, compressed = self.package(self.cache_dir)
+        os.remove(archive)
+        expected_archive, expected_compressed = self.package()
+
+        self.assertEqual(compressed, [])
+        self.assertNotEqual(archive, first_archive)
+        self.assertEqual(self.read(archive), self.read(expected_archive))
+
+    def test_changed_mode(self):
+        first_archive, first_compressed = self.package(self.cache_dir)
+        path = os.path.join(self.source, 'a.jar')
+        os.chmod(path, os.stat(path).st_mode | 0o111)
+        archive, compressed = self.package(self.cache_dir)
+        os.remove(archive)
+        expected_archive, expected_compressed = self.package()
+
+        self.assertEqual(compressed, [])
+        self.assertNotEqual(archive, first_archive)
+        self.assertEqual(self.read(archive), self.read(expected_archive))
+
+    def test_rewritten_file_same_size_and_mtime(self):
+        first_archive, first_compressed = self.package(self.cache_dir)
+        path = os.path.join(self.source, 'b.jar')
+        stat = os.stat(path)
+        with open(path, 'w') as f:
+            f.write('b.jar CONTENTS')
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        archive, compressed = self.package(self.cache_dir)
+        os.remove(archive)
+        expected_archive, expected_compressed = self.package()
+
+        self.assertEqual(compressed, ['b.jar'])
+        self.assertNotEqual(archive, first_archive)
+        self.assertEqual(self.read(archive), self.read(expected_archive))
+
+    def test_missing_archive(self):
+        first_archive, first_compressed = self.package(self.cache_dir)
+        os.remove(first_archive)
+        archive, compressed = self.package(self.cache_dir)
+
+        self.assertEqual(compressed, ['a.jar', 'b.jar', 'bundle.conf'])
+        self.assertEqual(archive, first_archive)
+
+    def tearDown(self):  # noqa
+        shutil.rmtree(self.tmpdir)
+
+
+class TestIntegrationReproducible(TestCase, CliTestCase):
+
+    files = {
+        'bundle.conf': 'name = bundle',
+        'bin/start': 'exec java -jar lib/bundle.jar',
+        'lib/bundle.jar': 'classes'
+    }
+
+    def setUp(self):  # noqa
+        self.tmpdir = tempfile.mkdtemp()
+
+    def create_source(self, parent, names, mtime, mode):
+        source = os.path.join(self.tmpdir, parent, 'bundle-1.0.0')
+        for name in names:
+            path = os.path.join(source, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(self.files[name])
+            os.chmod(path, 0o775 if name.startswith('bin/') else mode)
+            os.utime(path, (mtime, mtime))
+        return source
+
+    def package(self, source, *options):
+        output_dir = tempfile.mkdtemp(dir=self.tmpdir)
+        with patch('sys.stdout', MagicMock()):
+            run(['--output-dir', output_dir, '--reproducible'] + list(options) + [source])
+        archive_name, = os.listdir(output_dir)
+        return os.path.join(output_dir, archive_name)
+
+    def test_same_archive_for_same_files(self):
+        first = self.package(self.create_source('first', sorted(self.files), 1000000000, 0o600))
+        second = self.package(self.create_source('second', sorted(self.files, reverse=True), 1400000000, 0o664))
+
+        self.assertEqual(os.path.basename(first), os.path.basename(second))
+        with zipfile.ZipFile(first) as zip_file:
+            self.assertEqual(zip_file.namelist(), ['bundle-1.0.0/bin/start', 'bundle-1.0.0/bundle.conf', 'bundle-1.0.0/lib/bundle.jar'])
+            self.assertEqual(set(zinfo.date_time for zinfo in zip_file.infolist()), {(1980, 1, 1, 0, 0, 0)})
+            self.assertEqual([zinfo.external_attr >> 16 for zinfo in zip_file.infolist()], [0o100755, 0o100644, 0o100644])
+
+    def test_timestamps_before_1980(self):
+        # Nix sets the modification time of the files it builds to the epoch
+        source = self.create_source('first', sorted(self.files), 0, 0o444)
+        with patch.dict('os.environ', {'SOURCE_DATE_EPOCH': '0'}):
+            archive = self.package(source)
+
+        with zipfile.ZipFile(archive) as zip_file:
+            self.assertEqual(set(zinfo.date_time for zinfo in zip_file.infolist()), {(1980, 1, 1, 0, 0, 0)})
+            self.assertEqual([zinfo.external_attr >> 16 for zinfo in zip_file.infolist()], [0o100755, 0o100644, 0o100644])
+
+    def test_source_date_epoch(self):
+        source = self.create_source('first', sorted(self.files), 1000000000, 0o644)
+        with patch.dict('os.environ', {'SOURCE_DATE_EPOCH': '1442836800'}):
+            archive = self.package(source)
+
+        with zipfile.ZipFile(archive) as zip_file:
+            self.assertEqual(set(zinfo.date_time for zinfo in zip_file.infolist()), {(2015, 9, 21, 12, 0, 0)})
+
+    def tearDown(self):  # noqa
+        shutil.rmtree(self.tmpdir)
+
+
+class TestIntegrationBatch(TestCase, CliTestCase):
+
+    def setUp(self):  # noqa
+        self.tmpdir = tempfile.mkdtemp()
+        self.bundles_dir = os.path.join(self.tmpdir, 'bundles')
+        self.output_dir = os.path.join(self.tmpdir, 'output')
+        os.makedirs(os.path.join(self.bundles_dir, '.git'))
+        os.makedirs(self.output_dir)
+        for name in ['visualizer', 'frontend', 'backend']:
+            os.makedirs(os.path.join(self.bundles_dir, name))
+            with open(os.path.join(self.bundles_dir, name, 'bundle.conf'), 'w') as f:
+                f.write('name = {}'.format(name))
+
+    def test_sources(self):
+        stdout = MagicMock()
+        sources = [os.path.join(self.bundles_dir, name) for name in ['visualizer', 'backend']]
+        with patch('sys.stdout', stdout):
+            run(['--output-dir', self.output_dir, '--jobs', '1'] + sources)
+
+        self.assertRegex(
+            self.output(stdout),
+            strip_margin("""|Created digested ZIP archive at .*/visualizer-[0-9a-f]{64}\\.zip
+                            |Created digested ZIP archive at .*/backend-[0-9a-f]{64}\\.zip
+                            |"""))
+        self.assertEqual(len(os.listdir(self.output_dir)), 2)
+
+    def test_bundles_dir(self):
+        # Starting the compressing processes flushes stdout, so the output is captured as a whole
+        stdout = io.StringIO()
+        with patch('sys.stdout', stdout):
+            run(['--output-dir', self.output_dir, '--jobs', '3', '--bundles-dir', self.bundles_dir])
+
+        self.assertRegex(
+            stdout.getvalue(),
+            strip_margin("""|Created digested ZIP archive at .*/backend-[0-9a-f]{64}\\.zip
+                            |Created digested ZIP archive at .*/frontend-[0-9a-f]{64}\\.zip
+                            |Created digested ZIP archive at .*/visualizer-[0-9a-f]{64}\\.zip
+                            |"""))
+
+        for archive_name in os.listdir(self.output_dir):
+            name = archive_name.split('-')[0]
+            with zipfile.ZipFile(os.path.join(self.output_dir, archive_name)) as zip_file:
+                self.assertEqual(zip_file.read('{}/bundle.conf'.format(name)), 'name = {}'.format(name).encode())
+
+    def test_failure(self):
+        stdout = MagicMock()
+        stderr = MagicMock()
+        missing = os.path.join(self.tmpdir, 'missing.conf')
+        with patch('sys.stdout', stdout), patch('sys.stderr', stderr), self.assertRaises(SystemExit) as exit:
+            run(['--output-dir', self.output_dir, '--jobs', '1', missing, os.path.join(self.bundles_dir, 'backend')])
+
+        self.assertEqual(exit.exception.code, 1)
+        self.assertRegex(self.output(stdout), 'Created digested ZIP archive at .*/backend-[0-9a-f]{64}\\.zip\n')
+        self.assertIn('ERROR: Unable to package {}: '.format(missing), self.output(stderr))
+        self.assertEqual(len(os.listdir(self.output_dir)), 1)
+
+    def test_failure_unexpected(self):
+        stdout = MagicMock()
+        stderr = MagicMock()
+        sources = [os.path.join(self.bundles_dir, name) for name in ['visualizer', 'backend']]
+        entry_info = shazar.entry_info
+
+        def failing_entry_info(path, name, date_time=None):
+            if name.startswith('visualizer/'):
+                raise ValueError('test reason')
+            return entry_info(path, name, date_time)
+
+        with patch('sys.stdout', stdout), patch('sys.stderr', stderr), \
+                patch('conductr_cli.shazar.entry_info', failing_entry_info), self.assertRaises(SystemExit) as exit:
+            run(['--output-dir', self.output_dir, '--jobs', '1'] + sources)
+
+        self.assertEqual(exit.exception.code, 1)
+        self.assertRegex(self.output(stdout), 'Created digested ZIP archive at .*/backend-[0-9a-f]{64}\\.zip\n')
+        self.assertEqual('ERROR: Unable to package {}: test reason\n'.format(sources[0]), self.output(stderr))
+        self.assertEqual(len(os.listdir(self.output_dir)), 1)
+
+    def test_missing_bundles_dir(self):
+        stderr = MagicMock()
+        missing = os.path.join(self.tmpdir, 'missing')
+        with patch('sys.stderr', stderr), self.assertRaises(SystemExit) as exit:
+            run(['--output-dir', self.output_dir, '--bundles-dir', missing])
+
+        self.assertEqual(exit.exception.code, 2)
+        self.assertIn('--bundles-dir {} is not a directory'.format(missing), self.output(stderr))
+
+    def tearDown(self):  # noqa
+        shutil.rmtree(self.tmpdir)
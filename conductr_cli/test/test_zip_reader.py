@@ -0,0 +1,101 @@
+from unittest import TestCase
+from conductr_cli import zip_reader
+from conductr_cli.test.test_zip_writer import deflated_entry
+from conductr_cli.zip_writer import ZipWriter
+import io
+import zipfile
+
+try:
+    from unittest.mock import patch  # 3.3 and beyond
+except ImportError:
+    from mock import patch
+
+
+def create_archive(entries, compression=zipfile.ZIP_DEFLATED, comment=b''):
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, 'w', compression) as zip_file:
+        zip_file.comment = comment
+        for name, data in entries:
+            zip_file.writestr(name, data)
+    return out.getvalue()
+
+
+class TestZipReader(TestCase):
+
+    entries = [('bundle/bundle.conf', b'name = bundle'),
+               ('bundle/lib/bündle.jar', b'x' * 1000),
+               ('bundle/lib/nested/bundle.conf', b'name = nested')]
+
+    def find_and_read(self, archive, name, suffix=None):
+        file = io.BytesIO(archive)
+        zinfo, = [zinfo for zinfo in zip_reader.find_entries(file, name if suffix is None else suffix)
+                  if zinfo.filename == name]
+        return zinfo, zip_reader.read_entry(file, zinfo)
+
+    def test_same_entries_as_zipfile(self):
+        archive = create_archive(self.entries, comment=b'a comment')
+
+        found = zip_reader.find_entries(io.BytesIO(archive), '')
+        with zipfile.ZipFile(io.BytesIO(archive)) as zip_file:
+            self.assertEqual(
+                [(zinfo.filename, zinfo.compress_type, zinfo.CRC, zinfo.file_size, zinfo.compress_size, zinfo.header_offset)
+                 for zinfo in found],
+                [(zinfo.filename, zinfo.compress_type, zinfo.CRC, zinfo.file_size, zinfo.compress_size, zinfo.header_offset)
+                 for zinfo in zip_file.infolist()])
+
+    def test_suffix(self):
+        found = zip_reader.find_entries(io.BytesIO(create_archive(self.entries)), 'bundle.conf')
+
+        self.assertEqual([zinfo.filename for zinfo in found], ['bundle/bundle.conf', 'bundle/lib/nested/bundle.conf'])
+
+    def test_read_deflated(self):
+        zinfo, data = self.find_and_read(create_archive(self.entries), 'bundle/lib/bündle.jar', '.jar')
+
+        self.assertEqual(zinfo.compress_type, zipfile.ZIP_DEFLATED)
+        self.assertEqual(data, b'x' * 1000)
+
+    def test_read_stored(self):
+        zinfo, data = self.find_and_read(create_archive(self.entries, zipfile.ZIP_STORED), 'bundle/bundle.conf')
+
+        self.assertEqual(zinfo.compress_type, zipfile.ZIP_STORED)
+        self.assertEqual(data, b'name = bundle')
+
+    def test_read_other_compression(self):
+        zinfo, data = self.find_and_read(create_archive(self.entries, zipfile.ZIP_BZIP2), 'bundle/bundle.conf')
+
+        self.assertEqual(data, b'name = bundle')
+
+    def test_read_with_prefix(self):
+        zinfo, data = self.find_and_read(b'#!/bin/sh\nexit 0\n' + create_archive(self.entries), 'bundle/bundle.conf')
+
+        self.assertEqual(data, b'name = bundle')
+
+    def test_read_with_signature_in_comment(self):
+        zinfo, data = self.find_and_read(create_archive(self.entries, comment=b'PK\x05\x06'), 'bundle/bundle.conf')
+
+        self.assertEqual(data, b'name = bundle')
+
+    def test_read_zip64(self):
+        out = io.BytesIO()
+        with patch('zipfile.ZIP_FILECOUNT_LIMIT', 1), ZipWriter(out) as zip_writer:
+            for name, data in self.entries:
+                zip_writer.write_entry(*deflated_entry(name, data))
+
+        zinfo, data = self.find_and_read(out.getvalue(), 'bundle/lib/nested/bundle.conf')
+
+        self.assertEqual(data, b'name = nested')
+
+    def test_bad_crc(self):
+        archive = create_archive(self.entries, zipfile.ZIP_STORED).replace(b'name = bundle', b'name = bungle')
+
+        with self.assertRaises(zipfile.BadZipFile):
+            self.find_and_read(archive, 'bundle/bundle.conf')
+
+    def test_not_a_zip_file(self):
+        with self.assertRaises(zipfile.BadZipFile):
+            zip_reader.find_entries(io.BytesIO(b'not a zip file'), 'bundle.conf')
+
+    def test_zip64_values(self):
+        extra = b'\x0a\x00\x04\x00abcd' + b'\x01\x00\x10\x00' + (5).to_bytes(8, 'little') + (7).to_bytes(8, 'little')
+
+        self.assertEqual(zip_reader.zip64_values(extra, [0xffffffff, 3, 0xffffffff]), [5, 3, 7])
@@ -0,0 +1,57 @@
+from unittest import TestCase
+from conductr_cli.zip_writer import ZipWriter
+import io
+import zipfile
+import zlib
+
+try:
+    from unittest.mock import patch  # 3.3 and beyond
+except ImportError:
+    from mock import patch
+
+
+def deflated_entry(name, data):
+    zinfo = zipfile.ZipInfo(name, date_time=(2015, 9, 21, 12, 0, 0))
+    zinfo.external_attr = 0o644 << 16
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    compressed = compressor.compress(data) + compressor.flush()
+    zinfo.compress_type = zipfile.ZIP_DEFLATED
+    zinfo.CRC = zlib.crc32(data)
+    zinfo.file_size = len(data)
+    zinfo.compress_size = len(compressed)
+    return zinfo, compressed
+
+
+class TestZipWriter(TestCase):
+
+    def write_archive(self, entries):
+        out = io.BytesIO()
+        with ZipWriter(out) as zip_writer:
+            for name, data in entries:
+                zip_writer.write_entry(*deflated_entry(name, data))
+        return out.getvalue()
+
+    def test_readable_by_zipfile(self):
+        archive = self.write_archive([('bundle/bundle.conf', b'name = bundle'), ('bundle/lib/bündle.jar', b'x' * 1000)])
+
+        with zipfile.ZipFile(io.BytesIO(archive)) as zip_file:
+            self.assertIsNone(zip_file.testzip())
+            self.assertEqual(zip_file.namelist(), ['bundle/bundle.conf', 'bundle/lib/bündle.jar'])
+            self.assertEqual(zip_file.read('bundle/bundle.conf'), b'name = bundle')
+            self.assertEqual(zip_file.getinfo('bundle/lib/bündle.jar').date_time, (2015, 9, 21, 12, 0, 0))
+
+    def test_same_layout_as_zipfile(self):
+        data = b'name = bundle'
+        expected = io.BytesIO()
+        with zipfile.ZipFile(expected, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+            zip_file.writestr(deflated_entry('bundle/bundle.conf', data)[0], data)
+
+        self.assertEqual(self.write_archive([('bundle/bundle.conf', data)]), expected.getvalue())
+
+    def test_zip64_end_record(self):
+        with patch('zipfile.ZIP_FILECOUNT_LIMIT', 1):
+            archive = self.write_archive([('a', b'a'), ('b', b'b')])
+
+        self.assertIn(zipfile.stringEndArchive64, archive)
+        with zipfile.ZipFile(io.BytesIO(archive)) as zip_file:
+            self.assertEqual(zip_file.namelist(), ['a', 'b'])
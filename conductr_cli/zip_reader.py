@@ -0,0 +1,130 @@
+import os
+import struct
+import zipfile
+import zlib
+
+
+central_directory_struct = struct.Struct(zipfile.structCentralDir)
+# The lengths of the name, extra field and comment of a central directory record, at offset 28
+lengths_struct = struct.Struct('<HHH')
+
+
+def find_entries(file, suffix):
+    """
+    Returns the ZipInfo of every entry whose name ends with the given ASCII suffix, in the order of the central
+    directory. Only the end records and the central directory are read.
+
+    Unlike `zipfile.ZipFile`, which decodes every record to a ZipInfo, records are only decoded if their name matches,
+    which is considerably faster for archives of many entries. Only the name, flags, compression, CRC, sizes and
+    offset of the returned ZipInfos are set.
+    """
+
+    suffix = suffix.encode('ascii')
+    concat, central_directory = read_central_directory(file)
+    entries = []
+    position = 0
+    while position < len(central_directory):
+        if not central_directory.startswith(zipfile.stringCentralDir, position) or \
+                position + zipfile.sizeCentralDir > len(central_directory):
+            raise zipfile.BadZipFile('Bad magic number for central directory')
+        name_length, extra_length, comment_length = lengths_struct.unpack_from(central_directory, position + 28)
+        name_start = position + zipfile.sizeCentralDir
+        extra_start = name_start + name_length
+
+        if central_directory.endswith(suffix, name_start, extra_start):
+            (signature, create_version, create_system, extract_version, reserved, flag_bits, compress_type, time, date,
+             crc, compress_size, file_size, name_length, extra_length, comment_length, disk, internal_attr,
+             external_attr, header_offset) = central_directory_struct.unpack_from(central_directory, position)
+            name = central_directory[name_start:extra_start].decode('utf-8' if flag_bits & 0x800 else 'cp437')
+            zinfo = zipfile.ZipInfo(name)
+            zinfo.flag_bits = flag_bits
+            zinfo.compress_type = compress_type
+            zinfo.CRC = crc
+            zinfo.file_size, zinfo.compress_size, zinfo.header_offset = zip64_values(
+                central_directory[extra_start:extra_start + extra_length], [file_size, compress_size, header_offset])
+            zinfo.header_offset += concat
+            entries.append(zinfo)
+
+        position = extra_start + extra_length + comment_length
+    return entries
+
+
+def read_entry(file, zinfo):
+    """Returns the uncompressed contents of an entry found by `find_entries`, checking its CRC"""
+
+    if zinfo.flag_bits & 0x1 or zinfo.compress_type not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+        # Encrypted entries and other compression methods are left to zipfile
+        with zipfile.ZipFile(file) as zip_file:
+            return zip_file.read(zinfo.filename)
+
+    file.seek(zinfo.header_offset)
+    header = file.read(zipfile.sizeFileHeader)
+    if len(header) != zipfile.sizeFileHeader or header[:4] != zipfile.stringFileHeader:
+        raise zipfile.BadZipFile('Bad magic number for file header of {}'.format(zinfo.filename))
+    name_length, extra_length = struct.unpack(zipfile.structFileHeader, header)[-2:]
+    file.seek(name_length + extra_length, os.SEEK_CUR)
+
+    data = file.read(zinfo.compress_size)
+    if zinfo.compress_type == zipfile.ZIP_DEFLATED:
+        data = zlib.decompress(data, -15)
+    if zlib.crc32(data) != zinfo.CRC:
+        raise zipfile.BadZipFile('Bad CRC-32 for file {}'.format(zinfo.filename))
+    return data
+
+
+def read_central_directory(file):
+    """
+    Returns the number of bytes preceding the archive within the file, e.g. of a self-extracting stub,
+    and the contents of the central directory.
+    """
+
+    file_size = file.seek(0, os.SEEK_END)
+    # The end of central directory record may be followed by a comment of up to 64 KiB
+    tail_start = max(0, file_size - zipfile.sizeEndCentDir - 0xffff)
+    file.seek(tail_start)
+    tail = file.read()
+    # The record is the last signature whose comment length reaches the end, as the comment may contain the signature
+    end = len(tail)
+    while True:
+        end = tail.rfind(zipfile.stringEndArchive, 0, end)
+        if end < 0:
+            raise zipfile.BadZipFile('File is not a zip file')
+        record = tail[end:end + zipfile.sizeEndCentDir]
+        if len(record) == zipfile.sizeEndCentDir:
+            size, offset, comment_length = struct.unpack(zipfile.structEndArchive, record)[5:8]
+            if end + zipfile.sizeEndCentDir + comment_length == len(tail):
+                break
+    location = tail_start + end
+
+    locator_start = end - zipfile.sizeEndCentDir64Locator
+    if locator_start >= 0 and tail[locator_start:locator_start + 4] == zipfile.stringEndArchive64Locator:
+        file.seek(location - zipfile.sizeEndCentDir64Locator - zipfile.sizeEndCentDir64)
+        record64 = file.read(zipfile.sizeEndCentDir64)
+        if len(record64) == zipfile.sizeEndCentDir64 and record64[:4] == zipfile.stringEndArchive64:
+            size, offset = struct.unpack(zipfile.structEndArchive64, record64)[-2:]
+            location -= zipfile.sizeEndCentDir64Locator + zipfile.sizeEndCentDir64
+
+    concat = location - size - offset
+    if concat < 0:
+        raise zipfile.BadZipFile('Bad offset for central directory')
+    file.seek(offset + concat)
+    central_directory = file.read(size)
+    if len(central_directory) != size:
+        raise zipfile.BadZipFile('Truncated central directory')
+    return concat, central_directory
+
+
+def zip64_values(extra, values):
+    """Replaces the values saturated to 0xffffffff by those of the ZIP64 extra field, in the order they appear in"""
+
+    saturated = [index for index, value in enumerate(values) if value == 0xffffffff]
+    position = 0
+    while saturated and position + 4 <= len(extra):
+        field_id, field_size = struct.unpack('<HH', extra[position:position + 4])
+        if field_id == 1:
+            for index, value in zip(saturated, struct.unpack_from('<' + 'Q' * min(len(saturated), field_size // 8),
+                                                                  extra, position + 4)):
+                values[index] = value
+            break
+        position += 4 + field_size
+    return values
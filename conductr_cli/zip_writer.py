@@ -0,0 +1,104 @@
+import shutil
+import struct
+import zipfile
+
+
+# The size of the chunks in which the data of entries given as files is copied
+copy_size = 1024 * 1024
+
+
+class ZipWriter:
+    """
+    Writes a ZIP archive from entries whose data has already been compressed.
+
+    Entries are written strictly sequentially and nothing is ever rewritten, so the archive can be written
+    to a non-seekable file as long as it provides `tell`. The layout follows the one written by `zipfile`,
+    including the ZIP64 extensions for large archives.
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.entries = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+
+    def write_entry(self, zinfo, data):
+        """
+        Writes an entry and returns the offset of its data within the archive. The `CRC`, `file_size`,
+        `compress_size` and `compress_type` of the given `ZipInfo` must describe the given, compressed data,
+        which is either bytes or a binary file that is copied from its position to its end.
+        """
+
+        zinfo.header_offset = self.file.tell()
+        self.file.write(zinfo.FileHeader())
+        data_offset = self.file.tell()
+        if isinstance(data, bytes):
+            self.file.write(data)
+        else:
+            shutil.copyfileobj(data, self.file, copy_size)
+        self.entries.append(zinfo)
+        return data_offset
+
+    def close(self):
+        """Writes the central directory and the end of archive records"""
+
+        start = self.file.tell()
+        for zinfo in self.entries:
+            self.file.write(central_directory_record(zinfo))
+        end = self.file.tell()
+
+        count = len(self.entries)
+        size = end - start
+        offset = start
+        if count > zipfile.ZIP_FILECOUNT_LIMIT or offset > zipfile.ZIP64_LIMIT or size > zipfile.ZIP64_LIMIT:
+            self.file.write(struct.pack(zipfile.structEndArchive64, zipfile.stringEndArchive64,
+                                        44, 45, 45, 0, 0, count, count, size, offset))
+            self.file.write(struct.pack(zipfile.structEndArchive64Locator, zipfile.stringEndArchive64Locator,
+                                        0, end, 1))
+            count = min(count, 0xffff)
+            size = min(size, 0xffffffff)
+            offset = min(offset, 0xffffffff)
+
+        self.file.write(struct.pack(zipfile.structEndArchive, zipfile.stringEndArchive,
+                                    0, 0, count, count, size, offset, 0))
+        self.file.flush()
+
+
+def central_directory_record(zinfo):
+    dt = zinfo.date_time
+    dosdate = (dt[0] - 1980) << 9 | dt[1] << 5 | dt[2]
+    dostime = dt[3] << 11 | dt[4] << 5 | (dt[5] // 2)
+
+    zip64_fields = []
+    file_size, compress_size, header_offset = zinfo.file_size, zinfo.compress_size, zinfo.header_offset
+    if file_size > zipfile.ZIP64_LIMIT or compress_size > zipfile.ZIP64_LIMIT:
+        zip64_fields.extend([file_size, compress_size])
+        file_size, compress_size = 0xffffffff, 0xffffffff
+    if header_offset > zipfile.ZIP64_LIMIT:
+        zip64_fields.append(header_offset)
+        header_offset = 0xffffffff
+
+    extra = zinfo.extra
+    min_version = 0
+    if zip64_fields:
+        extra = struct.pack('<HH' + 'Q' * len(zip64_fields), 1, 8 * len(zip64_fields), *zip64_fields) + extra
+        min_version = zipfile.ZIP64_VERSION
+
+    try:
+        filename, flag_bits = zinfo.filename.encode('ascii'), zinfo.flag_bits
+    except UnicodeEncodeError:
+        filename, flag_bits = zinfo.filename.encode('utf-8'), zinfo.flag_bits | 0x800
+
+    record = struct.pack(zipfile.structCentralDir, zipfile.stringCentralDir,
+                         max(min_version, zinfo.create_version), zinfo.create_system,
+                         max(min_version, zinfo.extract_version), zinfo.reserved,
+                         flag_bits, zinfo.compress_type, dostime, dosdate,
+                         zinfo.CRC, compress_size, file_size,
+                         len(filename), len(extra), len(zinfo.comment),
+                         0, zinfo.internal_attr, zinfo.external_attr, header_offset)
+    return record + filename + extra + zinfo.comment
@@ -13,11 +13,6 @@ install_requires = [
     'pyhocon==0.2.1',
     'arrow>=0.6.0'
 ]
-if sys.version_info[:2] == (3, 2):
-    install_requires.extend([
-        'pathlib==1.0.1',
-        'mock==1.0.1'
-    ])
 
 
 class Tox(test):
@@ -51,11 +46,12 @@ setup(
 
     entry_points={
         'console_scripts': [
-            'conduct = conductr_cli.conduct:run',
+            'conduct = conductr_cli.conduct_agent:run',
             'shazar = conductr_cli.shazar:run',
         ],
     },
 
+    python_requires='>=3.7',
     install_requires=install_requires,
     tests_require=['tox'],
     test_suite='conductr_cli.test',